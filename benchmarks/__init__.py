@@ -0,0 +1,4 @@
+"""Offline performance benchmarks for SmartBot.
+
+Run any module with ``python -m benchmarks.<name>`` from the project root.
+"""
@@ -0,0 +1,89 @@
+"""Throughput of a stub Ollama host pushed past its capacity, with and without admission control.
+
+The stub slows down with the square of the requests in flight beyond its
+capacity. Many client threads send requests for a fixed duration, straight
+to the provider and then through an AdmissionProvider::
+
+    python -m benchmarks.bench_admission --threads 32 --duration 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+
+from smartbot.core.interfaces import LLMProvider, Message, ProviderOverloadedError
+from smartbot.providers.limiter import AdmissionProvider
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import AdmissionConfig, OllamaConfig
+
+from .bench_ollama_pool import percentile
+from .stub_server import StubOllamaServer
+
+DEFAULT_THREADS = 32
+DEFAULT_DURATION = 3.0
+CAPACITY = 4
+LATENCY = 0.02
+
+
+def _worker(provider: LLMProvider, deadline: float, samples: list[float],
+            rejected: list[int]) -> None:
+    prompt = Message(role="user", content="ping")
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            provider.generate_response(prompt, [])
+        except ProviderOverloadedError:
+            rejected.append(1)
+            continue
+        samples.append(time.perf_counter() - start)
+
+
+def _load(provider: LLMProvider, threads: int, duration: float) -> tuple[list[float], int]:
+    samples: list[float] = []
+    rejected: list[int] = []
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_worker, args=(provider, deadline, samples, rejected))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return samples, len(rejected)
+
+
+def run(threads: int, duration: float) -> None:
+    results = {}
+    for mode in ("unlimited", "admission"):
+        # A fresh stub per run, so the second one does not inherit a backlog
+        with StubOllamaServer(first_token_delay=LATENCY, token_delay=0,
+                              capacity=CAPACITY) as stub:
+            config = OllamaConfig(base_url=stub.base_url, model_name="stub",
+                                  pool_maxsize=threads)
+            provider: LLMProvider = OllamaProvider(config)
+            if mode == "admission":
+                provider = AdmissionProvider(provider, AdmissionConfig())
+            results[mode] = _load(provider, threads, duration)
+
+    print(f"{'mode':>10} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'rejected':>8}")
+    print("-" * 56)
+    for mode, (samples, rejected) in results.items():
+        print(f"{mode:>10} | {len(samples) / duration:>8.0f} | "
+              f"{statistics.median(samples) * 1e3:>8.1f} | "
+              f"{percentile(samples, 0.99) * 1e3:>8.1f} | {rejected:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    args = parser.parse_args()
+    run(args.threads, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Throughput of the batch runner against the stub Ollama server, by worker count.
+
+    python -m benchmarks.bench_batch --items 500 --workers 1 4 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import OllamaConfig
+from smartbot.runtime.batch import BatchRunner, build_responder
+
+from .stub_server import StubOllamaServer
+
+DEFAULT_ITEMS = 500
+DEFAULT_WORKERS = (1, 4, 16)
+STUB_LATENCY = 0.005
+
+
+def run(items: int, worker_counts: list[int]) -> None:
+    with tempfile.TemporaryDirectory() as directory, StubOllamaServer(
+        first_token_delay=STUB_LATENCY, token_delay=0
+    ) as stub:
+        prompts = Path(directory) / "prompts.jsonl"
+        prompts.write_text(
+            "".join(json.dumps({"prompt": f"prompt {index}"}) + "\n" for index in range(items)),
+            encoding="utf-8",
+        )
+
+        print(f"{'workers':>8} | {'items/s':>10} | {'seconds':>8}")
+        print("-" * 32)
+        for workers in worker_counts:
+            config = OllamaConfig(base_url=stub.base_url, model_name="stub", pool_maxsize=workers)
+            provider = OllamaProvider(config)
+            runner = BatchRunner(build_responder(provider), workers=workers, progress_every=items)
+            report = runner.run(str(prompts), str(Path(directory) / "out.jsonl"), resume=False)
+            provider.close()
+            print(f"{workers:>8} | {report.throughput:>10.1f} | {report.elapsed:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS)
+    parser.add_argument("--workers", type=int, nargs="+", default=list(DEFAULT_WORKERS))
+    args = parser.parse_args()
+    run(args.items, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Requests/sec of the HTTP chat server with EchoProvider and session memory.
+
+Client threads keep one keep-alive connection each and post chat turns to
+their own session for a fixed duration::
+
+    python -m benchmarks.bench_chat_server --clients 8 --workers 8 --duration 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+
+import requests
+
+from smartbot.core.agent import Agent
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+from smartbot.runtime.server import ChatServer
+
+from .bench_ollama_pool import percentile
+
+DEFAULT_CLIENTS = 8
+DEFAULT_WORKERS = 8
+DEFAULT_DURATION = 5.0
+
+
+class Counters:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+
+def _client(url: str, session_id: str, deadline: float, counters: Counters) -> None:
+    with requests.Session() as http:
+        turn = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = http.post(
+                f"{url}/chat", json={"message": f"turn {turn}", "session_id": session_id}
+            )
+            elapsed = time.perf_counter() - start
+            with counters.lock:
+                if response.status_code == 503:
+                    counters.rejected += 1
+                else:
+                    counters.latencies.append(elapsed)
+            turn += 1
+
+
+def run(clients: int, workers: int, queue_size: int, duration: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        agent = Agent(provider=EchoProvider(EchoConfig()), memory=SessionMemory(directory))
+        server = ChatServer(agent, port=0, workers=workers, queue_size=queue_size)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        counters = Counters()
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=_client, args=(server.url, f"user{index}", deadline, counters))
+            for index in range(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        server.close()
+
+    samples = counters.latencies
+    print(f"clients={clients} workers={workers} queue={queue_size}")
+    print(f"requests/s : {len(samples) / duration:.0f}")
+    print(f"rejected   : {counters.rejected}")
+    print(f"p50 / p99  : {percentile(samples, 0.5) * 1e3:.2f} / "
+          f"{percentile(samples, 0.99) * 1e3:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    args = parser.parse_args()
+    run(args.clients, args.workers, args.queue_size, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Tail latency of a stub Ollama host with occasional slow requests, with and without hedging.
+
+Two percent of the requests take ten times longer. Client threads send
+requests for a fixed duration straight to the provider and then through a
+HedgingProvider that re-sends the requests slower than the p95::
+
+    python -m benchmarks.bench_hedging --threads 4 --duration 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+
+from smartbot.core.interfaces import LLMProvider, Message
+from smartbot.providers.hedging import HedgingProvider
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import HedgingConfig, OllamaConfig
+
+from .bench_ollama_pool import percentile
+from .stub_server import StubOllamaServer
+
+DEFAULT_THREADS = 4
+DEFAULT_DURATION = 5.0
+LATENCY = 0.02
+TAIL_PROBABILITY = 0.02
+TAIL_DELAY = 0.2
+
+
+def _worker(provider: LLMProvider, deadline: float, samples: list[float]) -> None:
+    prompt = Message(role="user", content="ping")
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        provider.generate_response(prompt, [])
+        samples.append(time.perf_counter() - start)
+
+
+def _load(provider: LLMProvider, threads: int, duration: float) -> list[float]:
+    samples: list[float] = []
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_worker, args=(provider, deadline, samples))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return samples
+
+
+def run(threads: int, duration: float) -> None:
+    results = {}
+    for mode in ("plain", "hedged"):
+        with StubOllamaServer(first_token_delay=LATENCY, token_delay=0,
+                              tail_probability=TAIL_PROBABILITY, tail_delay=TAIL_DELAY) as stub:
+            config = OllamaConfig(base_url=stub.base_url, model_name="stub",
+                                  pool_maxsize=2 * threads)
+            provider: LLMProvider = OllamaProvider(config)
+            if mode == "hedged":
+                provider = HedgingProvider(provider, HedgingConfig(enabled=True))
+            samples = _load(provider, threads, duration)
+            results[mode] = (samples, stub.requests / len(samples) - 1)
+
+    print(f"{'mode':>6} | {'req/s':>7} | {'p50 ms':>7} | {'p99 ms':>7} | {'max ms':>7} | "
+          f"{'extra load':>10}")
+    print("-" * 62)
+    for mode, (samples, extra) in results.items():
+        print(f"{mode:>6} | {len(samples) / duration:>7.0f} | "
+              f"{statistics.median(samples) * 1e3:>7.1f} | "
+              f"{percentile(samples, 0.99) * 1e3:>7.1f} | {max(samples) * 1e3:>7.1f} | "
+              f"{extra:>10.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    args = parser.parse_args()
+    run(args.threads, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Size on disk and load time of a long history in each file format.
+
+Every format holds the same ``size`` messages and is loaded with a window of
+``window`` messages, the common case of a long conversation of which only the
+tail is sent to the model.
+
+Usage::
+
+    python -m benchmarks.bench_history_format --sizes 1000 100000 --window 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from smartbot.memory.binary_memory import BinaryMemory, encode_record
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.jsonl_memory import JsonlMemory
+from smartbot.memory.records import MessageRecord
+
+from .bench_memory_journal import _seed_files, _seed_history
+
+DEFAULT_SIZES = (1_000, 100_000)
+DEFAULT_WINDOW = 10
+DEFAULT_REPEAT = 5
+
+
+def _seed_binary(path: Path, records: list[MessageRecord], *, compression: bool) -> Path:
+    path.write_bytes(b"".join(encode_record(r, compression=compression) for r in records))
+    return path
+
+
+def _time_load(load: Callable[[], object], repeat: int) -> float:
+    """Median wall time of ``load``, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(sizes: tuple[int, ...], window: int, repeat: int) -> None:
+    print(f"{'messages':>10} | {'format':>12} | {'size KiB':>10} | {'load ms':>10}")
+    print("-" * 52)
+    for size in sizes:
+        messages = _seed_history(size)
+        records = [MessageRecord.from_message(m) for m in messages]
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            json_path, jsonl_path = _seed_files(directory, messages)
+            formats: list[tuple[str, Path, Callable[[Path], object]]] = [
+                ("json", json_path, lambda p: JsonFileMemory(str(p), max_messages=window)),
+                # A huge compaction threshold keeps the loads read-only
+                ("jsonl", jsonl_path,
+                 lambda p, limit=size * 2: JsonlMemory(str(p), max_messages=window,
+                                                   compact_threshold=limit)),
+                ("binary", _seed_binary(directory / "plain.bin", records, compression=False),
+                 lambda p: BinaryMemory(str(p), max_messages=window)),
+                ("binary+zlib", _seed_binary(directory / "zlib.bin", records, compression=True),
+                 lambda p: BinaryMemory(str(p), max_messages=window)),
+            ]
+            for name, path, load in formats:
+                kib = path.stat().st_size / 1024
+                load_ms = _time_load(lambda path=path, load=load: load(path), repeat)
+                print(f"{size:>10} | {name:>12} | {kib:>10.1f} | {load_ms:>10.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+    run(tuple(args.sizes), args.window, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
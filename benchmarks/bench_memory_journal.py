@@ -0,0 +1,87 @@
+"""Per-turn cost of JsonFileMemory (full rewrite) vs JsonlMemory (append-only journal).
+
+Usage::
+
+    python -m benchmarks.bench_memory_journal --sizes 10 1000 100000 --turns 20
+    python -m benchmarks.bench_memory_journal --durability batched   # write-behind
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from smartbot.core.interfaces import Message
+from smartbot.memory.json_memory import DURABILITY_MODES, Durability, JsonFileMemory
+from smartbot.memory.jsonl_memory import JsonlMemory
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+DEFAULT_TURNS = 20
+CONTENT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4
+
+
+def _seed_history(size: int) -> list[Message]:
+    return [
+        Message(role="user" if index % 2 == 0 else "assistant", content=f"{index} {CONTENT}")
+        for index in range(size)
+    ]
+
+
+def _seed_files(directory: Path, messages: list[Message]) -> tuple[Path, Path]:
+    json_path = directory / "history.json"
+    json_path.write_bytes(TypeAdapter(list[Message]).dump_json(messages, indent=2))
+
+    jsonl_path = directory / "history.jsonl"
+    jsonl_path.write_bytes(b"".join(m.model_dump_json().encode() + b"\n" for m in messages))
+    return json_path, jsonl_path
+
+
+def _time_turns(memory: JsonFileMemory, turns: int) -> list[float]:
+    """Time one user turn (user + assistant message) at a time, in milliseconds."""
+    samples = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        memory.add_message("user", f"question {turn} {CONTENT}")
+        memory.add_message("assistant", f"answer {turn} {CONTENT}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run(sizes: tuple[int, ...], turns: int, durability: Durability = "always") -> None:
+    print(f"{'messages':>10} | {'rewrite ms/turn':>16} | {'journal ms/turn':>16} | {'speedup':>8}")
+    print("-" * 60)
+    for size in sizes:
+        messages = _seed_history(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path, jsonl_path = _seed_files(Path(tmp), messages)
+
+            rewrite = JsonFileMemory(file_path=str(json_path), max_messages=size,
+                                     durability=durability)
+            journal = JsonlMemory(file_path=str(jsonl_path), max_messages=size,
+                                  durability=durability)
+
+            rewrite_ms = statistics.median(_time_turns(rewrite, turns))
+            journal_ms = statistics.median(_time_turns(journal, turns))
+            rewrite.close()
+            journal.close()
+
+        speedup = rewrite_ms / journal_ms if journal_ms else float("inf")
+        print(f"{size:>10} | {rewrite_ms:>16.3f} | {journal_ms:>16.3f} | {speedup:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS)
+    parser.add_argument("--durability", choices=DURABILITY_MODES, default="always")
+    args = parser.parse_args()
+    run(tuple(args.sizes), args.turns, args.durability)
+
+
+if __name__ == "__main__":
+    main()
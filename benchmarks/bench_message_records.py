@@ -0,0 +1,148 @@
+"""Cost of the memory hot path with pydantic Messages vs compact MessageRecords.
+
+For each number of stored messages it measures loading them from a JSON
+history file, the RAM retained per stored message, and one turn (two
+``add_message`` calls plus a ``get_history``) on conversations of
+``WINDOW`` messages, as served by SessionMemory::
+
+    python -m benchmarks.bench_message_records --sizes 1000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from smartbot.core.interfaces import Message, Role
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.records import MessageRecord, to_messages
+
+DEFAULT_SIZES = (1_000, 100_000)
+TURNS = 2_000
+WINDOW = 10
+
+
+class PydanticHistory:
+    """The previous in-memory layout: one validated Message per stored message."""
+
+    def __init__(self, messages: list[Message]) -> None:
+        self._messages = messages
+
+    def add_message(self, role: Role, content: str) -> None:
+        self._messages.append(Message(role=role, content=content))
+        self._messages = self._messages[-WINDOW:]
+
+    def get_history(self) -> list[Message]:
+        return self._messages.copy()
+
+
+class RecordHistory:
+    """The layout now used by the backends."""
+
+    def __init__(self, records: list[MessageRecord]) -> None:
+        self._messages = records
+
+    def add_message(self, role: Role, content: str) -> None:
+        self._messages.append(MessageRecord.create(role, content))
+        self._messages = self._messages[-WINDOW:]
+
+    def get_history(self) -> list[Message]:
+        return to_messages(self._messages)
+
+
+History = PydanticHistory | RecordHistory
+
+
+def load_pydantic(raw: bytes) -> list[History]:
+    messages = TypeAdapter(list[Message]).validate_json(raw)
+    return [
+        PydanticHistory(messages[start:start + WINDOW])
+        for start in range(0, len(messages), WINDOW)
+    ]
+
+
+def load_records(path: Path, size: int) -> list[History]:
+    records = JsonFileMemory(file_path=str(path), max_messages=size)._messages
+    return [
+        RecordHistory(records[start:start + WINDOW])
+        for start in range(0, len(records), WINDOW)
+    ]
+
+
+def run_turns(sessions: list[History], turns: int = TURNS) -> None:
+    for index in range(turns):
+        history = sessions[index % len(sessions)]
+        history.add_message("user", f"question {index}")
+        history.get_history()
+        history.add_message("assistant", f"answer {index}")
+
+
+def allocations(action: Callable[[], object]) -> tuple[int, int]:
+    """Return the memory blocks allocated by ``action`` and the bytes it leaves alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = action()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del result
+    blocks = sum(max(stat.count_diff, 0) for stat in stats)
+    retained = sum(stat.size_diff for stat in stats)
+    return blocks, retained
+
+
+def timed(action: Callable[[], object]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def run(sizes: list[int]) -> None:
+    print(f"{'messages':>9} | {'layout':>8} | {'load ms':>8} | {'turn us':>8} | "
+          f"{'blocks/turn':>11} | {'bytes/msg':>9}")
+    print("-" * 70)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "history.json"
+            seed = JsonFileMemory(file_path=str(path), max_messages=size)
+            seed._messages = [MessageRecord.create("user", f"message {i}") for i in range(size)]
+            seed._save_memory()
+
+            layouts: dict[str, Callable[[], list[History]]] = {
+                "pydantic": partial(load_pydantic, path.read_bytes()),
+                "records": partial(load_records, path, size),
+            }
+            for name, load in layouts.items():
+                load_time = timed(load)
+                _, retained = allocations(load)
+
+                sessions = load()
+                for history in sessions:
+                    history.get_history()
+                turn_time = timed(partial(run_turns, sessions))
+                blocks, _ = allocations(partial(run_turns, sessions))
+
+                print(f"{size:>9} | {name:>8} | {load_time * 1e3:>8.1f} | "
+                      f"{turn_time / TURNS * 1e6:>8.1f} | {blocks / TURNS:>11.1f} | "
+                      f"{retained / size:>9.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
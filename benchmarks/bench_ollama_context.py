@@ -0,0 +1,65 @@
+"""Prompt evaluated per turn by OllamaProvider in "chat" vs "context" mode.
+
+Runs a long conversation through the Agent against the local stub server,
+which sleeps ``--prompt-delay`` seconds per character the model would have
+to evaluate. In chat mode that is the whole history on every turn; in
+context mode only the new prompt::
+
+    python -m benchmarks.bench_ollama_context --turns 40 --prompt-delay 0.00002
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from smartbot.core.agent import Agent
+from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import OllamaConfig
+
+from .stub_server import StubOllamaServer
+
+DEFAULT_TURNS = 40
+DEFAULT_PROMPT_DELAY = 0.00002
+QUESTION = "Tell me something more about the opening hours of the shop, please. "
+
+
+def _conversation(base_url: str, mode: str, turns: int,
+                  stub: StubOllamaServer) -> list[tuple[int, float]]:
+    """(characters evaluated, seconds) of each turn."""
+    config = OllamaConfig(base_url=base_url, conversation_mode=mode, context_tokens=None)
+    agent = Agent(provider=OllamaProvider(config), memory=InMemoryBackend())
+    samples = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        agent.handle_message(f"{turn}. {QUESTION * 3}")
+        samples.append((stub.prompts[-1], time.perf_counter() - start))
+    agent.close()
+    return samples
+
+
+def run(turns: int, prompt_delay: float) -> None:
+    with StubOllamaServer(first_token_delay=0, token_delay=0, prompt_delay=prompt_delay) as stub:
+        chat = _conversation(stub.base_url, "chat", turns, stub)
+        context = _conversation(stub.base_url, "context", turns, stub)
+
+    print(f"{'turn':>5} | {'chat chars':>10} | {'chat ms':>8} | "
+          f"{'context chars':>13} | {'context ms':>10}")
+    print("-" * 60)
+    for turn in sorted({0, turns // 4, turns // 2, turns - 1}):
+        (chat_chars, chat_s), (context_chars, context_s) = chat[turn], context[turn]
+        print(f"{turn + 1:>5} | {chat_chars:>10} | {chat_s * 1000:>8.1f} | "
+              f"{context_chars:>13} | {context_s * 1000:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS)
+    parser.add_argument("--prompt-delay", type=float, default=DEFAULT_PROMPT_DELAY)
+    args = parser.parse_args()
+    run(args.turns, args.prompt_delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Latency of OllamaProvider under sustained load: pooled keep-alive vs one connection per call.
+
+Several client threads hammer the local stub server for a fixed duration::
+
+    python -m benchmarks.bench_ollama_pool --threads 8 --duration 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+
+from smartbot.core.interfaces import Message
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import OllamaConfig
+
+from .stub_server import StubOllamaServer
+
+DEFAULT_THREADS = 8
+DEFAULT_DURATION = 5.0
+STUB_LATENCY = 0.002
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _worker(provider: OllamaProvider, deadline: float, samples: list[float]) -> None:
+    prompt = Message(role="user", content="ping")
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        provider.generate_response(prompt, [])
+        samples.append(time.perf_counter() - start)
+
+
+def _load(base_url: str, keep_alive: bool, threads: int, duration: float) -> list[float]:
+    config = OllamaConfig(
+        base_url=base_url,
+        model_name="stub",
+        http_keep_alive=keep_alive,
+        pool_maxsize=threads,
+    )
+    provider = OllamaProvider(config)
+    samples: list[float] = []
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_worker, args=(provider, deadline, samples))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    provider.close()
+    return samples
+
+
+def run(threads: int, duration: float) -> None:
+    print(f"{'mode':>12} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'connections':>11}")
+    print("-" * 60)
+    for mode, keep_alive in (("per-call", False), ("pooled", True)):
+        with StubOllamaServer(first_token_delay=STUB_LATENCY, token_delay=0) as stub:
+            samples = _load(stub.base_url, keep_alive, threads, duration)
+            connections = stub.connections
+
+        throughput = len(samples) / duration
+        p50 = statistics.median(samples) * 1000
+        p99 = percentile(samples, 0.99) * 1000
+        print(f"{mode:>12} | {throughput:>8.0f} | {p50:>8.2f} | {p99:>8.2f} | {connections:>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    args = parser.parse_args()
+    run(args.threads, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""CPU time spent per turn building and encoding the /api/chat body, by history length.
+
+Each turn resends the whole conversation plus one new message, like the
+Agent does. ``dict`` builds the payload of plain dicts and encodes it with
+``json`` as ``requests`` did; ``codec`` joins the cached fragments of the
+messages, so only the new one is encoded::
+
+    python -m benchmarks.bench_payload --turns 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from smartbot.core.interfaces import Message
+from smartbot.providers.local_provider import build_chat_payload, encode_chat_payload
+from smartbot.providers.models import OllamaConfig
+
+DEFAULT_TURNS = 200
+HISTORY_LENGTHS = (10, 100, 1_000, 5_000)
+# Typical chat message, with some non-ASCII text
+CONTENT = "¿Cuál es el horario de apertura de la oficina de Madrid los sábados? " * 3
+
+
+def _dict_body(config: OllamaConfig, prompt: Message, history: list[Message]) -> bytes:
+    return json.dumps(build_chat_payload(config, prompt, history, stream=True)).encode()
+
+
+def _cpu_per_turn(encode: Callable[[OllamaConfig, Message, list[Message]], bytes],
+                  length: int, turns: int) -> float:
+    """Milliseconds of CPU per turn over ``turns`` turns that each add a message."""
+    config = OllamaConfig()
+    history = [
+        Message(role="user" if index % 2 == 0 else "assistant", content=f"{index} {CONTENT}")
+        for index in range(length)
+    ]
+    start = time.process_time()
+    for turn in range(turns):
+        prompt = Message(role="user", content=f"turn {turn} {CONTENT}")
+        history = [*history[1:], prompt]
+        encode(config, prompt, history)
+    return (time.process_time() - start) / turns * 1e3
+
+
+def _codec_body(config: OllamaConfig, prompt: Message, history: list[Message]) -> bytes:
+    return encode_chat_payload(config, prompt, history, stream=True)
+
+
+def run(turns: int) -> None:
+    print(f"{'history':>8} | {'dict ms':>8} | {'codec ms':>8} | {'speed-up':>8}")
+    print("-" * 42)
+    for length in HISTORY_LENGTHS:
+        baseline = _cpu_per_turn(_dict_body, length, turns)
+        cached = _cpu_per_turn(_codec_body, length, turns)
+        print(f"{length:>8} | {baseline:>8.3f} | {cached:>8.3f} | {baseline / cached:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS)
+    args = parser.parse_args()
+    run(args.turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Latency of a cache hit vs a round trip to the (stub) Ollama server.
+
+    python -m benchmarks.bench_response_cache --requests 200 --history 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from smartbot.core.interfaces import Message
+from smartbot.providers.cache import CachingProvider
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import OllamaConfig
+
+from .stub_server import StubOllamaServer
+
+DEFAULT_REQUESTS = 200
+DEFAULT_HISTORY = 20
+
+
+def _time_calls(provider: CachingProvider | OllamaProvider, history: list[Message],
+                requests: int) -> list[float]:
+    prompt = Message(role="user", content="What are your opening hours?")
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        provider.generate_response(prompt, history)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(requests: int, history_size: int) -> None:
+    history = [
+        Message(role="user" if index % 2 == 0 else "assistant", content=f"turn {index} " * 20)
+        for index in range(history_size)
+    ]
+    with StubOllamaServer(first_token_delay=0.005, token_delay=0) as stub:
+        config = OllamaConfig(base_url=stub.base_url, model_name="stub", temperature=0)
+        upstream = OllamaProvider(config)
+        cached = CachingProvider(upstream)
+
+        miss = _time_calls(upstream, history, requests)
+        hit = _time_calls(cached, history, requests)
+
+    print(f"{'path':>8} | {'p50 us':>10} | {'p99 us':>10}")
+    print("-" * 34)
+    for name, samples in (("upstream", miss), ("hit", hit[1:])):
+        ordered = sorted(samples)
+        p50 = statistics.median(ordered) * 1e6
+        p99 = ordered[round(0.99 * (len(ordered) - 1))] * 1e6
+        print(f"{name:>8} | {p50:>10.1f} | {p99:>10.1f}")
+    print(f"hits={cached.stats.hits} misses={cached.stats.misses}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--history", type=int, default=DEFAULT_HISTORY)
+    args = parser.parse_args()
+    run(args.requests, args.history)
+
+
+if __name__ == "__main__":
+    main()
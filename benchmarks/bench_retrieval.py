@@ -0,0 +1,77 @@
+"""Search latency and recall of RetrievalMemory's vector index over long histories.
+
+Every history hides a few "facts" among filler messages; each fact is then
+asked about and counts as recalled when it is among the ``top_k`` results.
+
+Usage::
+
+    python -m benchmarks.bench_retrieval --sizes 1000 100000 --top-k 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from smartbot.memory.retrieval import HashingEmbedder, VectorIndex, unit_vector
+
+DEFAULT_SIZES = (1_000, 100_000)
+DEFAULT_TOP_K = 4
+WORDS = [
+    "weather", "order", "invoice", "delivery", "garden", "coffee", "weekend", "train", "movie",
+    "football", "laptop", "printer", "holiday", "recipe", "password", "doctor", "library",
+    "museum", "concert", "bicycle",
+]
+FACTS = [
+    ("My sister Lucia lives in Valparaiso", "Where does my sister Lucia live?"),
+    ("The wifi password is tangerine42", "What is the wifi password?"),
+    ("I am allergic to penicillin", "Am I allergic to any antibiotic like penicillin?"),
+    ("Our anniversary is on the ninth of March", "When is our anniversary?"),
+]
+
+
+def _history(size: int, rng: random.Random) -> tuple[list[str], list[int]]:
+    texts = [" ".join(rng.choices(WORDS, k=12)) for _ in range(size)]
+    positions = rng.sample(range(size), len(FACTS))
+    for position, (fact, _) in zip(positions, FACTS, strict=True):
+        texts[position] = fact
+    return texts, positions
+
+
+def run(sizes: tuple[int, ...], top_k: int) -> None:
+    print(f"{'messages':>10} | {'index s':>8} | {'search ms':>10} | {'recall':>7}")
+    print("-" * 46)
+    embedder = HashingEmbedder()
+    for size in sizes:
+        texts, positions = _history(size, random.Random(size))
+
+        start = time.perf_counter()
+        index = VectorIndex()
+        index.add([unit_vector(vector) for vector in embedder.embed(texts)])
+        index_seconds = time.perf_counter() - start
+
+        found, samples = 0, []
+        for position, (_, question) in zip(positions, FACTS, strict=True):
+            query = unit_vector(embedder.embed([question])[0])
+            start = time.perf_counter()
+            hits = index.search(query, top_k)
+            samples.append((time.perf_counter() - start) * 1000)
+            found += position in {hit for hit, _ in hits}
+
+        search_ms = statistics.median(samples)
+        print(f"{size:>10} | {index_seconds:>8.2f} | {search_ms:>10.3f} | "
+              f"{found / len(FACTS):>7.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    args = parser.parse_args()
+    run(tuple(args.sizes), args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tail latency over two stub Ollama hosts when one of them is degraded.
+
+Client threads send requests for a fixed duration through a RouterProvider
+with each balancing strategy; one host answers in a few milliseconds and the
+other one is ten times slower::
+
+    python -m benchmarks.bench_router --threads 8 --duration 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+
+from smartbot.core.interfaces import Message
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import OllamaConfig, RouterConfig
+from smartbot.providers.router import RouterProvider
+
+from .bench_ollama_pool import percentile
+from .stub_server import StubOllamaServer
+
+DEFAULT_THREADS = 8
+DEFAULT_DURATION = 3.0
+FAST_LATENCY = 0.005
+SLOW_LATENCY = 0.05
+
+
+def _worker(router: RouterProvider, deadline: float, samples: list[float]) -> None:
+    prompt = Message(role="user", content="ping")
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        router.generate_response(prompt, [])
+        samples.append(time.perf_counter() - start)
+
+
+def _load(base_urls: list[str], strategy: str, threads: int, duration: float) -> list[float]:
+    backends = [
+        OllamaConfig(base_url=base_url, model_name="stub", pool_maxsize=threads)
+        for base_url in base_urls
+    ]
+    router = RouterProvider(
+        RouterConfig(backends=backends, strategy=strategy),
+        [OllamaProvider(config) for config in backends],
+    )
+    samples: list[float] = []
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_worker, args=(router, deadline, samples))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    router.close()
+    return samples
+
+
+def run(threads: int, duration: float) -> None:
+    fast = StubOllamaServer(first_token_delay=FAST_LATENCY, token_delay=0)
+    slow = StubOllamaServer(first_token_delay=SLOW_LATENCY, token_delay=0)
+    with fast, slow:
+        results = {
+            strategy: _load([fast.base_url, slow.base_url], strategy, threads, duration)
+            for strategy in ("least_outstanding", "latency")
+        }
+
+    print(f"{'strategy':>18} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 52)
+    for strategy, samples in results.items():
+        print(f"{strategy:>18} | {len(samples) / duration:>8.0f} | "
+              f"{statistics.median(samples) * 1e3:>8.1f} | "
+              f"{percentile(samples, 0.99) * 1e3:>8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    args = parser.parse_args()
+    run(args.threads, args.duration)
+
+
+if __name__ == "__main__":
+    main()
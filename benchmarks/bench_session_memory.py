@@ -0,0 +1,57 @@
+"""Resident memory of SessionMemory as the number of sessions grows.
+
+Each session gets one user turn; the LRU keeps RAM bounded by
+``--hot-sessions`` no matter how many sessions are stored on disk::
+
+    python -m benchmarks.bench_session_memory --sessions 1000 10000 30000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from smartbot.memory.session_memory import SessionMemory
+
+DEFAULT_SESSIONS = (1_000, 10_000, 30_000)
+DEFAULT_HOT_SESSIONS = 512
+
+
+def run(session_counts: tuple[int, ...], hot_sessions: int) -> None:
+    print(f"{'sessions':>9} | {'hot':>5} | {'traced MiB':>10} | {'turns/s':>8}")
+    print("-" * 43)
+    for count in session_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory = SessionMemory(directory=tmp, max_hot_sessions=hot_sessions)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            for index in range(count):
+                session_id = f"user{index}"
+                memory.add_message(session_id, "user", "Hola, ¿qué tal?")
+                memory.add_message(session_id, "assistant", "Muy bien, gracias.")
+            elapsed = time.perf_counter() - start
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            hot = memory.hot_sessions
+            memory.close()
+
+        print(
+            f"{count:>9} | {hot:>5} | {current / 2**20:>10.2f} | "
+            f"{count / elapsed:>8.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(DEFAULT_SESSIONS))
+    parser.add_argument("--hot-sessions", type=int, default=DEFAULT_HOT_SESSIONS)
+    args = parser.parse_args()
+    run(tuple(args.sessions), args.hot_sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""SqliteMemory vs JsonFileMemory: cold load, per-turn write and windowed read.
+
+``--window`` is the max_messages window and ``--sessions`` fills the SQLite
+database with other conversations to show reads stay O(window)::
+
+    python -m benchmarks.bench_sqlite_memory --windows 10 1000 10000 --sessions 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from smartbot.core.interfaces import MemoryBackend, Message
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.sqlite_memory import SqliteMemory, SqliteSessionMemory
+
+DEFAULT_WINDOWS = (10, 1_000, 10_000)
+DEFAULT_SESSIONS = 50
+TURNS = 20
+CONTENT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4
+
+
+def _seed(directory: Path, window: int, sessions: int) -> tuple[Path, Path]:
+    messages = [Message(role="user", content=f"{index} {CONTENT}") for index in range(window)]
+
+    json_path = directory / "history.json"
+    json_path.write_bytes(TypeAdapter(list[Message]).dump_json(messages, indent=2))
+
+    db_path = directory / "history.db"
+    store = SqliteSessionMemory(db_path=str(db_path), max_messages=window)
+    pairs = [("user", message.content) for message in messages]
+    for session in range(sessions):
+        store.add_messages("default" if session == 0 else f"other{session}", pairs)
+    store.close()
+    return json_path, db_path
+
+
+def _measure(memory: MemoryBackend) -> tuple[float, float]:
+    writes, reads = [], []
+    for turn in range(TURNS):
+        start = time.perf_counter()
+        memory.add_message("user", f"question {turn} {CONTENT}")
+        memory.add_message("assistant", f"answer {turn} {CONTENT}")
+        writes.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        memory.get_history()
+        reads.append(time.perf_counter() - start)
+    return statistics.median(writes) * 1000, statistics.median(reads) * 1000
+
+
+def run(windows: tuple[int, ...], sessions: int) -> None:
+    header = f"{'window':>7} | {'backend':>8} | {'load ms':>9} | {'turn ms':>9} | {'read ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for window in windows:
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path, db_path = _seed(Path(tmp), window, sessions)
+            factories = (
+                ("json", partial(JsonFileMemory, file_path=str(json_path), max_messages=window)),
+                ("sqlite", partial(SqliteMemory, db_path=str(db_path), max_messages=window)),
+            )
+            for name, factory in factories:
+                start = time.perf_counter()
+                memory = factory()
+                memory.get_history()
+                load_ms = (time.perf_counter() - start) * 1000
+                turn_ms, read_ms = _measure(memory)
+                print(
+                    f"{window:>7} | {name:>8} | {load_ms:>9.2f} | "
+                    f"{turn_ms:>9.3f} | {read_ms:>9.3f}"
+                )
+                if isinstance(memory, SqliteMemory):
+                    memory.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS))
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    args = parser.parse_args()
+    run(tuple(args.windows), args.sessions)
+
+
+if __name__ == "__main__":
+    main()
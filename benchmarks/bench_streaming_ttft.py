@@ -0,0 +1,65 @@
+"""Time-to-first-token of streaming vs blocking OllamaProvider calls.
+
+Runs against the local stub server, so no model is required::
+
+    python -m benchmarks.bench_streaming_ttft --requests 10 --first-token-delay 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from smartbot.core.interfaces import Message
+from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.models import OllamaConfig
+
+from .stub_server import StubOllamaServer
+
+DEFAULT_REQUESTS = 10
+
+
+def _measure_blocking(provider: OllamaProvider, prompt: Message) -> tuple[float, float]:
+    start = time.perf_counter()
+    provider.generate_response(prompt, [])
+    total = time.perf_counter() - start
+    # Nothing can be shown to the user before the full reply arrives
+    return total, total
+
+
+def _measure_streaming(provider: OllamaProvider, prompt: Message) -> tuple[float, float]:
+    start = time.perf_counter()
+    first_token = None
+    for _chunk in provider.stream_response(prompt, []):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return first_token if first_token is not None else total, total
+
+
+def run(requests: int, first_token_delay: float, token_delay: float) -> None:
+    prompt = Message(role="user", content="Tell me something")
+    with StubOllamaServer(first_token_delay=first_token_delay, token_delay=token_delay) as stub:
+        provider = OllamaProvider(OllamaConfig(base_url=stub.base_url, model_name="stub"))
+
+        print(f"{'mode':>10} | {'ttft p50 ms':>12} | {'total p50 ms':>12}")
+        print("-" * 42)
+        for mode, measure in (("blocking", _measure_blocking), ("streaming", _measure_streaming)):
+            samples = [measure(provider, prompt) for _ in range(requests)]
+            ttft = statistics.median(sample[0] for sample in samples) * 1000
+            total = statistics.median(sample[1] for sample in samples) * 1000
+            print(f"{mode:>10} | {ttft:>12.1f} | {total:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+    run(args.requests, args.first_token_delay, args.token_delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Turns per second of one in-process Agent against AgentWorkerPool, by process count.
+
+Client threads chat on distinct sessions with EchoProvider and batched
+session memory, so every turn is CPU work in Python: validation, history
+handling and memory writes. One process runs them one at a time under
+its GIL; the pool spreads the sessions over the workers::
+
+    python -m benchmarks.bench_workers --seconds 5 --processes 1 2 4 8
+
+The speed-up is bounded by the cores of the machine, reported first, and
+by the dispatch in the parent process, about 35 µs of CPU per turn.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from smartbot.core.agent import Agent
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+from smartbot.runtime.workers import AgentWorkerPool
+
+DEFAULT_SECONDS = 5.0
+DEFAULT_CLIENTS = 32
+DEFAULT_PROCESSES = (1, 2, 4)
+MESSAGE = "¿Cuál es el horario de apertura de la oficina de Madrid los sábados?"
+
+
+def echo_agent(directory: str) -> Agent:
+    memory = SessionMemory(directory=directory, durability="batched")
+    return Agent(provider=EchoProvider(EchoConfig()), memory=memory)
+
+
+def _turns_per_second(chat: Callable[[str, str], str], clients: int, seconds: float) -> float:
+    deadline = time.monotonic() + seconds
+    counts = [0] * clients
+
+    def client(number: int) -> None:
+        while time.monotonic() < deadline:
+            chat(MESSAGE, f"client-{number}")
+            counts[number] += 1
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.monotonic() - start)
+
+
+def run(seconds: float, clients: int, processes: list[int]) -> None:
+    print(f"cores: {os.cpu_count()}, clients: {clients}")
+    print(f"{'runtime':>12} | {'turns/s':>9} | {'speed-up':>8}")
+    print("-" * 36)
+    with tempfile.TemporaryDirectory() as directory:
+        agent = echo_agent(str(Path(directory) / "single"))
+        baseline = _turns_per_second(
+            lambda text, session: agent.handle_message(text, session_id=session),
+            clients, seconds,
+        )
+        agent.close()
+        print(f"{'in-process':>12} | {baseline:>9.0f} | {1:>7.1f}x")
+
+        for count in processes:
+            factory = functools.partial(echo_agent, str(Path(directory) / f"pool-{count}"))
+            pool = AgentWorkerPool(factory, count)
+            pool.wait_ready()
+            rate = _turns_per_second(
+                lambda text, session, pool=pool: pool.handle_message(text, session_id=session),
+                clients, seconds,
+            )
+            pool.close()
+            print(f"{f'{count} procs':>12} | {rate:>9.0f} | {rate / baseline:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--processes", type=int, nargs="+", default=list(DEFAULT_PROCESSES))
+    args = parser.parse_args()
+    run(args.seconds, args.clients, args.processes)
+
+
+if __name__ == "__main__":
+    main()
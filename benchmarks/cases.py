@@ -0,0 +1,186 @@
+"""Benchmark cases of the suite run by :mod:`benchmarks.run`.
+
+Each case receives a scratch directory and returns the operation to time.
+The operation must leave the system in a steady state (memory windows are
+bounded, files are overwritten), so it can be called any number of times.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from smartbot.core.agent import Agent
+from smartbot.core.interfaces import Message
+from smartbot.memory.binary_memory import BinaryMemory
+from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.jsonl_memory import JsonlMemory
+from smartbot.memory.records import MessageRecord
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.memory.sqlite_memory import SqliteMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.local_provider import encode_chat_payload
+from smartbot.providers.models import EchoConfig, OllamaConfig
+from smartbot.utils.metrics import InMemoryMetrics, set_metrics
+
+HISTORY_SIZES = (10, 100, 1_000)
+SESSION_THREADS = 8
+TURNS_PER_THREAD = 25
+# The CLI module, imported by a fresh interpreter in the startup case
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+Operation = Callable[[], object]
+
+
+@dataclass(frozen=True)
+class Case:
+    """A named operation to time.
+
+    ``operations`` is how many logical operations one call performs, so
+    throughput cases can run a whole batch per call.
+    """
+    name: str
+    setup: Callable[[Path], Operation]
+    operations: int = 1
+
+
+CASES: list[Case] = []
+
+
+def case(name: str, operations: int = 1) -> Callable[[Callable[[Path], Operation]], None]:
+    def register(setup: Callable[[Path], Operation]) -> None:
+        CASES.append(Case(name=name, setup=setup, operations=operations))
+    return register
+
+
+def _conversation(size: int) -> list[Message]:
+    return [
+        Message(role="user" if index % 2 == 0 else "assistant", content=f"message {index} " * 8)
+        for index in range(size)
+    ]
+
+
+def _seed(memory: JsonFileMemory, size: int) -> None:
+    """Fill a file backend with ``size`` messages in a single save."""
+    memory._messages = [MessageRecord.from_message(message) for message in _conversation(size)]
+    memory._save_memory()
+
+
+@case("message.validate")
+def _message_validate(_directory: Path) -> Operation:
+    return lambda: Message(role="user", content="  What are your opening hours?  ")
+
+
+@case("message.record")
+def _message_record(_directory: Path) -> Operation:
+    return lambda: MessageRecord.create("user", "  What are your opening hours?  ")
+
+
+def _agent_turn(size: int, metrics: bool = False) -> Callable[[Path], Operation]:
+    def setup(_directory: Path) -> Operation:
+        memory = InMemoryBackend()
+        for message in _conversation(size):
+            memory.add_message(message.role, message.content)
+        agent = Agent(provider=EchoProvider(EchoConfig()), memory=memory)
+        sink = InMemoryMetrics()
+
+        def turn() -> None:
+            agent.handle_message("What are your opening hours?")
+            # Keep the history at its initial size
+            del memory._messages[:2]
+
+        def instrumented_turn() -> None:
+            # Installed per call so the sink never leaks into other cases
+            set_metrics(sink)
+            turn()
+            set_metrics(None)
+
+        return instrumented_turn if metrics else turn
+    return setup
+
+
+def _file_memory_cases(name: str, memory_class: type[JsonFileMemory], suffix: str) -> None:
+    for size in HISTORY_SIZES:
+        def load(directory: Path, size: int = size) -> Operation:
+            path = directory / f"history{suffix}"
+            _seed(memory_class(file_path=str(path), max_messages=size), size)
+            return lambda: memory_class(file_path=str(path), max_messages=size)
+
+        def add(directory: Path, size: int = size) -> Operation:
+            memory = memory_class(file_path=str(directory / f"history{suffix}"), max_messages=size)
+            _seed(memory, size)
+            return lambda: memory.add_message("user", "What are your opening hours?")
+
+        case(f"memory.{name}.load[{size}]")(load)
+        case(f"memory.{name}.add[{size}]")(add)
+
+
+def _sqlite_cases() -> None:
+    for size in HISTORY_SIZES:
+        def add(directory: Path, size: int = size) -> Operation:
+            memory = SqliteMemory(db_path=str(directory / "history.db"), max_messages=size)
+            memory.add_messages(("user", m.content) for m in _conversation(size))
+            return lambda: memory.add_message("user", "What are your opening hours?")
+
+        def read(directory: Path, size: int = size) -> Operation:
+            memory = SqliteMemory(db_path=str(directory / "history.db"), max_messages=size)
+            memory.add_messages(("user", m.content) for m in _conversation(size))
+            return memory.get_history
+
+        case(f"memory.sqlite.add[{size}]")(add)
+        case(f"memory.sqlite.get_history[{size}]")(read)
+
+
+def _payload_cases() -> None:
+    config = OllamaConfig()
+    prompt = Message(role="user", content="What are your opening hours?")
+    for size in HISTORY_SIZES:
+        def payload(_directory: Path, size: int = size) -> Operation:
+            history = _conversation(size)
+            return lambda: encode_chat_payload(config, prompt, history, stream=True)
+
+        case(f"provider.ollama.payload[{size}]")(payload)
+
+
+@case("startup.import_main")
+def _startup(_directory: Path) -> Operation:
+    """Cold start of the CLI: a new interpreter importing main."""
+    command = [sys.executable, "-c", "import main"]
+    return lambda: subprocess.run(command, cwd=PROJECT_ROOT, check=True)
+
+
+@case("sessions.throughput", operations=SESSION_THREADS * TURNS_PER_THREAD)
+def _sessions_throughput(directory: Path) -> Operation:
+    """Concurrent turns on distinct sessions through a shared Agent."""
+    agent = Agent(provider=EchoProvider(EchoConfig()), memory=SessionMemory(str(directory)))
+
+    def user(session_id: str) -> None:
+        for _ in range(TURNS_PER_THREAD):
+            agent.handle_message("What are your opening hours?", session_id=session_id)
+
+    def burst() -> None:
+        threads = [
+            threading.Thread(target=user, args=(f"user{index}",))
+            for index in range(SESSION_THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return burst
+
+
+for _size in HISTORY_SIZES:
+    case(f"agent.handle_message[{_size}]")(_agent_turn(_size))
+case("agent.handle_message.metrics[10]")(_agent_turn(10, metrics=True))
+_file_memory_cases("json", JsonFileMemory, ".json")
+_file_memory_cases("jsonl", JsonlMemory, ".jsonl")
+_file_memory_cases("binary", BinaryMemory, ".bin")
+_sqlite_cases()
+_payload_cases()
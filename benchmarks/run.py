@@ -0,0 +1,166 @@
+"""Benchmark suite runner with machine-readable results and baseline comparison.
+
+    python -m benchmarks.run                               # run every case
+    python -m benchmarks.run --filter memory.json          # only matching cases
+    python -m benchmarks.run --output results.json         # save the results
+    python -m benchmarks.run --baseline results.json       # compare with a saved run
+
+Each case is calibrated so one sample lasts at least ``--min-time`` seconds,
+then timed ``--rounds`` times; the median time per operation is what gets
+compared. With ``--fail-on-regression`` the exit status is 1 when any case
+is slower than the baseline by more than ``--threshold`` percent.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .cases import CASES, Case, Operation
+
+DEFAULT_ROUNDS = 7
+DEFAULT_MIN_TIME = 0.02
+DEFAULT_THRESHOLD = 20.0
+RESULTS_VERSION = 1
+
+
+@dataclass
+class CaseResult:
+    name: str
+    median_us: float
+    p95_us: float
+    ops_per_sec: float
+    rounds: int
+    calls_per_round: int
+
+
+def calibrate(operation: Operation, min_time: float) -> int:
+    """Number of calls needed for one sample to last at least ``min_time``."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            operation()
+        if time.perf_counter() - start >= min_time:
+            return calls
+        calls *= 2
+
+
+def measure(case: Case, rounds: int, min_time: float) -> CaseResult:
+    with tempfile.TemporaryDirectory() as directory:
+        operation = case.setup(Path(directory))
+        calls = calibrate(operation, min_time)
+
+        samples = []
+        gc.collect()
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(calls):
+                operation()
+            samples.append((time.perf_counter() - start) / calls / case.operations)
+
+    samples.sort()
+    median = statistics.median(samples)
+    return CaseResult(
+        name=case.name,
+        median_us=median * 1e6,
+        p95_us=samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))] * 1e6,
+        ops_per_sec=1 / median if median else 0.0,
+        rounds=rounds,
+        calls_per_round=calls,
+    )
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def load_baseline(path: str) -> dict[str, float]:
+    """Median time per operation of every case of a saved run."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {result["name"]: result["median_us"] for result in data["results"]}
+
+
+def compare(results: list[CaseResult], baseline: dict[str, float], threshold: float) -> int:
+    """Print the change of every case against the baseline and count regressions."""
+    regressions = 0
+    print()
+    print(f"{'case':<36} | {'baseline us':>11} | {'now us':>10} | {'change':>8}")
+    print("-" * 74)
+    for result in results:
+        before = baseline.get(result.name)
+        if before is None:
+            print(f"{result.name:<36} | {'-':>11} | {result.median_us:>10.2f} | {'new':>8}")
+            continue
+        change = (result.median_us - before) / before * 100
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{result.name:<36} | {before:>11.2f} | {result.median_us:>10.2f} | "
+              f"{change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="minimum duration of one round, in seconds")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown, in percent, reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if args.filter in case.name]
+    if args.list:
+        for case in cases:
+            print(case.name)
+        return
+
+    results = []
+    print(f"{'case':<36} | {'median us':>10} | {'p95 us':>10} | {'ops/s':>12}")
+    print("-" * 76)
+    for case in cases:
+        result = measure(case, args.rounds, args.min_time)
+        results.append(result)
+        print(f"{result.name:<36} | {result.median_us:>10.2f} | {result.p95_us:>10.2f} | "
+              f"{result.ops_per_sec:>12.0f}")
+
+    if args.output:
+        payload: dict[str, Any] = {
+            "version": RESULTS_VERSION,
+            "environment": environment(),
+            "results": [asdict(result) for result in results],
+        }
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
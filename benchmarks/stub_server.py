@@ -0,0 +1,215 @@
+"""Local stub of the Ollama HTTP API used by the benchmarks.
+
+It speaks just enough of ``/api/chat``, ``/api/generate`` (streaming NDJSON
+and single JSON replies) and ``/api/tags`` to exercise the providers without a
+model, and lets each benchmark inject latency before the first token and
+between tokens. ``prompt_delay`` adds a delay per character of prompt the
+model would evaluate: every message for /api/chat, only the new prompt for
+/api/generate, whose ``context`` is assumed to be cached. With ``capacity``
+the delay before the first token grows with the square of the requests in
+flight beyond it, like a model server thrashing under overload, and
+``tail_probability`` makes that many requests wait ``tail_delay`` more.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+DEFAULT_REPLY = "This is a canned answer from the stub server, streamed token by token."
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    server: _StubHTTPServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.stub.record_connection()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep benchmark output clean."""
+
+    def do_GET(self) -> None:
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "stub"}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        stub = self.server.stub
+        stub.record_request()
+
+        if self.path == "/api/chat":
+            evaluated = sum(len(message["content"]) for message in body["messages"])
+        elif self.path == "/api/generate":
+            evaluated = len(body["prompt"])
+        else:
+            self.send_error(404)
+            return
+        stub.record_prompt(evaluated)
+        time.sleep(stub.prompt_delay * evaluated)
+
+        # The context is a token per request, enough for the client to send it back
+        context = [*body.get("context", []), stub.requests]
+        first_token_delay = stub.enter()
+        try:
+            if body.get("stream", True):
+                self._stream(stub, self.path, context, first_token_delay)
+            else:
+                time.sleep(first_token_delay + stub.token_delay * len(stub.tokens))
+                self._reply(stub, self.path, context)
+        finally:
+            stub.leave()
+
+    def _reply(self, stub: StubOllamaServer, path: str, context: list[int]) -> None:
+        if path == "/api/chat":
+            self._send_json({"message": {"role": "assistant", "content": stub.reply}, "done": True})
+        else:
+            self._send_json({"response": stub.reply, "done": True, "context": context})
+
+    def end_headers(self) -> None:
+        # Tell the client when the connection won't be reused (Connection: close)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def _send_json(self, payload: dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, payload: dict[str, Any]) -> None:
+        line = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, stub: StubOllamaServer, path: str, context: list[int],
+                first_token_delay: float) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(token: str, done: bool) -> dict[str, Any]:
+            if path == "/api/chat":
+                return {"message": {"role": "assistant", "content": token}, "done": done}
+            return {"response": token, "done": done, **({"context": context} if done else {})}
+
+        time.sleep(first_token_delay)
+        for index, token in enumerate(stub.tokens):
+            if index:
+                time.sleep(stub.token_delay)
+            self._write_chunk(chunk(token, False))
+        self._write_chunk(chunk("", True))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Dozens of clients connect at once; the default backlog of 5 drops their SYNs
+    request_queue_size = 128
+
+    def __init__(self, stub: StubOllamaServer) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.stub = stub
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        """Clients that hang up mid-reply (cancelled requests) are not an error."""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubOllamaServer:
+    """Context manager running a fake Ollama server on a random local port."""
+
+    def __init__(
+        self,
+        reply: str = DEFAULT_REPLY,
+        first_token_delay: float = 0.2,
+        token_delay: float = 0.01,
+        prompt_delay: float = 0.0,
+        *,
+        capacity: int | None = None,
+        tail_probability: float = 0.0,
+        tail_delay: float = 0.0,
+    ) -> None:
+        self.reply = reply
+        self.tokens = [f"{word} " for word in reply.split()]
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.prompt_delay = prompt_delay
+        self.capacity = capacity
+        self.tail_probability = tail_probability
+        self.tail_delay = tail_delay
+        # Seeded, so every run draws the same slow requests
+        self._random = random.Random(0)
+        self.in_flight = 0
+        self.requests = 0
+        # Characters of prompt evaluated by each request
+        self.prompts: list[int] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server: _StubHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Stub server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_prompt(self, characters: int) -> None:
+        with self._lock:
+            self.prompts.append(characters)
+
+    def enter(self) -> float:
+        """Count a request in flight and return its delay before the first token."""
+        with self._lock:
+            self.in_flight += 1
+            delay = self.first_token_delay
+            if self.capacity is not None:
+                excess = max(0, self.in_flight - self.capacity)
+                delay *= 1 + (excess / self.capacity) ** 2
+            if self._random.random() < self.tail_probability:
+                delay += self.tail_delay
+            return delay
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def __enter__(self) -> StubOllamaServer:
+        self._server = _StubHTTPServer(self)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
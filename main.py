@@ -2,32 +2,277 @@
 
 from __future__ import annotations
 
+import argparse
+import functools
+import importlib
+import signal
+import sys
+import threading
+from pathlib import Path
+
 from smartbot.core.agent import Agent
-from smartbot.core.interfaces import MemoryError, ProviderError
+from smartbot.core.context import TokenWindow, load_tokenizer
+from smartbot.core.interfaces import (
+    LLMProvider,
+    MemoryBackend,
+    MemoryError,
+    ProviderError,
+    SessionMemoryBackend,
+)
+from smartbot.memory.binary_memory import BinaryMemory
 from smartbot.memory.json_memory import JsonFileMemory
-from smartbot.providers.echo_provider import EchoProvider
-from smartbot.providers.local_provider import OllamaProvider
-from smartbot.providers.models import ChatBotConfig
-from smartbot.providers.openai_provider import OpenaiProvider
+from smartbot.memory.jsonl_memory import JsonlMemory
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.providers.models import BackendConfig, ChatBotConfig, MemoryConfig, ModelConfig
 from smartbot.utils.logger import get_logger, setup_logging
+from smartbot.utils.metrics import InMemoryMetrics, set_metrics
 from smartbot.utils.yaml_loader import load_yaml_config
 
 setup_logging()
 logger = get_logger(__name__)
 
+SQLITE_SESSIONS_FILE = "sessions.db"
+
+# "module:Class" of each provider. The module is only imported when its provider
+# is configured, so an echo or ollama run never pays for loading the openai SDK.
+# Optional layers (router, hedging, sqlite, retrieval, server...) are imported
+# the same way, in the branch that uses them.
 PROVIDER_REGISTRY = {
-    "echo": EchoProvider,
-    "ollama": OllamaProvider,
-    "openai": OpenaiProvider,
+    "echo": "smartbot.providers.echo_provider:EchoProvider",
+    "ollama": "smartbot.providers.local_provider:OllamaProvider",
+    "openai": "smartbot.providers.openai_provider:OpenaiProvider",
 }
 
 
+def build_memory(memory_config: MemoryConfig) -> MemoryBackend | SessionMemoryBackend:
+    """Create the memory backend described by the 'memory' section of the config.
+
+    By default it is JsonFileMemory(file_path="history.json", max_messages=10).
+    With 'sessions_dir' a single SessionMemory serves every conversation ID.
+
+    :param memory_config: parsed 'memory' section
+    :type memory_config: MemoryConfig
+    :return: memory backend
+    :rtype: MemoryBackend | SessionMemoryBackend
+    """
+    write_options = {
+        "durability": memory_config.durability,
+        "flush_interval": memory_config.flush_interval,
+        "flush_every": memory_config.flush_every,
+    }
+    if memory_config.backend == "sqlite":
+        from smartbot.memory.sqlite_memory import SqliteMemory, SqliteSessionMemory
+
+        if memory_config.sessions_dir is None:
+            return SqliteMemory(
+                db_path=memory_config.file_path,
+                max_messages=memory_config.max_messages,
+                **write_options,
+            )
+        sessions_dir = Path(memory_config.sessions_dir)
+        sessions_dir.mkdir(parents=True, exist_ok=True)
+        return SqliteSessionMemory(
+            db_path=str(sessions_dir / SQLITE_SESSIONS_FILE),
+            max_messages=memory_config.max_messages,
+            **write_options,
+        )
+
+    if memory_config.sessions_dir is not None:
+        return SessionMemory(
+            directory=memory_config.sessions_dir,
+            max_messages=memory_config.max_messages,
+            max_hot_sessions=memory_config.max_hot_sessions,
+            storage=memory_config.backend,
+            **write_options,
+        )
+
+    memory_class: type[JsonFileMemory] = JsonFileMemory
+    if memory_config.backend == "jsonl":
+        memory_class = JsonlMemory
+    elif memory_config.backend == "binary":
+        memory_class = BinaryMemory
+        write_options["compression"] = memory_config.compression
+    return memory_class(
+        file_path=memory_config.file_path,
+        max_messages=memory_config.max_messages,
+        **write_options,
+    )
+
+
+def add_summaries(
+    memory: MemoryBackend | SessionMemoryBackend,
+    memory_config: MemoryConfig,
+    provider: LLMProvider,
+) -> MemoryBackend | SessionMemoryBackend:
+    """Wrap the memory so the messages it forgets are summarized, if configured.
+
+    :param memory: backend created by build_memory
+    :param memory_config: parsed 'memory' section
+    :param provider: provider that writes the summaries
+    :raises: ValueError
+    :return: memory backend
+    :rtype: MemoryBackend | SessionMemoryBackend
+    """
+    if memory_config.summarize_every is None:
+        return memory
+    if isinstance(memory, SessionMemoryBackend):
+        raise ValueError("summarize_every is not supported with sessions_dir.")
+    from smartbot.memory.summarizing import ProviderSummarizer, SummarizingMemory
+
+    return SummarizingMemory(
+        memory,
+        ProviderSummarizer(provider),
+        summary_path=memory_config.summary_path or f"{memory_config.file_path}.summary.json",
+        summarize_every=memory_config.summarize_every,
+    )
+
+
+def add_recall(
+    memory: MemoryBackend | SessionMemoryBackend,
+    memory_config: MemoryConfig,
+    llm_config: ModelConfig,
+) -> MemoryBackend | SessionMemoryBackend:
+    """Wrap the memory so older messages related to each question are recalled, if configured.
+
+    :param memory: backend created by build_memory
+    :param memory_config: parsed 'memory' section
+    :param llm_config: parsed 'llm' section (its base_url serves ollama embedders)
+    :raises: ValueError
+    :return: memory backend
+    :rtype: MemoryBackend | SessionMemoryBackend
+    """
+    if memory_config.recall_top_k is None:
+        return memory
+    if isinstance(memory, SessionMemoryBackend):
+        raise ValueError("recall_top_k is not supported with sessions_dir.")
+    from smartbot.memory.retrieval import RetrievalMemory, load_embedder
+
+    return RetrievalMemory(
+        memory,
+        load_embedder(memory_config.embedder, getattr(llm_config, "base_url", None)),
+        archive_path=memory_config.archive_path or f"{memory_config.file_path}.archive.jsonl",
+        top_k=memory_config.recall_top_k,
+    )
+
+
+def build_context_window(llm_config: ModelConfig) -> TokenWindow | None:
+    """Create the token budget of the provider, if it defines one.
+
+    :param llm_config: parsed 'llm' section
+    :type llm_config: ModelConfig
+    :return: token window or None to send the whole history
+    :rtype: TokenWindow | None
+    """
+    if llm_config.context_tokens is None:
+        return None
+    return TokenWindow(
+        max_tokens=llm_config.context_tokens,
+        tokenizer=load_tokenizer(llm_config.tokenizer),
+    )
+
+
+def load_provider_class(name: str) -> type[LLMProvider]:
+    """Import the provider class registered as ``name`` in PROVIDER_REGISTRY.
+
+    :param name: value of the 'provider' field
+    :type name: str
+    :raises: ValueError
+    :return: provider class
+    :rtype: type[LLMProvider]
+    """
+    target = PROVIDER_REGISTRY.get(name)
+
+    if target is None:
+        raise ValueError(f"Unsupported provider: {name}")
+
+    module_name, _, class_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def add_admission(provider: LLMProvider, llm_config: ModelConfig) -> LLMProvider:
+    """Wrap the provider in admission control when its 'admission' section is set."""
+    if llm_config.admission is None:
+        return provider
+    from smartbot.providers.limiter import AdmissionProvider
+
+    return AdmissionProvider(provider, llm_config.admission)
+
+
+def create_provider(llm_config: BackendConfig) -> LLMProvider:
+    """Create a single provider from PROVIDER_REGISTRY, with its admission control.
+
+    :param llm_config: parsed provider settings
+    :type llm_config: BackendConfig
+    :raises: ValueError
+    :return: provider
+    :rtype: LLMProvider
+    """
+    provider = load_provider_class(llm_config.provider)(config=llm_config)
+    return add_admission(provider, llm_config)
+
+
+def build_provider(parsed_config: ChatBotConfig) -> LLMProvider:
+    """Create the provider of the 'llm' section, wrapped in the cache and coalescing layers.
+
+    With ``provider: router`` every entry of 'backends' becomes a provider
+    and the router balances the requests among them.
+
+    :param parsed_config: parsed configuration
+    :type parsed_config: ChatBotConfig
+    :raises: ValueError
+    :return: provider
+    :rtype: LLMProvider
+    """
+    llm_config = parsed_config.llm
+
+    if llm_config.provider == "router":
+        from smartbot.providers.router import RouterProvider
+
+        provider = RouterProvider(
+            llm_config,
+            [create_provider(backend) for backend in llm_config.backends],
+        )
+        provider = add_admission(provider, llm_config)
+    else:
+        provider = create_provider(llm_config)
+
+    # Outside admission control, so hedges wait for a slot like any other request
+    if parsed_config.hedging.enabled:
+        from smartbot.providers.hedging import HedgingProvider
+
+        provider = HedgingProvider(provider, parsed_config.hedging)
+
+    # Inside the cache, so concurrent misses of the same request share one call
+    if parsed_config.coalescing.enabled:
+        from smartbot.providers.coalescing import CoalescingProvider
+
+        provider = CoalescingProvider(provider)
+
+    cache_config = parsed_config.cache
+    if cache_config.enabled:
+        from smartbot.providers.cache import CachingProvider
+
+        provider = CachingProvider(
+            provider,
+            max_entries=cache_config.max_entries,
+            ttl_seconds=cache_config.ttl_seconds,
+            disk_dir=cache_config.disk_dir,
+            always=cache_config.always,
+        )
+    return provider
+
+
+def configure_metrics(parsed_config: ChatBotConfig) -> None:
+    """Install the in-process metrics sink when the 'metrics' section enables it."""
+    if parsed_config.metrics.enabled:
+        set_metrics(InMemoryMetrics())
+
+
 def build_agent(config_path: str = "config.yaml") -> Agent:
     """Create and configure the Agent from YAML configuration.
 
-    In 'memory', you use the default option:
-     * memory = JsonFileMemory(file_path="history.json", max_messages=10)
-    Or modify it to use the InMemoryBackend
+    The memory backend comes from the optional 'memory' section
+    (see build_memory); InMemoryBackend can still be injected by hand:
     *  memory=InMemoryBackend()
     In that case you should add: from smartbot.memory.in_memory import InMemoryBackend
 
@@ -41,23 +286,104 @@ def build_agent(config_path: str = "config.yaml") -> Agent:
     raw_config = load_yaml_config(config_path)
     parsed_config = ChatBotConfig(**raw_config)
 
-    llm_config = parsed_config.llm
+    configure_metrics(parsed_config)
 
-    provider_class = PROVIDER_REGISTRY.get(llm_config.provider)
+    provider = build_provider(parsed_config)
+    memory_config = parsed_config.memory
+    memory = add_summaries(build_memory(memory_config), memory_config, provider)
+    return Agent(
+        provider=provider,
+        memory=add_recall(memory, memory_config, parsed_config.llm),
+        context_window=build_context_window(parsed_config.llm),
+    )
 
-    if provider_class is None:
-        raise ValueError(f"Unsupported provider: {llm_config.provider}")
 
-    provider = provider_class(config=llm_config)
+def run_batch(args: argparse.Namespace) -> None:
+    """Answer every prompt of a JSONL file without the interactive loop.
 
-    return Agent(
-        provider=provider,
-        memory = JsonFileMemory(file_path="history.json", max_messages=10)
+    Items only share a history when the config defines 'memory.sessions_dir';
+    otherwise each prompt is answered on its own.
+    """
+    from smartbot.runtime.batch import BatchRunner, build_responder
+
+    parsed_config = ChatBotConfig(**load_yaml_config(args.config))
+    configure_metrics(parsed_config)
+
+    memory = None
+    if parsed_config.memory.sessions_dir is not None:
+        memory = build_memory(parsed_config.memory)
+
+    options = {"workers": args.workers} if args.workers else {}
+    provider = build_provider(parsed_config)
+    runner = BatchRunner(
+        respond=build_responder(
+            provider,
+            memory=memory if isinstance(memory, SessionMemoryBackend) else None,
+            context_window=build_context_window(parsed_config.llm),
+        ),
+        **options,
     )
+    try:
+        runner.run(args.batch, args.output, resume=not args.no_resume)
+    finally:
+        # Flushes the buffered session writes, like Agent.close() does
+        for component in (memory, provider):
+            close = getattr(component, "close", None)
+            if callable(close):
+                close()
 
 
-def main() -> None:
-    agent = build_agent()
+def run_server(args: argparse.Namespace) -> None:
+    """Serve the agent over HTTP until SIGINT/SIGTERM, then shut down gracefully."""
+    from smartbot.runtime.server import ChatServer
+
+    options = {"workers": args.workers} if args.workers else {}
+    if args.port is not None:
+        options["port"] = args.port
+    if args.queue_size is not None:
+        options["queue_size"] = args.queue_size
+    if args.processes > 1:
+        from smartbot.runtime.workers import AgentWorkerPool
+
+        # GET /metrics adds the metrics of the workers to those of this process
+        configure_metrics(ChatBotConfig(**load_yaml_config(args.config)))
+        # Each worker process builds its own agent and memory from the config
+        agent = AgentWorkerPool(functools.partial(build_agent, args.config), args.processes)
+    else:
+        agent = build_agent(args.config)
+    server = ChatServer(agent, host=args.host, **options)
+    stop = threading.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: stop.set())
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("SmartBot server listening on %s", server.url)
+    stop.wait()
+    server.close()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SmartBot CLI")
+    parser.add_argument("--config", default="config.yaml", help="YAML configuration file")
+    parser.add_argument("--batch", metavar="INPUT", help="JSONL file of prompts to answer")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file of batch results")
+    parser.add_argument("--workers", type=int,
+                        help="concurrent requests in batch or server mode")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="overwrite the output instead of resuming from it")
+    parser.add_argument("--serve", action="store_true", help="run the HTTP chat server")
+    parser.add_argument("--host", default="127.0.0.1", help="server interface")
+    parser.add_argument("--port", type=int, help="server port (8080 by default)")
+    parser.add_argument("--queue-size", type=int,
+                        help="requests waiting for a worker before answering 503 (64 by default)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="agent worker processes in server mode")
+    return parser.parse_args(argv)
+
+
+def run_repl(args: argparse.Namespace) -> None:
+    """Interactive chat on the terminal."""
+    agent = build_agent(args.config)
 
     logger.info("SmartBot CLI — type /exit to quit.")
 
@@ -75,7 +401,11 @@ def main() -> None:
             break
 
         try:
-            response = agent.handle_message(user_input)
+            # Print the reply as it arrives instead of waiting for the full message
+            for chunk in agent.stream_message(user_input):
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+            sys.stdout.write("\n")
         except ProviderError as exc:
             logger.error("Provider error: %s", exc)
             continue
@@ -83,7 +413,17 @@ def main() -> None:
             logger.error("Memory error: %s", exc)
             continue
 
-        logger.info(response)
+    agent.close()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.batch:
+        run_batch(args)
+    elif args.serve:
+        run_server(args)
+    else:
+        run_repl(args)
 
 
 if __name__ == "__main__":
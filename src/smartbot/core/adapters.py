@@ -0,0 +1,114 @@
+"""Adapters exposing the synchronous backends through the asyncio interfaces."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextlib import suppress
+from typing import Any
+
+from smartbot.core.interfaces import (
+    AsyncLLMProvider,
+    AsyncMemoryBackend,
+    LLMProvider,
+    MemoryBackend,
+    Message,
+    Role,
+)
+
+_END_OF_STREAM = object()
+
+
+class SyncProviderAdapter(AsyncLLMProvider):
+    """Run a blocking provider in worker threads so it does not stall the event loop."""
+
+    def __init__(self, provider: LLMProvider | Any) -> None:
+        """
+        :param provider: any provider with the synchronous interface
+        (EchoProvider, OllamaProvider, OpenaiProvider...)
+        """
+        self._provider = provider
+
+    async def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """Delegate to the wrapped provider in a worker thread."""
+        return await asyncio.to_thread(self._provider.generate_response, prompt, history)
+
+    async def stream_response(
+        self, prompt: Message, history: list[Message]
+    ) -> AsyncIterator[str]:
+        """Read the wrapped provider's stream in one worker thread, through a queue.
+
+        When the consumer stops early the worker closes the stream after its
+        next chunk, which closes the connection to the backend.
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue[Any] = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(item: Any) -> None:
+            # The loop may be gone along with a consumer that stopped early
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+
+        def pump() -> None:
+            stream: Iterator[str] | None = None
+            try:
+                stream = self._provider.stream_response(prompt, history)
+                for chunk in stream:
+                    if stop.is_set():
+                        return
+                    put(chunk)
+            except Exception as error:
+                put(error)
+                return
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+            put(_END_OF_STREAM)
+
+        loop.run_in_executor(None, pump)
+        try:
+            while (chunk := await chunks.get()) is not _END_OF_STREAM:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()
+
+
+class SyncMemoryAdapter(AsyncMemoryBackend):
+    """Serialize access to a blocking memory backend from asyncio code.
+
+    Synchronous backends are not thread-safe, so calls go through a lock.
+    Disk-backed memories are offloaded to a worker thread; pure RAM backends
+    such as InMemoryBackend can run inline with ``offload=False``.
+    """
+
+    def __init__(self, memory: MemoryBackend, offload: bool = True) -> None:
+        """
+        :param memory: the synchronous memory backend to wrap
+        :param offload: run the calls in a worker thread
+        """
+        self._memory = memory
+        self._offload = offload
+        self._lock = asyncio.Lock()
+
+    async def _call(self, method: Any, *args: Any) -> Any:
+        async with self._lock:
+            if self._offload:
+                return await asyncio.to_thread(method, *args)
+            return method(*args)
+
+    async def add_message(self, role: Role, content: str) -> None:
+        """Store a new message in the wrapped backend."""
+        await self._call(self._memory.add_message, role, content)
+
+    async def get_history(self) -> list[Message]:
+        """Return the wrapped backend's history."""
+        return await self._call(self._memory.get_history)
+
+    async def clear(self) -> None:
+        """Clear the wrapped backend."""
+        await self._call(self._memory.clear)
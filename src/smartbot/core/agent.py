@@ -2,11 +2,24 @@
 
 from __future__ import annotations
 
-from smartbot.core.interfaces import LLMProvider, MemoryBackend, Message
+import time
+from collections.abc import Iterator
+
+from smartbot.core.context import HeuristicTokenizer, TokenWindow
+from smartbot.core.interfaces import (
+    InvalidTurnError,
+    LLMProvider,
+    MemoryBackend,
+    Message,
+    SessionMemoryBackend,
+)
 from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import MetricsSink, get_metrics
 
 logger = get_logger(__name__)
 
+DEFAULT_SESSION_ID = "default"
+
 
 class Agent:
     """Coordinates provider and memory backends.
@@ -15,46 +28,181 @@ class Agent:
     without knowing concrete implementations.
     """
 
-    def __init__(self, provider: LLMProvider, memory: MemoryBackend) -> None:
+    def __init__(
+        self,
+        provider: LLMProvider,
+        memory: MemoryBackend | SessionMemoryBackend,
+        context_window: TokenWindow | None = None,
+    ) -> None:
         """
         Docstring for __init__
 
         :param: self
         :param provider: normally Echo (repeat message) or Ollama
         :type provider: LLMProvider
-        :param memory: manages conversation's history
-        :type memory: MemoryBackend
+        :param memory: manages conversation's history, either a single
+        conversation or a session-keyed backend serving many of them
+        :type memory: MemoryBackend | SessionMemoryBackend
+        :param context_window: optional token budget applied to the history
+        before it reaches the provider
+        :type context_window: TokenWindow | None
         """
         self._provider: LLMProvider = provider
-        self._memory: MemoryBackend = memory
-
-
-    def handle_message(self, user_input: str) -> str:
+        self._memory: MemoryBackend | SessionMemoryBackend = memory
+        self._context_window: TokenWindow | None = context_window
+        self._tokenizer = HeuristicTokenizer()
+
+    @property
+    def session_keyed(self) -> bool:
+        """Whether every session ID has its own history."""
+        return isinstance(self._memory, SessionMemoryBackend)
+
+    def _memory_for(self, session_id: str | None) -> MemoryBackend:
+        """Resolve the conversation memory used by a call."""
+        if isinstance(self._memory, SessionMemoryBackend):
+            return self._memory.session(session_id or DEFAULT_SESSION_ID)
+        if session_id is not None:
+            raise ValueError("session_id requires a SessionMemoryBackend.")
+        return self._memory
+
+    def _start_turn(
+        self, user_input: str, session_id: str | None
+    ) -> tuple[MemoryBackend, Message]:
+        """Validate a turn before anything is stored or sent.
+
+        :raises InvalidTurnError: If the message or the session ID is not valid.
+        """
+        try:
+            return self._memory_for(session_id), Message(role="user", content=user_input)
+        except ValueError as error:
+            raise InvalidTurnError(str(error)) from error
+
+    def _history_for(self, memory: MemoryBackend, prompt: Message) -> list[Message]:
+        """Read the history and trim it to the token budget, if any."""
+        history = memory.get_history()
+        if self._context_window is not None:
+            history = self._context_window.fit(history, prompt)
+        return history
+
+    def _count_tokens(self, message: Message) -> int:
+        if self._context_window is not None:
+            return self._context_window.count_message(message)
+        return self._tokenizer.count(message.content)
+
+    def _record_tokens(
+        self, metrics: MetricsSink, history: list[Message], prompt: Message, reply: str
+    ) -> None:
+        """Count the tokens sent to and received from the provider."""
+        tokens_in = sum(self._count_tokens(message) for message in [*history, prompt])
+        tokens_out = 0
+        # An empty streamed reply is not a valid Message
+        if reply.strip():
+            tokens_out = self._count_tokens(Message(role="assistant", content=reply))
+        metrics.increment("tokens_total", tokens_in, direction="in")
+        metrics.increment("tokens_total", tokens_out, direction="out")
+
+    def handle_message(self, user_input: str, session_id: str | None = None) -> str:
         """
         Process a user message and return assistant reply.
 
         :param self
         :param user_input: whatever the user writes
         :type user_input: str
+        :param session_id: conversation to continue (session-keyed memory only)
+        :type session_id: str | None
         :return: assistant's response to user's request
         :rtype: str
+        :raises InvalidTurnError: If the message or the session ID is not valid.
         """
 
         logger.debug("Handling message from user")
+        metrics = get_metrics()
+
+        timer = metrics.timer("turn_seconds", mode="blocking")
 
-        user_message = Message(role="user", content=user_input)
-        self._memory.add_message("user", user_input)
+        memory, user_message = self._start_turn(user_input, session_id)
+        memory.add_message("user", user_input)
+        timer.lap("memory_write")
 
-        history = self._memory.get_history()
+        history = self._history_for(memory, user_message)
+        timer.lap("history_read")
         logger.debug("History length: %d", len(history))
 
         response = self._provider.generate_response(
             prompt=user_message,
             history=history,
         )
+        timer.lap("provider")
 
         logger.debug("Generated response")
 
-        self._memory.add_message("assistant", response.content)
+        memory.add_message("assistant", response.content)
+        timer.lap("memory_write")
+        timer.stop()
+
+        if metrics.enabled:
+            self._record_tokens(metrics, history, user_message, response.content)
 
         return response.content
+
+    def stream_message(self, user_input: str, session_id: str | None = None) -> Iterator[str]:
+        """
+        Process a user message and yield the assistant reply as it is generated.
+
+        The assembled reply is stored in memory only once the stream has
+        finished, so an interrupted stream never leaves a partial message
+        in the history.
+
+        :param self
+        :param user_input: whatever the user writes
+        :type user_input: str
+        :param session_id: conversation to continue (session-keyed memory only)
+        :type session_id: str | None
+        :return: chunks of the assistant's response, in order
+        :rtype: Iterator[str]
+        :raises InvalidTurnError: If the message or the session ID is not valid.
+        """
+
+        logger.debug("Streaming message from user")
+        metrics = get_metrics()
+
+        timer = metrics.timer("turn_seconds", mode="stream")
+
+        memory, user_message = self._start_turn(user_input, session_id)
+        memory.add_message("user", user_input)
+        timer.lap("memory_write")
+
+        history = self._history_for(memory, user_message)
+        timer.lap("history_read")
+        logger.debug("History length: %d", len(history))
+
+        chunks: list[str] = []
+        start = time.perf_counter()
+        for chunk in self._provider.stream_response(prompt=user_message, history=history):
+            if not chunks:
+                metrics.observe("first_chunk_seconds", time.perf_counter() - start)
+            chunks.append(chunk)
+            yield chunk
+        # Includes the time the caller spent consuming the chunks
+        timer.lap("provider")
+
+        logger.debug("Stream finished (%d chunks)", len(chunks))
+
+        reply = "".join(chunks)
+        # An empty reply is not a valid message; the backends would reject it
+        if reply.strip():
+            memory.add_message("assistant", reply)
+        else:
+            logger.warning("The provider streamed an empty reply, not stored")
+        timer.lap("memory_write")
+        timer.stop()
+
+        if metrics.enabled:
+            self._record_tokens(metrics, history, user_message, reply)
+
+    def close(self) -> None:
+        """Release the memory and provider resources, flushing buffered writes."""
+        for component in (self._memory, self._provider):
+            close = getattr(component, "close", None)
+            if callable(close):
+                close()
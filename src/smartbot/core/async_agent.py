@@ -0,0 +1,109 @@
+"""Asyncio agent orchestrator for SmartBot."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+from smartbot.core.context import TokenWindow
+from smartbot.core.interfaces import AsyncLLMProvider, AsyncMemoryBackend, Message
+from smartbot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncAgent:
+    """Coordinates async provider and memory backends.
+
+    Mirrors :class:`smartbot.core.agent.Agent`, but awaits the provider and
+    memory instead of blocking a thread, so a single event loop can drive
+    many conversations at once. Use one AsyncAgent per conversation; the
+    provider can be shared between them.
+    """
+
+    def __init__(
+        self,
+        provider: AsyncLLMProvider,
+        memory: AsyncMemoryBackend,
+        context_window: TokenWindow | None = None,
+    ) -> None:
+        """
+        :param provider: asyncio provider (or a sync one wrapped in an adapter)
+        :type provider: AsyncLLMProvider
+        :param memory: manages conversation's history
+        :type memory: AsyncMemoryBackend
+        :param context_window: optional token budget applied to the history
+        :type context_window: TokenWindow | None
+        """
+        self._provider: AsyncLLMProvider = provider
+        self._memory: AsyncMemoryBackend = memory
+        self._context_window: TokenWindow | None = context_window
+
+    async def _history_for(self, prompt: Message) -> list[Message]:
+        """Read the history and trim it to the token budget, if any."""
+        history = await self._memory.get_history()
+        if self._context_window is not None:
+            history = self._context_window.fit(history, prompt)
+        return history
+
+    async def handle_message(self, user_input: str) -> str:
+        """
+        Process a user message and return assistant reply.
+
+        :param user_input: whatever the user writes
+        :type user_input: str
+        :return: assistant's response to user's request
+        :rtype: str
+        """
+
+        logger.debug("Handling message from user")
+
+        user_message = Message(role="user", content=user_input)
+        await self._memory.add_message("user", user_input)
+
+        history = await self._history_for(user_message)
+        logger.debug("History length: %d", len(history))
+
+        response = await self._provider.generate_response(
+            prompt=user_message,
+            history=history,
+        )
+
+        logger.debug("Generated response")
+
+        await self._memory.add_message("assistant", response.content)
+
+        return response.content
+
+    async def stream_message(self, user_input: str) -> AsyncIterator[str]:
+        """
+        Process a user message and yield the assistant reply as it is generated.
+
+        The assembled reply is stored in memory only once the stream has finished.
+
+        :param user_input: whatever the user writes
+        :type user_input: str
+        :return: chunks of the assistant's response, in order
+        :rtype: AsyncIterator[str]
+        """
+
+        logger.debug("Streaming message from user")
+
+        user_message = Message(role="user", content=user_input)
+        await self._memory.add_message("user", user_input)
+
+        history = await self._history_for(user_message)
+        logger.debug("History length: %d", len(history))
+
+        chunks: list[str] = []
+        async for chunk in self._provider.stream_response(prompt=user_message, history=history):
+            chunks.append(chunk)
+            yield chunk
+
+        logger.debug("Stream finished (%d chunks)", len(chunks))
+
+        reply = "".join(chunks)
+        # An empty reply is not a valid message; the backends would reject it
+        if reply.strip():
+            await self._memory.add_message("assistant", reply)
+        else:
+            logger.warning("The provider streamed an empty reply, not stored")
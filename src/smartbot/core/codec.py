@@ -0,0 +1,105 @@
+"""JSON encoding of messages and request bodies.
+
+A conversation is resent whole on every turn, but only its last messages
+are new. :class:`MessageCodec` keeps the encoded form of each message, so
+a request body is assembled by joining fragments that were encoded once,
+instead of converting and encoding the whole history again.
+
+``orjson`` is used when installed; the standard ``json`` module otherwise.
+Both produce compact UTF-8 without escaping non-ASCII characters.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from .interfaces import Message
+
+# Distinct messages kept encoded. A history longer than this misses on every turn,
+# since the oldest entries go first; at ~300 bytes a message this is about 20 MB
+DEFAULT_CACHE_ENTRIES = 65536
+
+
+def _load_dumps() -> Callable[[Any], bytes]:
+    try:
+        import orjson  # type: ignore[import-not-found]
+    except ImportError:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        return lambda value: encoder.encode(value).encode("utf-8")
+    return orjson.dumps
+
+
+dumps: Callable[[Any], bytes] = _load_dumps()
+"""Encode a value as compact UTF-8 JSON."""
+
+
+class MessageCodec:
+    """Cache of the wire forms of messages, keyed by role and content.
+
+    Messages are immutable and the memory backends hand out the same
+    ``Message`` objects turn after turn, so their content strings come with
+    their hash already computed and a lookup costs about as much as a dict
+    access. The oldest entries are dropped past ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._fragments: dict[tuple[str, str], bytes] = {}
+        self._dicts: dict[tuple[str, str], dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, cache: dict[tuple[str, str], Any], key: tuple[str, str], value: Any) -> None:
+        with self._lock:
+            if len(cache) >= self._max_entries:
+                del cache[next(iter(cache))]
+            cache[key] = value
+
+    def fragment(self, message: Message) -> bytes:
+        """The ``to_dict()`` form of the message, encoded as JSON."""
+        key = (message.role, message.content)
+        encoded = self._fragments.get(key)
+        if encoded is None:
+            encoded = dumps(message.to_dict())
+            self._store(self._fragments, key, encoded)
+        return encoded
+
+    def as_dict(self, message: Message) -> dict[str, str]:
+        """The ``to_dict()`` form of the message, for clients that encode it themselves.
+
+        The same dict is returned every time: callers must not modify it.
+        """
+        key = (message.role, message.content)
+        data = self._dicts.get(key)
+        if data is None:
+            data = message.to_dict()
+            self._store(self._dicts, key, data)
+        return data
+
+    def encode_body(self, fields: dict[str, Any], key: str, messages: list[Message]) -> bytes:
+        """Encode ``{**fields, key: [messages]}`` from the cached message fragments.
+
+        :param fields: the other members of the body
+        :param key: name of the member holding the messages
+        :param messages: messages in order
+        :returns: the body as UTF-8 JSON
+        """
+        head = dumps(fields)[:-1]
+        separator = b"," if len(head) > 1 else b""
+        cached = self._fragments
+        # The lookup is inlined: this runs once per message of the history, every turn
+        fragments = b",".join([
+            cached.get((message.role, message.content)) or self.fragment(message)
+            for message in messages
+        ])
+        return b"".join((head, separator, dumps(key), b":[", fragments, b"]}"))
+
+
+_codec = MessageCodec()
+
+
+def get_codec() -> MessageCodec:
+    """Return the process-wide message codec."""
+    return _codec
@@ -0,0 +1,159 @@
+"""Token-aware context windowing for SmartBot.
+
+Memory backends trim the history by message count; this module trims it by
+an estimated token budget right before the history is sent to a provider.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Protocol
+
+from smartbot.core.interfaces import Message
+from smartbot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HEURISTIC_TOKENIZER = "heuristic"
+TIKTOKEN_PREFIX = "tiktoken:"
+# Chat templates wrap each message with role markers and separators
+DEFAULT_MESSAGE_OVERHEAD = 4
+DEFAULT_CACHE_SIZE = 4096
+CHARS_PER_TOKEN = 4
+
+
+class Tokenizer(Protocol):
+    """Anything able to count the tokens of a text."""
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens of ``text``."""
+        ...
+
+
+class HeuristicTokenizer:
+    """Offline estimate: about four characters, or three quarters of a word, per token."""
+
+    def count(self, text: str) -> int:
+        words = len(text.split())
+        return max(1, len(text) // CHARS_PER_TOKEN, words * 4 // 3)
+
+
+class TiktokenTokenizer:
+    """Exact counts for OpenAI models through the optional ``tiktoken`` package."""
+
+    def __init__(self, encoding_name: str) -> None:
+        import tiktoken  # type: ignore[import-not-found]
+
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text))
+
+
+def load_tokenizer(name: str = HEURISTIC_TOKENIZER) -> Tokenizer:
+    """Build a tokenizer from its configured name.
+
+    ``"tiktoken:<encoding>"`` uses tiktoken when it is installed; any other
+    value, or a missing tiktoken, falls back to :class:`HeuristicTokenizer`.
+
+    :param name: tokenizer name from the provider config
+    :returns: a tokenizer
+    """
+    if name.startswith(TIKTOKEN_PREFIX):
+        try:
+            return TiktokenTokenizer(name.removeprefix(TIKTOKEN_PREFIX))
+        except ImportError:
+            logger.warning("tiktoken is not installed; using the heuristic tokenizer.")
+        except ValueError as error:
+            logger.warning("Unknown tiktoken encoding (%s); using the heuristic tokenizer.", error)
+    elif name != HEURISTIC_TOKENIZER:
+        logger.warning("Unknown tokenizer %r; using the heuristic tokenizer.", name)
+    return HeuristicTokenizer()
+
+
+class TokenWindow:
+    """Select the newest messages that fit in a token budget.
+
+    Token counts are cached per (role, content), so each turn only
+    tokenizes the messages it has not seen yet.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        tokenizer: Tokenizer | None = None,
+        message_overhead: int = DEFAULT_MESSAGE_OVERHEAD,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        """
+        :param max_tokens: budget for the history plus the prompt
+        :param tokenizer: token counter, defaults to the heuristic one
+        :param message_overhead: tokens added per message by the chat template
+        :param cache_size: number of per-message counts kept
+        :raises ValueError: If max_tokens or cache_size is less than 1.
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1.")
+        if cache_size < 1:
+            raise ValueError("cache_size must be at least 1.")
+
+        self.max_tokens = max_tokens
+        self._tokenizer: Tokenizer = tokenizer or HeuristicTokenizer()
+        self._message_overhead = message_overhead
+        self._cache_size = cache_size
+        self._counts: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count_message(self, message: Message) -> int:
+        """Return the token cost of a message, tokenizing it only once."""
+        key = (message.role, message.content)
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None:
+                self._counts.move_to_end(key)
+                return cached
+
+        tokens = self._tokenizer.count(message.content) + self._message_overhead
+
+        with self._lock:
+            self._counts[key] = tokens
+            if len(self._counts) > self._cache_size:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def fit(self, history: list[Message], prompt: Message | None = None) -> list[Message]:
+        """Return the leading system messages of ``history`` and its newest others that fit.
+
+        The agents store the prompt before reading the history, so it is
+        usually its last message: it is then counted once and always kept.
+        The system prompt and conversation summaries come first and are
+        kept too, even when they alone exceed the budget.
+
+        :param history: conversation history, oldest first
+        :param prompt: message sent along with the history, if any
+        :returns: the pinned messages and the newest ones whose tokens (plus the prompt's) fit
+        """
+        budget = self.max_tokens
+        tail: list[Message] = []
+        if prompt is not None:
+            budget -= self.count_message(prompt)
+            if history and (history[-1].role, history[-1].content) == (prompt.role, prompt.content):
+                history, tail = history[:-1], history[-1:]
+
+        pinned = 0
+        while pinned < len(history) and history[pinned].role == "system":
+            budget -= self.count_message(history[pinned])
+            pinned += 1
+
+        start = len(history)
+        while start > pinned:
+            cost = self.count_message(history[start - 1])
+            if cost > budget:
+                break
+            budget -= cost
+            start -= 1
+
+        if start > pinned:
+            logger.debug("Context window dropped %d of %d messages", start - pinned, len(history))
+        return [*history[:pinned], *history[start:], *tail]
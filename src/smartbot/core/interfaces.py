@@ -7,6 +7,7 @@ with language model Providers and Memory backends.
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
 from typing import Literal
 
@@ -45,10 +46,23 @@ class ProviderError(RuntimeError):
     """Raised when a provider fails to generate a response."""
 
 
+class ProviderOverloadedError(ProviderError):
+    """Raised when a provider sheds a request instead of queueing it any longer."""
+
+
 class MemoryError(RuntimeError):
     """Raised when a memory backend fails."""
 
 
+class InvalidTurnError(ValueError):
+    """Raised when the Agent rejects a turn before storing or sending it."""
+
+
+# Failures of the backend rather than of the code calling it: providers raise
+# ProviderError or RuntimeError (Ollama), transports OSError, timeouts included
+PROVIDER_FAILURES: tuple[type[Exception], ...] = (RuntimeError, OSError)
+
+
 class LLMProvider(ABC):
     """Abstract interface for language model providers."""
 
@@ -63,6 +77,18 @@ class LLMProvider(ABC):
         """
         raise NotImplementedError
 
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        """Generate a reply from the assistant as a stream of text chunks.
+
+        Providers without native streaming yield the whole reply as a single chunk.
+
+        :param prompt: Latest user message.
+        :param history: Conversation history.
+        :returns: Iterator over the reply chunks, in order.
+        :raises ProviderError: If the provider fails.
+        """
+        yield self.generate_response(prompt=prompt, history=history).content
+
 
 class MemoryBackend(ABC):
     """Abstract interface for conversation memory backends."""
@@ -85,3 +111,113 @@ class MemoryBackend(ABC):
     @abstractmethod
     def clear(self) -> None:
         """Remove all stored messages."""
+
+
+class SessionMemoryBackend(ABC):
+    """Abstract interface for memory backends serving many conversations.
+
+    Every operation is keyed by a session ID, so a single backend object
+    can hold the history of any number of users.
+    """
+
+    @abstractmethod
+    def add_message(self, session_id: str, role: Role, content: str) -> None:
+        """Store a new message in a session.
+
+        :param session_id: Conversation the message belongs to.
+        :param role: Message role (user/assistant/system).
+        :param content: Message content.
+        """
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> list[Message]:
+        """Return the stored history of a session.
+
+        :param session_id: Conversation to read.
+        :returns: List of messages.
+        """
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        """Remove all stored messages of a session.
+
+        :param session_id: Conversation to clear.
+        """
+
+    def session(self, session_id: str) -> MemoryBackend:
+        """Return a single-conversation view bound to ``session_id``.
+
+        :param session_id: Conversation the view reads and writes.
+        :returns: A MemoryBackend that delegates to this backend.
+        """
+        return SessionView(self, session_id)
+
+
+class SessionView(MemoryBackend):
+    """MemoryBackend facade over one session of a SessionMemoryBackend."""
+
+    def __init__(self, backend: SessionMemoryBackend, session_id: str) -> None:
+        self._backend = backend
+        self.session_id = session_id
+
+    def add_message(self, role: Role, content: str) -> None:
+        self._backend.add_message(self.session_id, role, content)
+
+    def get_history(self) -> list[Message]:
+        return self._backend.get_history(self.session_id)
+
+    def clear(self) -> None:
+        self._backend.clear(self.session_id)
+
+
+class AsyncLLMProvider(ABC):
+    """Abstract asyncio interface for language model providers."""
+
+    @abstractmethod
+    async def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """Generate a reply from the assistant without blocking the event loop.
+
+        :param prompt: Latest user message.
+        :param history: Conversation history.
+        :returns: Assistant reply.
+        :raises ProviderError: If the provider fails.
+        """
+        raise NotImplementedError
+
+    async def stream_response(
+        self, prompt: Message, history: list[Message]
+    ) -> AsyncIterator[str]:
+        """Generate a reply from the assistant as an async stream of text chunks.
+
+        Providers without native streaming yield the whole reply as a single chunk.
+
+        :param prompt: Latest user message.
+        :param history: Conversation history.
+        :returns: Async iterator over the reply chunks, in order.
+        :raises ProviderError: If the provider fails.
+        """
+        reply = await self.generate_response(prompt=prompt, history=history)
+        yield reply.content
+
+
+class AsyncMemoryBackend(ABC):
+    """Abstract asyncio interface for conversation memory backends."""
+
+    @abstractmethod
+    async def add_message(self, role: Role, content: str) -> None:
+        """Store a new message.
+
+        :param role: Message role (user/assistant/system).
+        :param content: Message content.
+        """
+
+    @abstractmethod
+    async def get_history(self) -> list[Message]:
+        """Return stored conversation history.
+
+        :returns: List of messages.
+        """
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove all stored messages."""
@@ -1,4 +1,26 @@
+from .binary_memory import BinaryMemory
 from .in_memory import InMemoryBackend
 from .json_memory import JsonFileMemory
+from .jsonl_memory import JsonlMemory
+from .session_memory import SessionMemory
 
-__all__ = ["InMemoryBackend", "JsonFileMemory"]
+__all__ = [
+    "BinaryMemory",
+    "InMemoryBackend",
+    "JsonFileMemory",
+    "JsonlMemory",
+    "SessionMemory",
+    "SqliteMemory",
+    "SqliteSessionMemory",
+]
+
+# Imported on first use, so only runs configured for sqlite load sqlite3
+_LAZY_MODULES = {"SqliteMemory": "sqlite_memory", "SqliteSessionMemory": "sqlite_memory"}
+
+
+def __getattr__(name: str) -> object:
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    return getattr(import_module(f".{_LAZY_MODULES[name]}", __name__), name)
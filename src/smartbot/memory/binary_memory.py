@@ -0,0 +1,175 @@
+import json
+import logging
+import mmap
+import struct
+import zlib
+from pathlib import Path
+
+from .json_memory import (
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_FLUSH_EVERY,
+    DEFAULT_FLUSH_INTERVAL,
+    ENCODING,
+    Durability,
+)
+from .jsonl_memory import JsonlMemory
+from .records import MessageRecord
+
+DEFAULT_BINARY_FILE = "conversation_history.bin"
+# Payloads smaller than this are never compressed: zlib would only add overhead
+COMPRESSION_MIN_BYTES = 256
+
+# Every record is framed as <length><payload><length><crc32>, little endian.
+# The leading length allows a forward scan, the trailing one a backward scan
+# from the end of the file, and the CRC detects a torn or damaged record.
+HEADER = struct.Struct("<I")
+TRAILER = struct.Struct("<II")
+# Highest bit of the length: the payload is zlib-compressed JSON
+COMPRESSED_FLAG = 0x8000_0000
+LENGTH_MASK = 0x7FFF_FFFF
+
+logger = logging.getLogger(__name__)
+
+
+class BinaryMemory(JsonlMemory):
+    """
+    Append-only journal of length-prefixed binary records.
+
+    Records are compact JSON, optionally zlib-compressed, framed by their
+    length on both sides. Loading maps the file in memory and walks it
+    backwards from the end, so only the last `max_messages` records are
+    decoded no matter how long the file is. Appends and compaction work
+    like in JsonlMemory.
+    """
+    storage_name = "binary"
+
+    def __init__(
+        self,
+        file_path: str = DEFAULT_BINARY_FILE,
+        max_messages: int = DEFAULT_CONTEXT_WINDOW,
+        compact_threshold: int | None = None,
+        *,
+        compression: bool = False,
+        durability: Durability = "always",
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ):
+        """
+        Initialize the binary journal.
+
+        :param file_path: Path to the binary journal.
+        :param max_messages: Maximum number of messages to retain (sliding window).
+        :param compact_threshold: Number of records that triggers a compaction.
+            Defaults to twice `max_messages`.
+        :param compression: Compress the records of at least 256 bytes with zlib.
+        :param durability: When writes reach the disk (see JsonFileMemory).
+        :param flush_interval: Seconds a batched write may wait in memory.
+        :param flush_every: Buffered messages that trigger a batched flush right away.
+        :raises ValueError: If max_messages is less than 1 or the threshold is
+            smaller than the window.
+        """
+        self._compression = compression
+        super().__init__(
+            file_path=file_path,
+            max_messages=max_messages,
+            compact_threshold=compact_threshold,
+            durability=durability,
+            flush_interval=flush_interval,
+            flush_every=flush_every,
+        )
+
+    def _encode_record(self, message: MessageRecord) -> bytes:
+        return encode_record(message, compression=self._compression)
+
+    def _load_memory(self) -> None:
+        """Decode the last `max_messages` records, walking the file backwards."""
+        if not self._file_path.exists() or self._file_path.stat().st_size == 0:
+            logger.info(f"Journal not found at {self._file_path}. Starting empty.")
+            return
+
+        try:
+            with self._file_path.open("rb") as journal, \
+                    mmap.mmap(journal.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                messages, more = _read_tail(data, self._max_messages)
+        except OSError as error:
+            logger.warning(f"Unreadable journal at {self._file_path}. Resetting history: {error}")
+            return
+        except ValueError as error:
+            # The end of the file is damaged: recover the valid prefix
+            logger.warning(f"Damaged journal at {self._file_path}, recovering: {error}")
+            records = read_records(self._file_path)
+            self._messages = records[-self._max_messages:]
+            self.compact()
+            return
+
+        self._messages = messages
+        self._journal_lines = len(messages)
+        if more:
+            # Older records are left undecoded; the next append rewrites the window
+            self._journal_lines = self._compact_threshold
+        logger.debug(f"Loaded the last {len(messages)} journal records.")
+
+
+def encode_record(message: MessageRecord, compression: bool = False) -> bytes:
+    """Frame one message as a binary record."""
+    payload = json.dumps(message.to_dict(), ensure_ascii=False, separators=(",", ":"))
+    data = payload.encode(ENCODING)
+    length = len(data)
+    if compression and length >= COMPRESSION_MIN_BYTES:
+        compressed = zlib.compress(data)
+        if len(compressed) < length:
+            data = compressed
+            length = len(data) | COMPRESSED_FLAG
+    return HEADER.pack(length) + data + TRAILER.pack(length, zlib.crc32(data))
+
+
+def _decode_payload(data: bytes, length: int) -> MessageRecord:
+    if length & COMPRESSED_FLAG:
+        data = zlib.decompress(data)
+    return MessageRecord.from_dict(json.loads(data))
+
+
+def _read_tail(data: mmap.mmap, count: int) -> tuple[list[MessageRecord], bool]:
+    """Decode the last ``count`` records of a mapped journal, newest last.
+
+    :returns: the records and whether older ones remain before them
+    :raises ValueError: If a record is torn or damaged.
+    """
+    records: list[MessageRecord] = []
+    end = len(data)
+    while end > 0 and len(records) < count:
+        if end < HEADER.size + TRAILER.size:
+            raise ValueError("truncated record")
+        length, crc = TRAILER.unpack_from(data, end - TRAILER.size)
+        size = length & LENGTH_MASK
+        start = end - TRAILER.size - size - HEADER.size
+        if start < 0 or HEADER.unpack_from(data, start)[0] != length:
+            raise ValueError("record framing mismatch")
+        payload = data[start + HEADER.size:start + HEADER.size + size]
+        if zlib.crc32(payload) != crc:
+            raise ValueError("record checksum mismatch")
+        records.append(_decode_payload(payload, length))
+        end = start
+    records.reverse()
+    return records, end > 0
+
+
+def read_records(file_path: Path) -> list[MessageRecord]:
+    """Decode every valid record of a journal from the start, stopping at the first bad one."""
+    data = file_path.read_bytes()
+    records: list[MessageRecord] = []
+    start = 0
+    while start + HEADER.size <= len(data):
+        (length,) = HEADER.unpack_from(data, start)
+        end = start + HEADER.size + (length & LENGTH_MASK) + TRAILER.size
+        if end > len(data):
+            break
+        payload = data[start + HEADER.size:end - TRAILER.size]
+        if TRAILER.unpack_from(data, end - TRAILER.size) != (length, zlib.crc32(payload)):
+            break
+        try:
+            records.append(_decode_payload(payload, length))
+        except (ValueError, zlib.error):
+            break
+        start = end
+    return records
@@ -1,5 +1,7 @@
 from smartbot.core.interfaces import MemoryBackend, Message, Role
 
+from .records import MessageRecord, to_messages
+
 
 class InMemoryBackend(MemoryBackend):
     """
@@ -7,17 +9,17 @@ class InMemoryBackend(MemoryBackend):
     Useful for testing or ephemeral sessions where persistence is not required.
     """
     def __init__(self) -> None:
-        self._messages: list[Message] = []
+        self._messages: list[MessageRecord] = []
 
     def add_message(self, role: Role, content: str) -> None:
         """Create and store a message in RAM."""
-        # Pydantic automatically validates upon instantiation
-        new_msg = Message(role=role, content=content)
+        # The record validates role and content like Message does
+        new_msg = MessageRecord.create(role, content)
         self._messages.append(new_msg)
 
     def get_history(self) -> list[Message]:
         """Return a copy of the history."""
-        return self._messages.copy()
+        return to_messages(self._messages)
 
     def clear(self) -> None:
         """Clear the in-memory list."""
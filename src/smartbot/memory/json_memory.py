@@ -1,16 +1,29 @@
 import json
 import logging
+import threading
 from pathlib import Path
-
-from pydantic import TypeAdapter, ValidationError
+from typing import Literal
 
 from smartbot.core.interfaces import MemoryBackend, MemoryError, Message, Role
+from smartbot.utils.metrics import get_metrics
+
+from . import write_behind
+from .records import MessageRecord, to_messages
 
 # CLEAN CODE: Constants to avoid magic numbers
 DEFAULT_HISTORY_FILE = "conversation_history.json"
 DEFAULT_CONTEXT_WINDOW = 10
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_FLUSH_EVERY = 32
 ENCODING = "utf-8"
 
+# "always": every message is written before add_message returns
+# "batched": writes are flushed in the background after flush_interval
+#            seconds or flush_every messages, whatever comes first
+# "exit": writes are only flushed by flush(), close() or at interpreter exit
+Durability = Literal["always", "batched", "exit"]
+DURABILITY_MODES = ("always", "batched", "exit")
+
 logger = logging.getLogger(__name__)
 
 class JsonFileMemory(MemoryBackend):
@@ -19,31 +32,60 @@ class JsonFileMemory(MemoryBackend):
 
     Implements the Single Responsibility Principle by handling both I/O
     operations and state management for the conversation history.
+
+    With a ``durability`` other than "always" the writes are buffered
+    (write-behind) and ``flush()`` or ``close()`` must be called before
+    the file is up to date; pending writes are also flushed at exit.
     """
     def __init__(
         self,
         file_path: str = DEFAULT_HISTORY_FILE,
         max_messages: int = DEFAULT_CONTEXT_WINDOW,
+        *,
+        durability: Durability = "always",
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
     ):
         """
         Initialize the persistent memory backend.
 
         :param file_path: Path to the JSON file where history is stored.
         :param max_messages: Maximum number of messages to retain (sliding window).
-        :raises ValueError: If max_messages is less than 1.
+        :param durability: When writes reach the disk ("always", "batched" or "exit").
+        :param flush_interval: Seconds a batched write may wait in memory.
+        :param flush_every: Buffered messages that trigger a batched flush right away.
+        :raises ValueError: If max_messages or flush_every is less than 1, the
+            interval is negative or the durability is unknown.
         """
         self._file_path = Path(file_path)
         self._max_messages = max_messages
-        self._messages: list[Message] = []
+        self._messages: list[MessageRecord] = []
 
         # DEFENSIVE PROGRAMMING: Validate inputs at startup
         if max_messages < 1:
             raise ValueError("max_messages debe ser al menos 1.")
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unsupported durability: {durability}")
+        if flush_interval < 0 or flush_every < 1:
+            raise ValueError("flush_interval can't be negative and flush_every must be >= 1.")
+
+        self._durability = durability
+        self._flush_interval = flush_interval
+        self._flush_every = flush_every
+        # Messages added since the last write, in write-behind modes
+        self._unsaved: list[MessageRecord] = []
+        # The background flusher and the callers share the state; only one flush
+        # writes the file at a time
+        self._lock = threading.RLock()
+        self._write_lock = threading.RLock()
 
         self._load_memory()
 
+        if durability != "always":
+            write_behind.track(self)
+
     def _load_memory(self) -> None:
-        """Load and validate history from disk using Pydantic."""
+        """Load and validate history from disk."""
         if not self._file_path.exists():
             logger.info(f"Memory file not found at {self._file_path}. Starting empty.")
             return
@@ -51,23 +93,31 @@ class JsonFileMemory(MemoryBackend):
         try:
             json_content = self._file_path.read_text(encoding=ENCODING)
 
-            adapter = TypeAdapter(list[Message])
-            self._messages = adapter.validate_json(json_content)
+            raw_messages = json.loads(json_content)
+            if not isinstance(raw_messages, list):
+                raise ValueError("The history must be a JSON list.")
+            self._messages = [MessageRecord.from_dict(raw) for raw in raw_messages]
 
             logger.debug(f"Loaded {len(self._messages)} messages.")
 
-        except (ValidationError, json.JSONDecodeError) as error:
+        except ValueError as error:
             logger.warning(f"Corrupt memory at {self._file_path}. Resetting history: {error}")
             self._messages = []
 
-    def _save_memory(self) -> None:
-        """Save the current state to disk atomically."""
+    def _save_memory(self, records: list[MessageRecord] | None = None) -> None:
+        """Save the current state (or the given snapshot of it) to disk atomically."""
+        if records is None:
+            records = self._messages
         try:
-            adapter = TypeAdapter(list[Message])
+            json_bytes = json.dumps(
+                [record.to_dict() for record in records], indent=2, ensure_ascii=False
+            ).encode(ENCODING)
 
-            json_bytes = adapter.dump_json(self._messages, indent=2)
-
-            self._file_path.write_bytes(json_bytes)
+            # A crash mid-write leaves the temp file behind, never a truncated history
+            temp_path = self._file_path.with_name(f"{self._file_path.name}.tmp")
+            temp_path.write_bytes(json_bytes)
+            temp_path.replace(self._file_path)
+            get_metrics().increment("memory_bytes_written_total", len(json_bytes), backend="json")
 
         except OSError as error:
             logger.error(f"Critical error saving memory to {self._file_path}: {error}")
@@ -81,15 +131,58 @@ class JsonFileMemory(MemoryBackend):
         :param content: The content of the message.
         """
         try:
-            # DATA MODELING: Pydantic validates role and content here
-            new_msg = Message(role=role, content=content)
+            # DATA MODELING: the record validates role and content like Message does
+            new_msg = MessageRecord.create(role, content)
+        except ValueError as error:
+            logger.error(f"Attempted to save invalid message: {error}")
+            return
 
+        with self._lock:
             self._messages.append(new_msg)
             self._prune_history()
-            self._save_memory()
+            if self._durability == "always":
+                self._persist([new_msg], self._messages)
+                return
+            self._unsaved.append(new_msg)
+            unsaved = len(self._unsaved)
 
-        except ValidationError as error:
-            logger.error(f"Attempted to save invalid message: {error}")
+        if self._durability == "batched":
+            full = unsaved >= self._flush_every
+            write_behind.schedule(self, 0 if full else self._flush_interval)
+
+    def _persist(self, new_messages: list[MessageRecord], window: list[MessageRecord]) -> None:
+        """Write the messages added since the last write; a JSON file is rewritten whole.
+
+        :param new_messages: messages added since the last write
+        :param window: snapshot of the history when they were taken
+        """
+        self._save_memory(window)
+
+    def flush(self) -> None:
+        """Write the buffered messages now.
+
+        The disk is written outside the state lock, so new messages can be
+        added while a large history is being saved.
+
+        :raises MemoryError: If the write fails; the messages stay buffered.
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                batch, self._unsaved = self._unsaved, []
+                window = list(self._messages)
+            try:
+                self._persist(batch, window)
+            except MemoryError:
+                with self._lock:
+                    self._unsaved = batch + self._unsaved
+                raise
+
+    def close(self) -> None:
+        """Flush the buffered messages and stop flushing this backend in the background."""
+        self.flush()
+        write_behind.untrack(self)
 
     def _prune_history(self) -> None:
         """Keep the in-memory list within the configured limit."""
@@ -103,13 +196,15 @@ class JsonFileMemory(MemoryBackend):
         :return: List of immutable Message objects.
         """
         # CLEAN CODE: Return a copy to avoid accidental external mutation
-        return self._messages[-self._max_messages:].copy()
+        return to_messages(self._messages[-self._max_messages:])
 
     def clear(self) -> None:
         """Clear memory and delete the persistence file."""
-        self._messages = []
-        try:
-            self._file_path.unlink(missing_ok=True)
-            logger.info(f"Memory cleared and file {self._file_path} deleted.")
-        except OSError as error:
-            logger.error(f"Error deleting memory file: {error}")
+        with self._write_lock, self._lock:
+            self._messages = []
+            self._unsaved = []
+            try:
+                self._file_path.unlink(missing_ok=True)
+                logger.info(f"Memory cleared and file {self._file_path} deleted.")
+            except OSError as error:
+                logger.error(f"Error deleting memory file: {error}")
@@ -0,0 +1,172 @@
+import json
+import logging
+
+from smartbot.core.interfaces import MemoryError
+from smartbot.utils.metrics import get_metrics
+
+from .json_memory import (
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_FLUSH_EVERY,
+    DEFAULT_FLUSH_INTERVAL,
+    ENCODING,
+    Durability,
+    JsonFileMemory,
+)
+from .records import MessageRecord
+
+DEFAULT_JOURNAL_FILE = "conversation_history.jsonl"
+# The journal is compacted once it holds this many times the window size,
+# so the rewrite cost is amortised over at least `max_messages` appends.
+COMPACTION_FACTOR = 2
+NEWLINE = b"\n"
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlMemory(JsonFileMemory):
+    """
+    Append-only JSONL journal with periodic compaction.
+
+    Every message is appended as a single JSON line, so the I/O cost of a
+    turn depends on the size of the message and not on the size of the
+    history. The `max_messages` window is applied to the file by a
+    compaction step that atomically rewrites the journal once it grows
+    past `compact_threshold` lines.
+    """
+    # Label of the bytes written in the memory_bytes_written_total metric
+    storage_name = "jsonl"
+
+    def __init__(
+        self,
+        file_path: str = DEFAULT_JOURNAL_FILE,
+        max_messages: int = DEFAULT_CONTEXT_WINDOW,
+        compact_threshold: int | None = None,
+        *,
+        durability: Durability = "always",
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ):
+        """
+        Initialize the journaled memory backend.
+
+        :param file_path: Path to the JSONL journal.
+        :param max_messages: Maximum number of messages to retain (sliding window).
+        :param compact_threshold: Number of journal lines that triggers a compaction.
+            Defaults to twice `max_messages`.
+        :param durability: When writes reach the disk (see JsonFileMemory).
+        :param flush_interval: Seconds a batched write may wait in memory.
+        :param flush_every: Buffered messages that trigger a batched flush right away.
+        :raises ValueError: If max_messages is less than 1 or the threshold is
+            smaller than the window.
+        """
+        if compact_threshold is None:
+            compact_threshold = max_messages * COMPACTION_FACTOR
+        if compact_threshold < max_messages:
+            raise ValueError("compact_threshold must be greater or equal than max_messages.")
+
+        self._compact_threshold = compact_threshold
+        self._journal_lines = 0
+
+        super().__init__(
+            file_path=file_path,
+            max_messages=max_messages,
+            durability=durability,
+            flush_interval=flush_interval,
+            flush_every=flush_every,
+        )
+
+    def _load_memory(self) -> None:
+        """Replay the journal, skipping torn or corrupt lines left by a crash."""
+        if not self._file_path.exists():
+            logger.info(f"Journal not found at {self._file_path}. Starting empty.")
+            return
+
+        try:
+            raw_lines = self._file_path.read_bytes().splitlines(keepends=True)
+        except OSError as error:
+            logger.warning(f"Unreadable journal at {self._file_path}. Resetting history: {error}")
+            return
+
+        messages: list[MessageRecord] = []
+        damaged = False
+
+        for raw_line in raw_lines:
+            if not raw_line.strip():
+                continue
+            # A line without terminator is an append interrupted by a crash
+            if not raw_line.endswith(NEWLINE):
+                logger.warning(f"Discarding torn record at the end of {self._file_path}.")
+                damaged = True
+                break
+            try:
+                messages.append(MessageRecord.from_dict(json.loads(raw_line)))
+            except ValueError as error:
+                logger.warning(f"Skipping corrupt record in {self._file_path}: {error}")
+                damaged = True
+
+        self._messages = messages[-self._max_messages:]
+        self._journal_lines = len(messages)
+        logger.debug(f"Replayed {len(messages)} journal records.")
+
+        # Rewrite a clean journal so later appends never follow a broken line
+        if damaged or self._journal_lines >= self._compact_threshold:
+            self.compact()
+
+    def _append_records(self, messages: list[MessageRecord]) -> None:
+        """Append messages to the journal in a single write."""
+        records = b"".join(map(self._encode_record, messages))
+        try:
+            with self._file_path.open("ab") as journal:
+                journal.write(records)
+        except OSError as error:
+            logger.error(f"Critical error appending to journal {self._file_path}: {error}")
+            raise MemoryError("I/O failure while appending to history") from error
+
+        self._journal_lines += len(messages)
+        get_metrics().increment("memory_bytes_written_total", len(records),
+                                backend=self.storage_name)
+
+    def compact(self, window: list[MessageRecord] | None = None) -> None:
+        """Rewrite the journal with the current window (or a snapshot of it) only, atomically."""
+        if window is None:
+            window = self._messages
+        records = b"".join(map(self._encode_record, window))
+        temp_path = self._file_path.with_name(f"{self._file_path.name}.tmp")
+        try:
+            temp_path.write_bytes(records)
+            temp_path.replace(self._file_path)
+        except OSError as error:
+            logger.error(f"Critical error compacting journal {self._file_path}: {error}")
+            raise MemoryError("I/O failure while compacting history") from error
+
+        self._journal_lines = len(window)
+        get_metrics().increment("memory_bytes_written_total", len(records),
+                                backend=self.storage_name)
+        logger.debug(f"Journal compacted to {self._journal_lines} records.")
+
+    def _encode_record(self, message: MessageRecord) -> bytes:
+        """Serialize one message as it is appended to the journal."""
+        return _encode(message)
+
+    def _save_memory(self, records: list[MessageRecord] | None = None) -> None:
+        """Persist the full state; in journal mode this is a compaction."""
+        self.compact(records)
+
+    def _persist(self, new_messages: list[MessageRecord], window: list[MessageRecord]) -> None:
+        """Append the new messages, compacting the journal when it grows too long."""
+        self._append_records(new_messages)
+
+        if self._journal_lines >= self._compact_threshold:
+            self.compact(window)
+
+    def clear(self) -> None:
+        """Clear memory and delete the journal."""
+        with self._write_lock, self._lock:
+            super().clear()
+            self._journal_lines = 0
+
+
+def _encode(message: MessageRecord) -> bytes:
+    """Serialize a record as one journal line (JSON escapes any newline in the content)."""
+    record = json.dumps(message.to_dict(), ensure_ascii=False, separators=(",", ":"))
+    return record.encode(ENCODING) + NEWLINE
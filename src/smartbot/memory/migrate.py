@@ -0,0 +1,92 @@
+"""Convert JSON and JSONL histories to the binary format.
+
+Usage::
+
+    python -m smartbot.memory.migrate history.json history.bin --compress
+    python -m smartbot.memory.migrate sessions/ sessions-bin/
+
+A folder is migrated file by file (``*.json`` and ``*.jsonl``), keeping the
+session names, so it can then be used as ``sessions_dir`` with the
+``binary`` backend. The sources are never modified.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .binary_memory import encode_record
+from .json_memory import ENCODING
+from .records import MessageRecord
+
+SOURCE_SUFFIXES = (".json", ".jsonl")
+TARGET_SUFFIX = ".bin"
+
+
+def read_history(path: Path) -> list[MessageRecord]:
+    """Read every message of a JSON or JSONL history, oldest first.
+
+    :raises ValueError: If the file is not a valid history.
+    """
+    text = path.read_text(encoding=ENCODING)
+    if path.suffix == ".jsonl":
+        return [MessageRecord.from_dict(json.loads(line)) for line in text.splitlines()
+                if line.strip()]
+
+    raw_messages = json.loads(text)
+    if not isinstance(raw_messages, list):
+        raise ValueError("The history must be a JSON list.")
+    return [MessageRecord.from_dict(raw) for raw in raw_messages]
+
+
+def migrate_history(source: Path, target: Path, *, compression: bool = False) -> int:
+    """Write the messages of ``source`` to the binary journal ``target``.
+
+    :param source: JSON or JSONL history
+    :param target: binary journal to create (replaced if it exists)
+    :param compression: compress the larger records with zlib
+    :returns: number of migrated messages
+    :raises ValueError: If the source is not a valid history.
+    """
+    records = read_history(source)
+    data = b"".join(encode_record(record, compression=compression) for record in records)
+    temp_path = target.with_name(f"{target.name}.tmp")
+    temp_path.write_bytes(data)
+    temp_path.replace(target)
+    return len(records)
+
+
+def migrate_directory(source: Path, target: Path, *, compression: bool = False) -> int:
+    """Migrate every history of a sessions folder; returns the number of files."""
+    target.mkdir(parents=True, exist_ok=True)
+    histories = sorted(p for p in source.iterdir() if p.suffix in SOURCE_SUFFIXES)
+    for path in histories:
+        migrate_history(path, target / f"{path.stem}{TARGET_SUFFIX}", compression=compression)
+    return len(histories)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="JSON/JSONL history or sessions folder")
+    parser.add_argument("target", type=Path, help="binary journal or folder to write")
+    parser.add_argument("--compress", action="store_true",
+                        help="compress the larger records with zlib")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.source.is_dir():
+            count = migrate_directory(args.source, args.target, compression=args.compress)
+            sys.stdout.write(f"Migrated {count} histories to {args.target}\n")
+        else:
+            count = migrate_history(args.source, args.target, compression=args.compress)
+            sys.stdout.write(f"Migrated {count} messages to {args.target}\n")
+    except (OSError, ValueError) as error:
+        sys.stderr.write(f"Migration failed: {error}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Compact message records used inside the memory backends.
+
+Building a pydantic :class:`Message` runs its validators, and loading a
+history through ``TypeAdapter(list[Message])`` does it for every stored
+message. Backends keep :class:`MessageRecord` objects instead and only
+build ``Message`` objects when the history leaves the backend.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, get_args
+
+from smartbot.core.interfaces import Message, Role
+
+ROLES = frozenset(get_args(Role))
+
+
+class MessageRecord:
+    """Validated role, content and timestamp of a stored message.
+
+    The ``Message`` and the ISO form of the timestamp are built on first
+    use and reused afterwards, so a history read or saved twice only
+    converts its new records.
+    """
+
+    __slots__ = ("_iso_timestamp", "_message", "content", "role", "timestamp")
+
+    def __init__(self, role: Role, content: str, timestamp: datetime) -> None:
+        """Wrap already validated fields; use :meth:`create` or :meth:`from_dict` otherwise."""
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+        self._iso_timestamp: str | None = None
+        self._message: Message | None = None
+
+    @classmethod
+    def create(cls, role: str, content: str) -> MessageRecord:
+        """Validate a new message like ``Message`` does and stamp it with the current time.
+
+        :raises ValueError: If the role is unknown or the content is blank.
+        """
+        return cls(_check_role(role), _clean_content(content), datetime.now())
+
+    @classmethod
+    def from_dict(cls, data: Any) -> MessageRecord:
+        """Validate a record read from disk (the ``model_dump`` form of a Message).
+
+        Records written by hand or by older versions may lack the timestamp or
+        hold it as a number; those go through ``Message`` and are accepted
+        whenever ``Message`` accepts them.
+
+        :raises ValueError: If the record is malformed.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("A message record must be a JSON object.")
+        timestamp = _parse_iso(data.get("timestamp"))
+        role, content = data.get("role"), data.get("content")
+        if timestamp is None or not (isinstance(role, str) and isinstance(content, str)):
+            return cls.from_message(Message.model_validate(data))
+        record = cls(_check_role(role), _clean_content(content), timestamp)
+        record._iso_timestamp = data["timestamp"]
+        return record
+
+    @classmethod
+    def from_message(cls, message: Message) -> MessageRecord:
+        """Wrap a Message that was already validated by pydantic."""
+        record = cls(message.role, message.content, message.timestamp)
+        record._message = message
+        return record
+
+    @property
+    def iso_timestamp(self) -> str:
+        """The timestamp as written to disk, formatted only once."""
+        if self._iso_timestamp is None:
+            self._iso_timestamp = self.timestamp.isoformat()
+        return self._iso_timestamp
+
+    def to_dict(self) -> dict[str, str]:
+        """Serialize the record in the same shape as ``Message.model_dump``."""
+        return {"role": self.role, "content": self.content, "timestamp": self.iso_timestamp}
+
+    def to_message(self) -> Message:
+        """Return the ``Message`` of this record, building it only once."""
+        if self._message is None:
+            # Revalidating clean fields is cheaper than Message.model_construct
+            self._message = Message(role=self.role, content=self.content, timestamp=self.timestamp)
+        return self._message
+
+
+def _parse_iso(timestamp: Any) -> datetime | None:
+    """The timestamp in the ISO form written by the backends, None for any other form."""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        return datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+
+
+def _check_role(role: str) -> Role:
+    if role not in ROLES:
+        raise ValueError(f"Invalid role: {role!r}")
+    return role  # type: ignore[return-value]
+
+
+def _clean_content(content: str) -> str:
+    cleaned = content.strip()
+    if not cleaned:
+        raise ValueError("The content can't be empty.")
+    return cleaned
+
+
+def to_messages(records: list[MessageRecord]) -> list[Message]:
+    """Convert records to messages at the boundary of a backend."""
+    return list(map(MessageRecord.to_message, records))
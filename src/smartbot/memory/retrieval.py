@@ -0,0 +1,421 @@
+"""Recall older messages by meaning: a vector index over what the window forgets."""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import operator
+import re
+import struct
+import threading
+import zlib
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Protocol
+
+from smartbot.core.interfaces import MemoryBackend, MemoryError, Message, Role
+from smartbot.utils.metrics import get_metrics
+
+from .records import MessageRecord
+from .summarizing import forgotten_messages
+
+DEFAULT_TOP_K = 4
+DEFAULT_MIN_SCORE = 0.2
+DEFAULT_DIMENSIONS = 256
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+HASHING_EMBEDDER = "hashing"
+OLLAMA_PREFIX = "ollama:"
+ENCODING = "utf-8"
+# Messages sent to the embedder per call when catching up with the archive
+EMBED_BATCH = 256
+# Rows of the index allocated at once with NumPy; it then doubles when full
+INITIAL_CAPACITY = 1024
+TOKEN_PATTERN = re.compile(r"\w+")
+# The vectors file starts with a magic, the number of dimensions of its float32 rows
+# and the length of the name of the embedder that computed them, followed by that name
+VECTORS_MAGIC = b"SBV2"
+VECTORS_HEADER = struct.Struct("<4sIH")
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder(Protocol):
+    """Anything able to turn texts into vectors of a fixed size.
+
+    Embedders may also have a ``name`` identifying the model and vector
+    size; stored vectors computed under another name are recomputed.
+    """
+
+    def embed(self, texts: list[str]) -> Sequence[Sequence[float]]:
+        """Return one vector per text, in order."""
+        ...
+
+
+class HashingEmbedder:
+    """Offline embedder: a bag of words hashed into ``dimensions`` buckets.
+
+    It needs no model and gives the same vector on every run, so it is the
+    default and the one used by the tests. It only matches shared words,
+    not synonyms.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS) -> None:
+        """
+        :param dimensions: size of the vectors
+        :raises ValueError: If dimensions is less than 1.
+        """
+        if dimensions < 1:
+            raise ValueError("dimensions must be at least 1.")
+        self._dimensions = dimensions
+        self.name = f"{HASHING_EMBEDDER}:{dimensions}"
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self._dimensions
+        for word in TOKEN_PATTERN.findall(text.lower()):
+            digest = zlib.crc32(word.encode(ENCODING))
+            # The highest bit picks the sign, so colliding words tend to cancel out
+            vector[digest % self._dimensions] += -1.0 if digest & 0x8000_0000 else 1.0
+        return vector
+
+
+class OllamaEmbedder:
+    """Embeddings of an Ollama model, through its ``/api/embed`` endpoint."""
+
+    def __init__(self, model: str, base_url: str = DEFAULT_OLLAMA_URL,
+                 timeout: float = 30.0) -> None:
+        """
+        :param model: embedding model, e.g. ``nomic-embed-text``
+        :param base_url: URL of the Ollama server
+        :param timeout: seconds to wait for each request
+        """
+        self._model = model
+        self.name = f"{OLLAMA_PREFIX}{model}"
+        self._url = f"{base_url.rstrip('/')}/api/embed"
+        self._timeout = timeout
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        :raises MemoryError: If the server cannot be reached or answers badly.
+        """
+        # Imported here so the memory package does not load requests unless it is used
+        import requests
+
+        try:
+            response = requests.post(
+                self._url, json={"model": self._model, "input": texts}, timeout=self._timeout
+            )
+            response.raise_for_status()
+            return response.json()["embeddings"]
+        except (requests.RequestException, KeyError, ValueError) as error:
+            raise MemoryError(f"Could not embed with {self._model}: {error}") from error
+
+
+def load_embedder(name: str = HASHING_EMBEDDER, base_url: str | None = None) -> Embedder:
+    """Build an embedder from its configured name.
+
+    :param name: ``"hashing"`` or ``"ollama:<model>"``
+    :param base_url: Ollama server for ``ollama:`` embedders
+    :returns: an embedder
+    :raises ValueError: If the name is unknown.
+    """
+    if name.startswith(OLLAMA_PREFIX):
+        return OllamaEmbedder(name.removeprefix(OLLAMA_PREFIX), base_url or DEFAULT_OLLAMA_URL)
+    if name != HASHING_EMBEDDER:
+        raise ValueError(f"Unknown embedder: {name}")
+    return HashingEmbedder()
+
+
+class VectorIndex:
+    """Exact top-k search by cosine similarity over unit float32 rows.
+
+    Rows live in a single NumPy matrix, so a search over 100k messages is
+    one matrix product. Should NumPy be missing (it is a dependency, but a
+    broken install may lack it) the same search runs in pure Python.
+    """
+
+    def __init__(self) -> None:
+        self._numpy = _load_numpy()
+        self._matrix: Any = None
+        self._rows: list[array] = []
+        self._size = 0
+        self.dimensions: int | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, rows: list[array]) -> None:
+        """Append rows, which must be unit vectors of the same size."""
+        if not rows:
+            return
+        if self.dimensions is None:
+            self.dimensions = len(rows[0])
+        if self._numpy is None:
+            self._rows.extend(rows)
+        else:
+            self._add_to_matrix(rows)
+        self._size += len(rows)
+
+    def _add_to_matrix(self, rows: list[array]) -> None:
+        numpy = self._numpy
+        block = numpy.frombuffer(b"".join(row.tobytes() for row in rows), dtype=numpy.float32)
+        needed = self._size + len(rows)
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if needed > capacity:
+            matrix = numpy.empty((max(needed, capacity * 2, INITIAL_CAPACITY), self.dimensions),
+                                 dtype=numpy.float32)
+            if self._matrix is not None:
+                matrix[:self._size] = self._matrix[:self._size]
+            self._matrix = matrix
+        self._matrix[self._size:needed] = block.reshape(len(rows), self.dimensions)
+
+    def search(self, query: array, k: int) -> list[tuple[int, float]]:
+        """Return the ``k`` best (position, score) pairs, best first.
+
+        :raises ValueError: If the query and the rows differ in size.
+        """
+        k = min(k, self._size)
+        if k == 0:
+            return []
+        if len(query) != self.dimensions:
+            raise ValueError(
+                f"The query has {len(query)} dimensions, the index {self.dimensions}."
+            )
+        if self._numpy is None:
+            scores = ((position, sum(map(operator.mul, row, query)))
+                      for position, row in enumerate(self._rows))
+            return heapq.nlargest(k, scores, key=operator.itemgetter(1))
+
+        numpy = self._numpy
+        all_scores = self._matrix[:self._size] @ numpy.frombuffer(query, dtype=numpy.float32)
+        best = numpy.argpartition(all_scores, self._size - k)[self._size - k:]
+        return sorted(((int(position), float(all_scores[position])) for position in best),
+                      key=operator.itemgetter(1), reverse=True)
+
+
+class RetrievalMemory(MemoryBackend):
+    """Add the older messages most related to the question to the window.
+
+    Messages pushed out of the wrapped backend's window are appended to an
+    archive and embedded into a :class:`VectorIndex`. ``get_history`` embeds
+    the newest user message and returns the ``top_k`` archived messages
+    most similar to it, oldest first, followed by the window. The prompt
+    stays about as small as the window while anything said before can
+    still be recalled.
+
+    The archive is a JSONL file; the vectors are kept next to it
+    (``<archive_path>.vec``) so they are not computed again on restart.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryBackend,
+        embedder: Embedder,
+        archive_path: str,
+        top_k: int = DEFAULT_TOP_K,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> None:
+        """
+        :param memory: sliding-window backend holding the recent messages
+        :param embedder: turns messages and questions into vectors
+        :param archive_path: JSONL file holding the messages out of the window
+        :param top_k: archived messages recalled per turn
+        :param min_score: cosine similarity a message needs to be recalled
+        :raises ValueError: If top_k is less than 1.
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1.")
+
+        self._memory = memory
+        self._embedder = embedder
+        self._embedder_name = embedder_name(embedder)
+        self._archive_path = Path(archive_path)
+        self._vectors_path = self._archive_path.with_name(f"{self._archive_path.name}.vec")
+        self._top_k = top_k
+        self._min_score = min_score
+        self._archive: list[MessageRecord] = []
+        self._index = VectorIndex()
+        self._lock = threading.Lock()
+
+        self._load_archive()
+        self._window = memory.get_history()
+        self._catch_up()
+
+    def __len__(self) -> int:
+        """Number of archived messages."""
+        return len(self._archive)
+
+    def _load_archive(self) -> None:
+        if not self._archive_path.exists():
+            return
+        try:
+            lines = self._archive_path.read_bytes().splitlines()
+        except OSError as error:
+            logger.warning(f"Unreadable archive at {self._archive_path}. Ignoring it: {error}")
+            return
+        for line in lines:
+            try:
+                self._archive.append(MessageRecord.from_dict(json.loads(line)))
+            except ValueError as error:
+                logger.warning(f"Skipping corrupt record in {self._archive_path}: {error}")
+        self._load_vectors()
+
+    def _load_vectors(self) -> None:
+        """Reuse the stored vectors that still match the archive; the rest are recomputed."""
+        try:
+            data = self._vectors_path.read_bytes()
+        except OSError:
+            return
+        if len(data) < VECTORS_HEADER.size:
+            return
+        magic, dimensions, name_size = VECTORS_HEADER.unpack_from(data)
+        start = VECTORS_HEADER.size + name_size
+        name = data[VECTORS_HEADER.size:start].decode(ENCODING, errors="replace")
+        if magic != VECTORS_MAGIC or name != self._embedder_name:
+            # Vectors of another embedder (or of an older file format) cannot be compared
+            logger.warning(f"Vectors in {self._vectors_path} were not computed by "
+                           f"{self._embedder_name}. Rebuilding the index.")
+            self._vectors_path.unlink(missing_ok=True)
+            return
+        values = array("f")
+        body = data[start:]
+        values.frombytes(body[:len(body) - len(body) % values.itemsize])
+        count = min(len(values) // max(dimensions, 1), len(self._archive))
+        self._index.add([values[row * dimensions:(row + 1) * dimensions] for row in range(count)])
+        if count * dimensions * values.itemsize != len(body):
+            # A torn row or records lost from the archive: keep the valid prefix only
+            self._write_vectors(values[:count * dimensions], dimensions, mode="wb")
+
+    def add_message(self, role: Role, content: str) -> None:
+        """Store the message and archive whatever the window pushes out."""
+        self._memory.add_message(role, content)
+        window = self._memory.get_history()
+        with self._lock:
+            forgotten = forgotten_messages(self._window, window)
+            self._window = window
+            if not forgotten:
+                return
+            records = [MessageRecord.from_message(message) for message in forgotten]
+            self._append_archive(records)
+            self._archive.extend(records)
+            self._catch_up()
+
+    def _append_archive(self, records: list[MessageRecord]) -> None:
+        lines = "".join(
+            json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in records
+        )
+        try:
+            with self._archive_path.open("a", encoding=ENCODING) as archive:
+                archive.write(lines)
+        except OSError as error:
+            logger.error(f"Critical error appending to archive {self._archive_path}: {error}")
+            raise MemoryError("I/O failure while archiving history") from error
+
+    def _catch_up(self) -> None:
+        """Embed the archived messages that have no vector yet."""
+        while len(self._index) < len(self._archive):
+            batch = self._archive[len(self._index):len(self._index) + EMBED_BATCH]
+            try:
+                rows = [unit_vector(vector) for vector in self._embedder.embed(
+                    [record.content for record in batch]
+                )]
+            except Exception as error:
+                # The messages stay archived and are embedded with the next batch
+                logger.warning(f"Could not embed {len(batch)} archived messages: {error}")
+                return
+            if self._index.dimensions not in (None, len(rows[0])):
+                logger.warning("The embedder changed its vector size. Rebuilding the index.")
+                self._reset_index()
+                continue
+            self._write_vectors(array("f", b"".join(row.tobytes() for row in rows)),
+                                len(rows[0]), mode="ab")
+            self._index.add(rows)
+
+    def _reset_index(self) -> None:
+        self._index = VectorIndex()
+        self._vectors_path.unlink(missing_ok=True)
+
+    def _write_vectors(self, values: array, dimensions: int, mode: str) -> None:
+        name = self._embedder_name.encode(ENCODING)
+        try:
+            with self._vectors_path.open(mode) as vectors:
+                if vectors.tell() == 0:
+                    vectors.write(VECTORS_HEADER.pack(VECTORS_MAGIC, dimensions, len(name)) + name)
+                vectors.write(values.tobytes())
+        except OSError as error:
+            # Only a cache: the vectors are computed again on the next start
+            logger.error(f"Error saving vectors to {self._vectors_path}: {error}")
+
+    def get_history(self) -> list[Message]:
+        """Return the archived messages related to the last question, then the window."""
+        with self._lock:
+            window = self._memory.get_history()
+            question = next((m.content for m in reversed(window) if m.role == "user"), None)
+            if question is None or not len(self._index):
+                return window
+            return [*self._recall(question), *window]
+
+    def _recall(self, question: str) -> list[Message]:
+        try:
+            query = unit_vector(self._embedder.embed([question])[0])
+        except Exception as error:
+            logger.warning(f"Could not embed the question, answering without recall: {error}")
+            return []
+        if len(query) != self._index.dimensions:
+            # An embedder without a name changed its size: the stored vectors are useless
+            logger.warning("The embedder changed its vector size. Rebuilding the index.")
+            self._reset_index()
+            self._catch_up()
+            if len(query) != self._index.dimensions:
+                return []
+        hits = [
+            position for position, score in self._index.search(query, self._top_k)
+            if score >= self._min_score
+        ]
+        get_metrics().increment("retrieval_recalled_total", len(hits))
+        return [self._archive[position].to_message() for position in sorted(hits)]
+
+    def clear(self) -> None:
+        """Clear the window, the archive and the index."""
+        self._memory.clear()
+        with self._lock:
+            self._window = []
+            self._archive = []
+            self._index = VectorIndex()
+            try:
+                self._archive_path.unlink(missing_ok=True)
+                self._vectors_path.unlink(missing_ok=True)
+            except OSError as error:
+                logger.error(f"Error deleting archive files: {error}")
+
+    def close(self) -> None:
+        """Close the wrapped backend."""
+        close = getattr(self._memory, "close", None)
+        if close is not None:
+            close()
+
+
+def embedder_name(embedder: Embedder) -> str:
+    """The ``name`` of the embedder, or its class name when it has none."""
+    return getattr(embedder, "name", None) or type(embedder).__qualname__
+
+
+def unit_vector(vector: Sequence[float]) -> array:
+    """The vector scaled to length 1, as float32 (zero vectors are left as they are)."""
+    norm = math.sqrt(sum(value * value for value in vector))
+    return array("f", (value / norm for value in vector) if norm else vector)
+
+
+def _load_numpy() -> Any:
+    """NumPy if it is installed (it is optional, and slow to import), otherwise None."""
+    try:
+        import numpy  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    return numpy
@@ -0,0 +1,229 @@
+import logging
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Literal
+
+from smartbot.core.interfaces import (
+    MemoryBackend,
+    MemoryError,
+    Message,
+    Role,
+    SessionMemoryBackend,
+)
+
+from .binary_memory import BinaryMemory
+from .json_memory import (
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_FLUSH_EVERY,
+    DEFAULT_FLUSH_INTERVAL,
+    Durability,
+    JsonFileMemory,
+)
+from .jsonl_memory import JsonlMemory
+
+DEFAULT_SESSIONS_DIR = "sessions"
+DEFAULT_HOT_SESSIONS = 1024
+# Sessions share this many locks
+SESSION_LOCK_STRIPES = 64
+# Session IDs become file names, so only allow a safe subset of characters
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}")
+
+SessionStorage = Literal["json", "jsonl", "binary"]
+STORAGE_BACKENDS: dict[str, tuple[type[JsonFileMemory], str]] = {
+    "json": (JsonFileMemory, ".json"),
+    "jsonl": (JsonlMemory, ".jsonl"),
+    "binary": (BinaryMemory, ".bin"),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class SessionMemory(SessionMemoryBackend):
+    """
+    Session-keyed persistence with a bounded LRU of hot sessions.
+
+    Each session is stored in its own file inside `directory`. Only the
+    `max_hot_sessions` most recently used sessions are kept in RAM; cold
+    sessions are loaded lazily on first access and evicted (after being
+    closed) when the LRU is full, so memory stays flat no matter how
+    many sessions exist on disk.
+    """
+    def __init__(
+        self,
+        directory: str = DEFAULT_SESSIONS_DIR,
+        max_messages: int = DEFAULT_CONTEXT_WINDOW,
+        max_hot_sessions: int = DEFAULT_HOT_SESSIONS,
+        storage: SessionStorage = "jsonl",
+        *,
+        durability: Durability = "always",
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ):
+        """
+        Initialize the multi-session memory.
+
+        :param directory: Folder holding one history file per session.
+        :param max_messages: Maximum number of messages retained per session.
+        :param max_hot_sessions: Maximum number of sessions held in RAM.
+        :param storage: File format of each session ("json", "jsonl" or "binary").
+        :param durability: When writes reach the disk (see JsonFileMemory).
+        :param flush_interval: Seconds a batched write may wait in memory.
+        :param flush_every: Buffered messages that trigger a batched flush right away.
+        :raises ValueError: If a limit is less than 1 or the storage is unknown.
+        """
+        if max_messages < 1:
+            raise ValueError("max_messages must be at least 1.")
+        if max_hot_sessions < 1:
+            raise ValueError("max_hot_sessions must be at least 1.")
+        if storage not in STORAGE_BACKENDS:
+            raise ValueError(f"Unsupported session storage: {storage}")
+
+        self._directory = Path(directory)
+        self._max_messages = max_messages
+        self._max_hot_sessions = max_hot_sessions
+        self._backend_class, self._suffix = STORAGE_BACKENDS[storage]
+        self._write_options = {
+            "durability": durability,
+            "flush_interval": flush_interval,
+            "flush_every": flush_every,
+        }
+        self._hot: OrderedDict[str, MemoryBackend] = OrderedDict()
+        # Guards the LRU only; it is never held while a file is read or written
+        self._lock = threading.Lock()
+        # Backends are not thread-safe: the turns of a session run one at a time
+        # under its stripe lock, so other sessions are never blocked by its I/O
+        self._session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def _path_for(self, session_id: str) -> Path:
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return self._directory / f"{session_id}{self._suffix}"
+
+    def session(self, session_id: str) -> MemoryBackend:
+        """Return a view bound to ``session_id``, rejecting invalid IDs right away."""
+        self._path_for(session_id)
+        return super().session(session_id)
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        stripe = zlib.crc32(session_id.encode()) % SESSION_LOCK_STRIPES
+        return self._session_locks[stripe]
+
+    @contextmanager
+    def _use(self, session_id: str) -> Iterator[MemoryBackend]:
+        """Hold the lock of a session and yield its backend, loading it if it is cold.
+
+        The least recently used sessions are evicted once the lock is released.
+        """
+        path = self._path_for(session_id)
+        with self._session_lock(session_id):
+            with self._lock:
+                backend = self._hot.get(session_id)
+                if backend is not None:
+                    self._hot.move_to_end(session_id)
+            if backend is None:
+                backend = self._backend_class(
+                    file_path=str(path),
+                    max_messages=self._max_messages,
+                    **self._write_options,
+                )
+                with self._lock:
+                    self._hot[session_id] = backend
+            yield backend
+        self._evict()
+
+    def _evict(self) -> None:
+        """Close the least recently used sessions while too many are hot.
+
+        A session leaves the LRU only once it is closed, so a failed flush
+        keeps it hot with its buffered messages until the next eviction. A
+        session busy in another thread (or being evicted by it) is left for
+        a later call instead of making this one wait.
+        """
+        while True:
+            with self._lock:
+                if len(self._hot) <= self._max_hot_sessions:
+                    return
+                cold_id = next(iter(self._hot))
+            session_lock = self._session_lock(cold_id)
+            if not session_lock.acquire(blocking=False):
+                return
+            try:
+                with self._lock:
+                    # Used again or evicted by another thread in the meantime
+                    if next(iter(self._hot), None) != cold_id:
+                        continue
+                    cold_backend = self._hot[cold_id]
+                try:
+                    _close(cold_backend)
+                except MemoryError as error:
+                    logger.error(f"Could not evict session {cold_id}, keeping it: {error}")
+                    return
+                with self._lock:
+                    del self._hot[cold_id]
+            finally:
+                session_lock.release()
+            logger.debug(f"Evicted session {cold_id} from RAM.")
+
+    def add_message(self, session_id: str, role: Role, content: str) -> None:
+        """
+        Add a message to a session, loading the session if it is cold.
+
+        :param session_id: Conversation the message belongs to.
+        :param role: The role of the sender (user, assistant, system).
+        :param content: The content of the message.
+        """
+        with self._use(session_id) as backend:
+            backend.add_message(role, content)
+
+    def get_history(self, session_id: str) -> list[Message]:
+        """
+        Return a copy of the current history of a session.
+
+        :param session_id: Conversation to read.
+        :return: List of immutable Message objects.
+        """
+        with self._use(session_id) as backend:
+            return backend.get_history()
+
+    def clear(self, session_id: str) -> None:
+        """Clear a session in RAM and delete its file."""
+        with self._use(session_id) as backend:
+            backend.clear()
+            with self._lock:
+                self._hot.pop(session_id, None)
+
+    @property
+    def hot_sessions(self) -> int:
+        """Number of sessions currently held in RAM."""
+        return len(self._hot)
+
+    def close(self) -> None:
+        """Release every hot session, flushing backends that buffer writes.
+
+        :raises MemoryError: If a flush fails; that session stays hot.
+        """
+        with self._lock:
+            session_ids = list(self._hot)
+        for session_id in session_ids:
+            with self._session_lock(session_id):
+                with self._lock:
+                    backend = self._hot.get(session_id)
+                if backend is None:
+                    continue
+                _close(backend)
+                with self._lock:
+                    self._hot.pop(session_id, None)
+
+
+def _close(backend: MemoryBackend) -> None:
+    """Close backends that hold resources; plain backends need nothing."""
+    close = getattr(backend, "close", None)
+    if callable(close):
+        close()
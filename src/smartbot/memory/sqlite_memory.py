@@ -0,0 +1,351 @@
+import logging
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from smartbot.core.interfaces import (
+    MemoryBackend,
+    MemoryError,
+    Message,
+    Role,
+    SessionMemoryBackend,
+)
+
+from . import write_behind
+from .json_memory import (
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_FLUSH_EVERY,
+    DEFAULT_FLUSH_INTERVAL,
+    DURABILITY_MODES,
+    Durability,
+)
+from .records import MessageRecord
+
+DEFAULT_DATABASE_FILE = "conversation_history.db"
+DEFAULT_SESSION_ID = "default"
+# Idle connections kept open for reuse
+POOL_SIZE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session_timestamp
+    ON messages (session_id, timestamp);
+"""
+INSERT_MESSAGE = (
+    "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)"
+)
+# Newest first, so the window is a LIMIT served straight from the index
+SELECT_WINDOW = (
+    "SELECT role, content, timestamp FROM messages WHERE session_id = ? "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+DELETE_OUTSIDE_WINDOW = (
+    "DELETE FROM messages WHERE id IN ("
+    "SELECT id FROM messages WHERE session_id = ? "
+    "ORDER BY timestamp DESC, id DESC LIMIT -1 OFFSET ?)"
+)
+DELETE_SESSION = "DELETE FROM messages WHERE session_id = ?"
+
+# (session_id, role, content, timestamp), as inserted
+Row = tuple[str, str, str, str]
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteSessionMemory(SessionMemoryBackend):
+    """
+    SQLite persistence for any number of conversations.
+
+    Uses WAL mode so readers never block on the writer, an index on
+    (session_id, timestamp) and a `LIMIT` query for the window, so a read
+    costs O(max_messages) regardless of how much history the database holds.
+    Connections are borrowed from a small pool, so short-lived threads do not
+    leave connections behind; writes are serialized by a lock.
+
+    With a ``durability`` other than "always" the messages are buffered
+    (write-behind) and inserted in one transaction per flush, like the
+    file backends do; reads merge the buffered messages of the session.
+    """
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DATABASE_FILE,
+        max_messages: int = DEFAULT_CONTEXT_WINDOW,
+        durability: Durability = "always",
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ):
+        """
+        Initialize the SQLite memory backend.
+
+        :param db_path: Path to the SQLite database file.
+        :param max_messages: Maximum number of messages to retain per session.
+        :param durability: When writes reach the disk (see JsonFileMemory).
+        :param flush_interval: Seconds a batched write may wait in memory.
+        :param flush_every: Buffered messages that trigger a batched flush right away.
+        :raises ValueError: If max_messages or flush_every is less than 1, the
+            interval is negative or the durability is unknown.
+        :raises MemoryError: If the database can't be opened.
+        """
+        if max_messages < 1:
+            raise ValueError("max_messages must be at least 1.")
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unsupported durability: {durability}")
+        if flush_interval < 0 or flush_every < 1:
+            raise ValueError("flush_interval can't be negative and flush_every must be >= 1.")
+
+        self._db_path = Path(db_path)
+        self._max_messages = max_messages
+        self._durability = durability
+        self._flush_interval = flush_interval
+        self._flush_every = flush_every
+        # Idle connections, reused by any thread; the rest are closed when returned
+        self._idle: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._closed = False
+        # Rows added since the last flush, by session, in write-behind modes. A
+        # flush inserts and forgets them under _lock, so readers see them once
+        self._pending: dict[str, list[Row]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        try:
+            with self._connection() as connection, connection:
+                connection.executescript(SCHEMA)
+        except sqlite3.Error as error:
+            logger.error(f"Cannot open memory database {self._db_path}: {error}")
+            raise MemoryError("Failure opening the history database") from error
+
+        if durability != "always":
+            write_behind.track(self)
+
+    def _open(self) -> sqlite3.Connection:
+        # Pooled connections move between threads, one thread at a time
+        connection = sqlite3.connect(self._db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes when running in WAL mode
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow an idle connection, opening a new one if there is none."""
+        with self._pool_lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._open()
+        try:
+            yield connection
+        finally:
+            with self._pool_lock:
+                keep = not self._closed and len(self._idle) < POOL_SIZE
+                if keep:
+                    self._idle.append(connection)
+            if not keep:
+                connection.close()
+
+    def _insert(self, rows: list[Row]) -> None:
+        """Insert rows in one transaction and rotate the sessions they belong to."""
+        sessions = dict.fromkeys(row[0] for row in rows)
+        with self._write_lock, self._connection() as connection, connection:
+            connection.executemany(INSERT_MESSAGE, rows)
+            connection.executemany(
+                DELETE_OUTSIDE_WINDOW, [(session, self._max_messages) for session in sessions]
+            )
+
+    def add_messages(self, session_id: str, messages: Iterable[tuple[Role, str]]) -> None:
+        """
+        Insert several messages in a single transaction and apply rotation once.
+
+        Invalid messages are logged and skipped, like in JsonFileMemory.
+
+        :param session_id: Conversation the messages belong to.
+        :param messages: (role, content) pairs, oldest first.
+        """
+        rows = []
+        for role, content in messages:
+            try:
+                new_msg = MessageRecord.create(role, content)
+            except ValueError as error:
+                logger.error(f"Attempted to save invalid message: {error}")
+                continue
+            rows.append((
+                session_id,
+                new_msg.role,
+                new_msg.content,
+                # Fixed-width timestamps sort chronologically as plain strings
+                new_msg.timestamp.isoformat(timespec="microseconds"),
+            ))
+
+        if not rows:
+            return
+
+        if self._durability == "always":
+            try:
+                self._insert(rows)
+            except sqlite3.Error as error:
+                logger.error(f"Critical error saving memory to {self._db_path}: {error}")
+                raise MemoryError("I/O failure while saving history") from error
+            return
+
+        with self._lock:
+            pending = self._pending.setdefault(session_id, [])
+            pending.extend(rows)
+            # Older rows would be rotated out by the flush anyway
+            del pending[:-self._max_messages]
+            unsaved = sum(len(session_rows) for session_rows in self._pending.values())
+
+        if self._durability == "batched":
+            full = unsaved >= self._flush_every
+            write_behind.schedule(self, 0 if full else self._flush_interval)
+
+    def add_message(self, session_id: str, role: Role, content: str) -> None:
+        """
+        Add a new message to a session and apply rotation.
+
+        :param session_id: Conversation the message belongs to.
+        :param role: The role of the sender (user, assistant, system).
+        :param content: The content of the message.
+        """
+        self.add_messages(session_id, [(role, content)])
+
+    def flush(self) -> None:
+        """Insert the buffered messages of every session in one transaction.
+
+        :raises MemoryError: If the write fails; the messages stay buffered.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [row for session_rows in self._pending.values() for row in session_rows]
+            try:
+                self._insert(rows)
+            except sqlite3.Error as error:
+                logger.error(f"Critical error saving memory to {self._db_path}: {error}")
+                raise MemoryError("I/O failure while saving history") from error
+            self._pending.clear()
+
+    def _read_window(self, session_id: str) -> list[tuple[str, str, str]]:
+        """Rows of the stored window, oldest first."""
+        with self._connection() as connection:
+            rows = connection.execute(SELECT_WINDOW, (session_id, self._max_messages)).fetchall()
+        return rows[::-1]
+
+    def get_history(self, session_id: str) -> list[Message]:
+        """
+        Return the window of a session, oldest first.
+
+        :param session_id: Conversation to read.
+        :return: List of immutable Message objects.
+        """
+        try:
+            with self._lock:
+                pending = [row[1:] for row in self._pending.get(session_id, ())]
+                if pending:
+                    # Under the lock, so a flush cannot store them in between
+                    rows = (self._read_window(session_id) + pending)[-self._max_messages:]
+            if not pending:
+                rows = self._read_window(session_id)
+        except sqlite3.Error as error:
+            logger.error(f"Critical error reading memory from {self._db_path}: {error}")
+            raise MemoryError("I/O failure while reading history") from error
+
+        # Rows were validated on insert, so they skip the Message validators
+        return [
+            MessageRecord(role, content, datetime.fromisoformat(timestamp)).to_message()
+            for role, content, timestamp in rows
+        ]
+
+    def clear(self, session_id: str) -> None:
+        """Delete every message of a session."""
+        try:
+            with self._lock:
+                self._pending.pop(session_id, None)
+                with self._write_lock, self._connection() as connection, connection:
+                    connection.execute(DELETE_SESSION, (session_id,))
+            logger.info(f"Session {session_id} cleared from {self._db_path}.")
+        except sqlite3.Error as error:
+            logger.error(f"Error clearing session {session_id}: {error}")
+
+    def close(self) -> None:
+        """Flush the buffered messages and close the idle connections.
+
+        Connections borrowed by other threads are closed when they are
+        returned, so a call in progress is never cut off.
+        """
+        self.flush()
+        write_behind.untrack(self)
+        with self._pool_lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class SqliteMemory(MemoryBackend):
+    """
+    Single-conversation SQLite backend with the same interface as JsonFileMemory.
+
+    Several SqliteMemory objects (one per session_id) can share a database file.
+    """
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DATABASE_FILE,
+        max_messages: int = DEFAULT_CONTEXT_WINDOW,
+        session_id: str = DEFAULT_SESSION_ID,
+        *,
+        durability: Durability = "always",
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ):
+        """
+        Initialize the SQLite memory backend for one conversation.
+
+        :param db_path: Path to the SQLite database file.
+        :param max_messages: Maximum number of messages to retain (sliding window).
+        :param session_id: Conversation stored by this backend.
+        :param durability: When writes reach the disk (see JsonFileMemory).
+        :param flush_interval: Seconds a batched write may wait in memory.
+        :param flush_every: Buffered messages that trigger a batched flush right away.
+        :raises ValueError: If max_messages is less than 1 or a write option is invalid.
+        """
+        self._store = SqliteSessionMemory(
+            db_path=db_path,
+            max_messages=max_messages,
+            durability=durability,
+            flush_interval=flush_interval,
+            flush_every=flush_every,
+        )
+        self._session_id = session_id
+
+    def add_message(self, role: Role, content: str) -> None:
+        """Add a new message, apply rotation, and persist it."""
+        self._store.add_message(self._session_id, role, content)
+
+    def add_messages(self, messages: Iterable[tuple[Role, str]]) -> None:
+        """Insert several messages in a single transaction."""
+        self._store.add_messages(self._session_id, messages)
+
+    def get_history(self) -> list[Message]:
+        """Return the current window of the conversation."""
+        return self._store.get_history(self._session_id)
+
+    def clear(self) -> None:
+        """Delete every message of the conversation."""
+        self._store.clear(self._session_id)
+
+    def flush(self) -> None:
+        """Insert the buffered messages now."""
+        self._store.flush()
+
+    def close(self) -> None:
+        """Flush the buffered messages and close the database connections."""
+        self._store.close()
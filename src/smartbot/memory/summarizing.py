@@ -0,0 +1,215 @@
+"""Fold the messages that fall out of a memory window into a rolling summary."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from smartbot.core.interfaces import MemoryBackend, Message, Role
+from smartbot.utils.metrics import get_metrics
+
+from .records import MessageRecord
+
+DEFAULT_SUMMARIZE_EVERY = 6
+ENCODING = "utf-8"
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+SUMMARY_INSTRUCTIONS = (
+    "Update the summary of a conversation with the new messages below. Keep names, "
+    "facts, decisions and open questions; drop greetings and small talk. Answer with "
+    "the summary only, in at most {max_words} words."
+)
+
+logger = logging.getLogger(__name__)
+
+# (previous summary or None, messages to fold in, oldest first) -> new summary
+Summarizer = Callable[[str | None, list[Message]], str]
+
+
+class ProviderSummarizer:
+    """Summarizer that asks a language model provider to update the summary."""
+
+    def __init__(self, provider: Any, max_words: int = 150) -> None:
+        """
+        :param provider: provider used to write the summaries
+        :param max_words: length limit given to the model
+        """
+        self._provider = provider
+        self._max_words = max_words
+
+    def __call__(self, summary: str | None, messages: list[Message]) -> str:
+        transcript = "\n".join(f"{message.role}: {message.content}" for message in messages)
+        prompt = "\n\n".join([
+            SUMMARY_INSTRUCTIONS.format(max_words=self._max_words),
+            f"Current summary:\n{summary or '(none)'}",
+            f"New messages:\n{transcript}",
+        ])
+        reply = self._provider.generate_response(Message(role="user", content=prompt), [])
+        return reply.content
+
+
+class SummarizingMemory(MemoryBackend):
+    """Keep what a sliding-window memory forgets as a ``system`` summary.
+
+    Messages pushed out of the wrapped backend's window are kept aside and,
+    every ``summarize_every`` of them, folded into the summary by a
+    background thread, so no turn waits for the model to summarize. Until
+    then they are still part of the history. ``get_history`` returns the
+    summary as a leading ``system`` message, then the pending messages,
+    then the window.
+
+    The summary and the pending messages are saved next to the window in
+    ``summary_path``, also from the background thread.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryBackend,
+        summarizer: Summarizer,
+        summary_path: str,
+        summarize_every: int = DEFAULT_SUMMARIZE_EVERY,
+    ) -> None:
+        """
+        :param memory: sliding-window backend holding the recent messages
+        :param summarizer: function folding messages into the summary
+        :param summary_path: JSON file where the summary is persisted
+        :param summarize_every: forgotten messages gathered before each summary
+        :raises ValueError: If summarize_every is less than 1.
+        """
+        if summarize_every < 1:
+            raise ValueError("summarize_every must be at least 1.")
+
+        self._memory = memory
+        self._summarizer = summarizer
+        self._summary_path = Path(summary_path)
+        self._summarize_every = summarize_every
+        self._summary: str | None = None
+        self._summary_message: Message | None = None
+        self._pending: list[Message] = []
+        self._folding = False
+        self._lock = threading.Lock()
+        # A single worker keeps the saves and summaries in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smartbot-summary")
+
+        self._load_summary()
+        self._window = memory.get_history()
+
+    @property
+    def summary(self) -> str | None:
+        return self._summary
+
+    def _load_summary(self) -> None:
+        if not self._summary_path.exists():
+            return
+        try:
+            data = json.loads(self._summary_path.read_text(encoding=ENCODING))
+            summary = data.get("summary")
+            if summary is not None and not isinstance(summary, str):
+                raise ValueError("'summary' must be a string.")
+            self._pending = [
+                MessageRecord.from_dict(raw).to_message() for raw in data.get("pending", [])
+            ]
+            self._set_summary(summary)
+        except (OSError, ValueError, AttributeError) as error:
+            logger.warning(f"Corrupt summary at {self._summary_path}. Ignoring it: {error}")
+            self._pending = []
+
+    def _set_summary(self, summary: str | None) -> None:
+        self._summary = summary
+        self._summary_message = (
+            Message(role="system", content=f"{SUMMARY_PREFIX}{summary}") if summary else None
+        )
+
+    def add_message(self, role: Role, content: str) -> None:
+        """Store the message and set aside whatever the window pushes out."""
+        self._memory.add_message(role, content)
+        window = self._memory.get_history()
+        forgotten = forgotten_messages(self._window, window)
+        self._window = window
+        if not forgotten:
+            return
+
+        with self._lock:
+            self._pending.extend(forgotten)
+            fold = len(self._pending) >= self._summarize_every and not self._folding
+            self._folding = self._folding or fold
+        self._executor.submit(self._fold if fold else self._save_summary)
+
+    def _fold(self) -> None:
+        with self._lock:
+            summary, batch = self._summary, list(self._pending)
+        try:
+            new_summary = self._summarizer(summary, batch)
+        except Exception as error:
+            # The messages stay pending and are retried with the next batch
+            logger.warning(f"Could not summarize the conversation: {error}")
+            get_metrics().increment("summaries_total", result="error")
+            with self._lock:
+                self._folding = False
+            self._save_summary()
+            return
+
+        with self._lock:
+            self._set_summary(new_summary.strip() or summary)
+            del self._pending[:len(batch)]
+            self._folding = False
+        get_metrics().increment("summaries_total", result="ok")
+        self._save_summary()
+
+    def _save_summary(self) -> None:
+        with self._lock:
+            data = {
+                "summary": self._summary,
+                "pending": [MessageRecord.from_message(m).to_dict() for m in self._pending],
+            }
+        try:
+            temp_path = self._summary_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(data, indent=2, ensure_ascii=False),
+                                 encoding=ENCODING)
+            temp_path.replace(self._summary_path)
+        except OSError as error:
+            logger.error(f"Error saving summary to {self._summary_path}: {error}")
+
+    def get_history(self) -> list[Message]:
+        """Return the summary, the messages not summarized yet and the window."""
+        with self._lock:
+            head = [self._summary_message] if self._summary_message is not None else []
+            return [*head, *self._pending, *self._memory.get_history()]
+
+    def clear(self) -> None:
+        """Clear the window, the summary and its file."""
+        self.flush()
+        self._memory.clear()
+        self._window = []
+        with self._lock:
+            self._pending = []
+            self._set_summary(None)
+        try:
+            self._summary_path.unlink(missing_ok=True)
+        except OSError as error:
+            logger.error(f"Error deleting summary file: {error}")
+
+    def flush(self) -> None:
+        """Wait until the pending background work is done."""
+        self._executor.submit(lambda: None).result()
+
+    def close(self) -> None:
+        """Finish the background work and close the wrapped backend."""
+        self._executor.shutdown(wait=True)
+        close = getattr(self._memory, "close", None)
+        if close is not None:
+            close()
+
+
+def forgotten_messages(before: list[Message], after: list[Message]) -> list[Message]:
+    """Messages of ``before`` that slid out of the window in ``after``."""
+    if not after:
+        return before
+    try:
+        return before[:before.index(after[0])]
+    except ValueError:
+        return before
@@ -0,0 +1,108 @@
+"""Background flushing of memory backends that buffer their writes.
+
+A single daemon thread serves every backend of the process, so thousands
+of hot sessions do not mean thousands of threads. Backends only need a
+``flush()`` method; they are registered with :func:`track` and ask for a
+flush with :func:`schedule`. Every tracked backend is flushed once more
+when the interpreter exits.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+from typing import Protocol
+
+from smartbot.core.interfaces import MemoryError
+
+# Seconds before retrying a flush that failed
+RETRY_DELAY = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class Flushable(Protocol):
+    def flush(self) -> None: ...
+
+
+class _Flusher:
+    """Flush each scheduled backend when its deadline arrives."""
+
+    def __init__(self) -> None:
+        self._due: dict[Flushable, float] = {}
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, backend: Flushable, delay: float) -> None:
+        deadline = time.monotonic() + delay
+        with self._condition:
+            current = self._due.get(backend)
+            # An earlier deadline wins, so a burst of writes is not postponed forever
+            if current is not None and current <= deadline:
+                return
+            self._due[backend] = deadline
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="smartbot-write-behind", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, backend: Flushable) -> None:
+        with self._condition:
+            self._due.pop(backend, None)
+
+    def _next(self) -> Flushable:
+        """Wait for the earliest deadline and return its backend."""
+        with self._condition:
+            while True:
+                if not self._due:
+                    self._condition.wait()
+                    continue
+                backend, deadline = min(self._due.items(), key=lambda item: item[1])
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    del self._due[backend]
+                    return backend
+                self._condition.wait(remaining)
+
+    def _run(self) -> None:
+        while True:
+            backend = self._next()
+            try:
+                backend.flush()
+            except Exception as error:
+                # One broken backend must not stop the flushes of every other one
+                logger.error(f"Background flush failed, retrying in {RETRY_DELAY}s: {error}")
+                self.schedule(backend, RETRY_DELAY)
+
+
+_flusher = _Flusher()
+_tracked: weakref.WeakSet[Flushable] = weakref.WeakSet()
+
+
+def track(backend: Flushable) -> None:
+    """Flush ``backend`` at interpreter exit if it still holds buffered writes."""
+    _tracked.add(backend)
+
+
+def untrack(backend: Flushable) -> None:
+    _flusher.cancel(backend)
+    _tracked.discard(backend)
+
+
+def schedule(backend: Flushable, delay: float) -> None:
+    """Flush ``backend`` in the background within ``delay`` seconds."""
+    _flusher.schedule(backend, delay)
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    for backend in list(_tracked):
+        try:
+            backend.flush()
+        except MemoryError as error:
+            logger.error(f"Could not flush memory at exit: {error}")
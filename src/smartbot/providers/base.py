@@ -1,8 +1,21 @@
+from collections.abc import Iterator
 from typing import Protocol
 
 from smartbot.core.interfaces import Message
 
 
+def chat_conversation(prompt: Message, history: list[Message]) -> list[Message]:
+    """The messages of the turn: the history, ending with the prompt.
+
+    The Agent stores the prompt before reading the history, so it is only
+    appended when the history does not end with it already. Sending it twice
+    would also change the prefix seen by the model from one turn to the next.
+    """
+    if history and history[-1].role == prompt.role and history[-1].content == prompt.content:
+        return history
+    return [*history, prompt]
+
+
 class BaseProvider(Protocol):
     "Abstract class for define a common interfaz for any provider"
 
@@ -28,6 +41,19 @@ class BaseProvider(Protocol):
         """
         ...
 
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        """
+        Generate a response as a stream of text chunks.
+
+        :param prompt: The current user message
+        :type prompt: Message
+        :param history: List of previous messages
+        :type history: list[Message]
+        :return: The chunks of the response, in order
+        :rtype: Iterator[str]
+        """
+        ...
+
     def validate_config(self)-> bool:
         """Validates if the configuration exists.
 
@@ -0,0 +1,236 @@
+"""Response cache decorator for any provider."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from smartbot.core.codec import dumps, get_codec
+from smartbot.core.interfaces import LLMProvider, Message
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 3600.0
+ENCODING = "utf-8"
+
+
+def request_key(config: Any, prompt: Message, history: list[Message]) -> str:
+    """Stable hash of everything that determines a reply.
+
+    Covers the model, the sampling parameters and the ``to_dict()`` form of
+    the messages, so timestamps never change the key. The messages are
+    hashed from their cached encoding, one JSON object per line.
+    """
+    parameters = {
+        "provider": config.provider,
+        "model": getattr(config, "model_name", None),
+        "temperature": config.temperature,
+        "top_p": config.top_p,
+    }
+    digest = hashlib.sha256(dumps(parameters))
+    codec = get_codec()
+    for message in [*history, prompt]:
+        digest.update(b"\n")
+        digest.update(codec.fragment(message))
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters of a CachingProvider."""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CachingProvider(LLMProvider):
+    """Serve repeated requests from an LRU + TTL cache, with an optional disk tier.
+
+    Caching a sampled reply would freeze its randomness, so the cache is only
+    used when the wrapped provider runs with ``temperature == 0`` or when the
+    caller opts in with ``always=True``.
+    """
+
+    def __init__(
+        self,
+        provider: Any,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        disk_dir: str | None = None,
+        *,
+        always: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        :param provider: provider to wrap (must expose ``config``)
+        :param max_entries: replies kept in RAM
+        :param ttl_seconds: lifetime of a cached reply
+        :param disk_dir: folder of the optional on-disk tier
+        :param always: cache even when the temperature is not 0
+        :param clock: time source, in seconds
+        :raises ValueError: If max_entries or ttl_seconds are not positive.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive.")
+
+        self._provider = provider
+        self.config = provider.config
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self._always = always
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def active(self) -> bool:
+        """Whether replies are cached with the current settings."""
+        return self._always or self.config.temperature == 0
+
+    def _disk_path(self, key: str) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / f"{key}.json"
+
+    def _lookup(self, key: str) -> str | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, created = entry
+                if now - created < self._ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    get_metrics().increment("cache_requests_total", result="hit")
+                    return content
+                del self._entries[key]
+
+        content, created = self._read_disk(key)
+        if content is not None and now - created < self._ttl:
+            with self._lock:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+            get_metrics().increment("cache_requests_total", result="disk_hit")
+            self._remember(key, content, created)
+            return content
+
+        with self._lock:
+            self.stats.misses += 1
+        get_metrics().increment("cache_requests_total", result="miss")
+        return None
+
+    def _read_disk(self, key: str) -> tuple[str | None, float]:
+        if self._disk_dir is None:
+            return None, 0.0
+        try:
+            entry = json.loads(self._disk_path(key).read_text(encoding=ENCODING))
+            return entry["content"], entry["created"]
+        except FileNotFoundError:
+            return None, 0.0
+        except (OSError, ValueError, KeyError) as error:
+            logger.warning("Ignoring unreadable cache entry %s: %s", key, error)
+            return None, 0.0
+
+    def _remember(self, key: str, content: str, created: float) -> None:
+        with self._lock:
+            self._entries[key] = (content, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _store(self, key: str, content: str) -> None:
+        created = self._clock()
+        self._remember(key, content, created)
+        if self._disk_dir is None:
+            return
+        try:
+            temp_path = self._disk_path(key).with_suffix(".tmp")
+            temp_path.write_text(
+                json.dumps({"content": content, "created": created}), encoding=ENCODING
+            )
+            temp_path.replace(self._disk_path(key))
+        except OSError as error:
+            # The disk tier is best effort, the reply is still served from RAM
+            logger.warning("Could not write cache entry %s: %s", key, error)
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """Return a cached reply or ask the wrapped provider and remember it."""
+        if not self.active:
+            with self._lock:
+                self.stats.bypassed += 1
+            get_metrics().increment("cache_requests_total", result="bypass")
+            return self._provider.generate_response(prompt, history)
+
+        key = request_key(self.config, prompt, history)
+        cached = self._lookup(key)
+        if cached is not None:
+            return Message(role="assistant", content=cached, timestamp=datetime.now())
+
+        reply = self._provider.generate_response(prompt, history)
+        self._store(key, reply.content)
+        return reply
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        """Replay a cached reply as one chunk, or stream and remember a new one."""
+        if not self.active:
+            with self._lock:
+                self.stats.bypassed += 1
+            get_metrics().increment("cache_requests_total", result="bypass")
+            yield from self._provider.stream_response(prompt, history)
+            return
+
+        key = request_key(self.config, prompt, history)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks: list[str] = []
+        for chunk in self._provider.stream_response(prompt, history):
+            chunks.append(chunk)
+            yield chunk
+        # Only complete, non-empty streams are cached
+        if chunks:
+            self._store(key, "".join(chunks))
+
+    def validate_config(self) -> bool:
+        return self._provider.validate_config()
+
+    def clear(self) -> None:
+        """Drop every cached reply, in RAM and on disk."""
+        with self._lock:
+            self._entries.clear()
+        if self._disk_dir is not None:
+            for entry in self._disk_dir.glob("*.json"):
+                entry.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Close the wrapped provider."""
+        close = getattr(self._provider, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,151 @@
+"""Single-flight layer: identical concurrent requests share one upstream call."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from smartbot.core.interfaces import AsyncLLMProvider, LLMProvider, Message, ProviderError
+from smartbot.utils.metrics import get_metrics
+
+from .cache import request_key
+
+
+@dataclass
+class CoalescingStats:
+    """Counters of a coalescing provider."""
+    upstream: int = 0
+    coalesced: int = 0
+
+
+class _Flight:
+    """A request in progress and, once finished, its outcome."""
+
+    __slots__ = ("done", "error", "reply")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.reply: Message | None = None
+        self.error: BaseException | None = None
+
+
+class CoalescingProvider(LLMProvider):
+    """Let concurrent identical requests share a single upstream call.
+
+    Requests are identical when :func:`request_key` matches: same model,
+    sampling parameters and messages. The first one goes upstream and the
+    ones arriving while it runs wait for its reply. Nothing is remembered
+    once the call returns; that is the job of the response cache.
+
+    Streams are passed through untouched: their callers want the first
+    chunk as soon as possible, not a reply assembled for someone else.
+    """
+
+    def __init__(self, provider: Any) -> None:
+        """
+        :param provider: provider to wrap (must expose ``config``)
+        """
+        self._provider = provider
+        self.config = provider.config
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = CoalescingStats()
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """Join an identical request in flight, or send this one upstream."""
+        key = request_key(self.config, prompt, history)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.stats.upstream += 1
+            else:
+                self.stats.coalesced += 1
+
+        get_metrics().increment("coalescing_requests_total",
+                                result="upstream" if leader else "coalesced")
+        if leader:
+            return self._lead(key, flight, prompt, history)
+
+        flight.done.wait()
+        if flight.error is not None:
+            # Each waiter gets its own exception; sharing one would mix tracebacks
+            raise ProviderError(f"Coalesced request failed: {flight.error}") from flight.error
+        assert flight.reply is not None
+        return flight.reply
+
+    def _lead(self, key: str, flight: _Flight, prompt: Message,
+              history: list[Message]) -> Message:
+        try:
+            flight.reply = self._provider.generate_response(prompt, history)
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.reply
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        yield from self._provider.stream_response(prompt, history)
+
+    def validate_config(self) -> bool:
+        return self._provider.validate_config()
+
+    def close(self) -> None:
+        """Close the wrapped provider."""
+        close = getattr(self._provider, "close", None)
+        if close is not None:
+            close()
+
+
+class AsyncCoalescingProvider(AsyncLLMProvider):
+    """Asyncio counterpart of :class:`CoalescingProvider`.
+
+    The upstream call runs as its own task, so a waiter being cancelled
+    never cancels the reply the other waiters are expecting.
+    """
+
+    def __init__(self, provider: Any) -> None:
+        """
+        :param provider: async provider to wrap (must expose ``config``)
+        """
+        self._provider = provider
+        self.config = provider.config
+        self._flights: dict[str, asyncio.Task[Message]] = {}
+        self.stats = CoalescingStats()
+
+    async def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """Join an identical request in flight, or send this one upstream."""
+        key = request_key(self.config, prompt, history)
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._provider.generate_response(prompt, history))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+            self.stats.upstream += 1
+            get_metrics().increment("coalescing_requests_total", result="upstream")
+        else:
+            self.stats.coalesced += 1
+            get_metrics().increment("coalescing_requests_total", result="coalesced")
+        return await asyncio.shield(task)
+
+    async def stream_response(
+        self, prompt: Message, history: list[Message]
+    ) -> AsyncIterator[str]:
+        async for chunk in self._provider.stream_response(prompt, history):
+            yield chunk
+
+    async def validate_config(self) -> bool:
+        return await self._provider.validate_config()
+
+    async def aclose(self) -> None:
+        """Close the wrapped provider."""
+        aclose = getattr(self._provider, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,3 +1,5 @@
+import re
+from collections.abc import Iterator
 from datetime import datetime
 
 from smartbot.core.interfaces import Message
@@ -5,15 +7,18 @@ from smartbot.core.interfaces import Message
 from .base import BaseProvider
 from .models import EchoConfig, OllamaConfig, OpenAIConfig
 
+# Each chunk is a word followed by the whitespace that separates it from the next one
+CHUNK_PATTERN = re.compile(r"\s*\S+\s*")
+
 
 class EchoProvider(BaseProvider):
 
-    def generate_response(self, prompt: str, history: list[dict[str, str]]) -> Message:
+    def generate_response(self, prompt: Message | str, history: list[dict[str, str]]) -> Message:
         """Processes the user input and conversation history to generate a contextually
         aware response.
 
         :param prompt: The current text input or instruction from the user.
-        :type prompt: str
+        :type prompt: Message | str
         :param history: A list of previous message exchanges, where each dictionary typically
         contains 'role' and 'content' keys.
         :type history: list[dict[str, str]]
@@ -21,7 +26,21 @@ class EchoProvider(BaseProvider):
         :return: The generated text response.
         :rtype: str
         """
-        return Message(role="assistant",content=prompt, timestamp=datetime.now())
+        return Message(role="assistant",content=_prompt_text(prompt), timestamp=datetime.now())
+
+    def stream_response(
+        self, prompt: Message | str, history: list[dict[str, str]]
+    ) -> Iterator[str]:
+        """Echoes the user input back word by word.
+
+        :param prompt: The current text input or instruction from the user.
+        :type prompt: Message | str
+        :param history: A list of previous message exchanges.
+        :type history: list[dict[str, str]]
+        :return: The words of the prompt, in order.
+        :rtype: Iterator[str]
+        """
+        yield from CHUNK_PATTERN.findall(_prompt_text(prompt))
 
     def validate_config(self) -> bool:
         return True
@@ -29,3 +48,7 @@ class EchoProvider(BaseProvider):
     def __init__(self, config: OpenAIConfig | OllamaConfig | EchoConfig) -> None:
         self.config = config
 
+
+def _prompt_text(prompt: Message | str) -> str:
+    """The Agent sends a Message while direct callers may send plain text."""
+    return prompt.content if isinstance(prompt, Message) else prompt
@@ -0,0 +1,315 @@
+"""Hedged requests: a late request is sent a second time and the first reply wins."""
+
+from __future__ import annotations
+
+import bisect
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from smartbot.core.interfaces import LLMProvider, Message, ProviderError
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import get_metrics
+
+from .models import HedgingConfig
+
+logger = get_logger(__name__)
+
+# Latencies kept to compute the hedge delay
+LATENCY_SAMPLES = 1000
+# Hedges that can be saved up while no request is late
+MAX_HEDGE_CREDIT = 10.0
+# Threads shared by the attempts of every request; they are reused, not started per request
+MAX_ATTEMPT_THREADS = 64
+# End of an attempt's chunks
+_END = object()
+
+
+class LatencyTracker:
+    """Recent latencies of single attempts, for percentiles and estimates.
+
+    The samples are also kept sorted, so a percentile is a lookup, not a sort.
+    """
+
+    def __init__(self, samples: int = LATENCY_SAMPLES) -> None:
+        self._samples: deque[float] = deque(maxlen=samples)
+        self._sorted: list[float] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                del self._sorted[bisect.bisect_left(self._sorted, self._samples[0])]
+            self._samples.append(seconds)
+            bisect.insort(self._sorted, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Latency below which ``fraction`` of the samples fall (0 without samples)."""
+        with self._lock:
+            if not self._sorted:
+                return 0.0
+            return self._sorted[min(len(self._sorted) - 1, int(fraction * len(self._sorted)))]
+
+    def expected_remaining(self, elapsed: float) -> float:
+        """Average time left to a request still running after ``elapsed`` seconds."""
+        with self._lock:
+            slower = self._sorted[bisect.bisect_right(self._sorted, elapsed):]
+        if not slower:
+            return 0.0
+        return sum(slower) / len(slower) - elapsed
+
+
+class _Attempt:
+    """One copy of the request, consumed as a stream by a thread of the shared pool.
+
+    The thread stops reading as soon as the attempt is cancelled and closes
+    the stream, which closes the connection and tells the backend to stop
+    generating. A backend silent until its first chunk is only noticed once
+    that chunk arrives.
+    """
+
+    def __init__(self, index: int, events: queue.Queue[tuple[_Attempt, str]]) -> None:
+        self.index = index
+        self.started = time.monotonic()
+        self.chunks: queue.Queue[Any] = queue.Queue()
+        self.parts: list[str] = []
+        self.error: BaseException | None = None
+        self.cancelled = threading.Event()
+        self._events = events
+
+    def run(self, provider: Any, prompt: Message, history: list[Message]) -> None:
+        stream = provider.stream_response(prompt, history)
+        try:
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    return
+                if not self.parts:
+                    self._events.put((self, "first"))
+                self.parts.append(chunk)
+                self.chunks.put(chunk)
+        except Exception as error:
+            self.error = error
+            self.chunks.put(error)
+            self._events.put((self, "error"))
+            return
+        finally:
+            stream.close()
+        self.chunks.put(_END)
+        self._events.put((self, "done"))
+
+
+class _Race:
+    """The attempts of a request and the events they report, in arrival order."""
+
+    def __init__(self, provider: Any, executor: ThreadPoolExecutor, prompt: Message,
+                 history: list[Message]) -> None:
+        self._provider = provider
+        self._executor = executor
+        self._prompt = prompt
+        self._history = history
+        self.started = time.monotonic()
+        self.events: queue.Queue[tuple[_Attempt, str]] = queue.Queue()
+        self.attempts: list[_Attempt] = []
+        self.failed: list[_Attempt] = []
+
+    def launch(self) -> None:
+        attempt = _Attempt(len(self.attempts), self.events)
+        self.attempts.append(attempt)
+        self._executor.submit(attempt.run, self._provider, self._prompt, self._history)
+
+    def next_event(self, timeout: float | None) -> tuple[_Attempt, str] | None:
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def cancel(self) -> None:
+        for attempt in self.attempts:
+            attempt.cancelled.set()
+
+
+@dataclass
+class HedgingStats:
+    """Counters of a hedging provider."""
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    # Estimated from the latency of the requests as slow as the ones overtaken
+    saved_seconds: float = 0.0
+
+
+class HedgingProvider(LLMProvider):
+    """Send a late request again and answer with whichever copy finishes first.
+
+    A request still running after the ``percentile`` latency of the recent
+    ones gets a duplicate; the first to reply wins and the other one is
+    cancelled. Wrapping a router, the duplicate goes to the least busy
+    backend, usually not the one that is late. Hedges are paid from a
+    budget of ``max_extra_load`` per request, so a backend slow for
+    everyone does not receive twice the traffic.
+
+    Until a request can be hedged (``min_samples`` measured) it is sent
+    straight to the provider on the calling thread. Afterwards the copies
+    are read as streams on a shared pool of threads, so the loser can be
+    closed mid-way. Streams hedge on the time to the first chunk and commit
+    to the copy that sends it. Providers without native streaming are never
+    hedged: the loser could not be cancelled and would run to completion.
+    """
+
+    def __init__(self, provider: Any, hedging: HedgingConfig) -> None:
+        """
+        :param provider: provider to wrap (must expose ``config``)
+        :param hedging: when and how often to hedge
+        """
+        self._provider = provider
+        self.config = provider.config
+        self._hedging = hedging
+        self._reply_latency = LatencyTracker()
+        self._first_chunk_latency = LatencyTracker()
+        self._credit = 1.0
+        self._lock = threading.Lock()
+        self.stats = HedgingStats()
+        self._cancellable = _streams_natively(provider)
+        if not self._cancellable:
+            logger.warning("%s has no native streaming: its requests are not hedged",
+                           type(provider).__name__)
+        self._executor = ThreadPoolExecutor(max_workers=MAX_ATTEMPT_THREADS,
+                                            thread_name_prefix="smartbot-hedge")
+
+    def _admit(self, tracker: LatencyTracker) -> float | None:
+        """Count a request and return its hedge delay, or None if it cannot be hedged."""
+        with self._lock:
+            self.stats.requests += 1
+            self._credit = min(MAX_HEDGE_CREDIT, self._credit + self._hedging.max_extra_load)
+        get_metrics().increment("hedging_requests_total")
+        if not self._cancellable or len(tracker) < self._hedging.min_samples:
+            return None
+        return tracker.percentile(self._hedging.percentile)
+
+    def _race(self, prompt: Message, history: list[Message]) -> _Race:
+        race = _Race(self._provider, self._executor, prompt, history)
+        race.launch()
+        return race
+
+    def _hedge(self, race: _Race) -> None:
+        with self._lock:
+            allowed = self._credit >= 1
+            if allowed:
+                self._credit -= 1
+                self.stats.hedged += 1
+        get_metrics().increment("hedging_hedges_total",
+                                result="sent" if allowed else "over_budget")
+        if allowed:
+            logger.debug("Hedging a request late by %.3fs", time.monotonic() - race.started)
+            race.launch()
+
+    def _await(self, race: _Race, tracker: LatencyTracker, decisive: set[str],
+               delay: float | None) -> _Attempt:
+        """Wait for an attempt to report a ``decisive`` event, hedging once after ``delay``.
+
+        :raises: the error of the first attempt, once every attempt failed
+        """
+        while True:
+            timeout = None if delay is None else max(0.0, race.started + delay - time.monotonic())
+            event = race.next_event(timeout)
+            if event is None:
+                delay = None
+                self._hedge(race)
+                continue
+            attempt, kind = event
+            if kind in decisive:
+                self._won(race, attempt, tracker)
+                return attempt
+            if kind == "error":
+                race.failed.append(attempt)
+                if len(race.failed) == len(race.attempts):
+                    assert race.failed[0].error is not None
+                    raise race.failed[0].error
+
+    def _won(self, race: _Race, winner: _Attempt, tracker: LatencyTracker) -> None:
+        now = time.monotonic()
+        tracker.add(now - winner.started)
+        if winner.index == 0:
+            get_metrics().increment("hedging_wins_total", attempt="primary")
+            return
+        saved = self._reply_latency.expected_remaining(now - race.started)
+        with self._lock:
+            self.stats.hedge_wins += 1
+            self.stats.saved_seconds += saved
+        metrics = get_metrics()
+        metrics.increment("hedging_wins_total", attempt="hedge")
+        metrics.observe("hedging_saved_seconds", saved)
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        delay = self._admit(self._reply_latency)
+        if delay is None:
+            start = time.monotonic()
+            reply = self._provider.generate_response(prompt, history)
+            self._reply_latency.add(time.monotonic() - start)
+            return reply
+
+        race = self._race(prompt, history)
+        try:
+            winner = self._await(race, self._reply_latency, {"done"}, delay)
+        finally:
+            race.cancel()
+        content = "".join(winner.parts)
+        if not content.strip():
+            raise ProviderError("The provider returned an empty reply.")
+        return Message(role="assistant", content=content)
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        delay = self._admit(self._first_chunk_latency)
+        if delay is None:
+            yield from self._stream_directly(prompt, history)
+            return
+
+        race = self._race(prompt, history)
+        try:
+            winner = self._await(race, self._first_chunk_latency, {"first", "done"}, delay)
+            for attempt in race.attempts:
+                if attempt is not winner:
+                    attempt.cancelled.set()
+            while (chunk := winner.chunks.get()) is not _END:
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+        finally:
+            race.cancel()
+
+    def _stream_directly(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        start = time.monotonic()
+        stream = self._provider.stream_response(prompt, history)
+        measured = False
+        try:
+            for chunk in stream:
+                if not measured:
+                    self._first_chunk_latency.add(time.monotonic() - start)
+                    measured = True
+                yield chunk
+        finally:
+            stream.close()
+
+    def validate_config(self) -> bool:
+        return self._provider.validate_config()
+
+    def close(self) -> None:
+        """Stop the attempt threads and close the wrapped provider."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        close = getattr(self._provider, "close", None)
+        if close is not None:
+            close()
+
+
+def _streams_natively(provider: Any) -> bool:
+    """Whether the provider overrides the single-chunk ``stream_response`` of LLMProvider."""
+    stream_response = getattr(type(provider), "stream_response", None)
+    return stream_response not in (None, LLMProvider.stream_response)
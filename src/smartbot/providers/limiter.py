@@ -0,0 +1,264 @@
+"""Admission control: rate and adaptive concurrency limits in front of a provider."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from smartbot.core.interfaces import LLMProvider, Message, ProviderOverloadedError
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import get_metrics
+
+from .models import AdmissionConfig
+
+logger = get_logger(__name__)
+
+# Latencies of the recent requests; the fastest one is taken as the unloaded latency
+BASELINE_SAMPLES = 100
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of refusing outright.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A caller always
+    takes a token, possibly borrowing from the future, and is told how long
+    to wait before using it; if that wait is longer than it is willing to
+    queue, the token is given back.
+    """
+
+    def __init__(self, rate: float, burst: int, *,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param rate: tokens added per second
+        :param burst: most tokens the bucket holds
+        :param clock: time source, in seconds
+        """
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, timeout: float) -> float | None:
+        """Take a token.
+
+        :param timeout: longest wait the caller accepts, in seconds
+        :returns: seconds to wait before the token is valid, or ``None`` when
+            that would exceed ``timeout`` (no token is taken then)
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self._rate
+            if wait > timeout:
+                self._tokens += 1
+                return None
+            return wait
+
+    def refund(self) -> None:
+        """Give back a token reserved for a request that was not sent after all."""
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + 1)
+
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    Each completed request is compared with the lowest latency seen among
+    the recent ones. While it stays within ``latency_tolerance`` times that
+    baseline the limit grows by about one per round trip; once it exceeds
+    it, the backend is queueing work internally and the limit is cut by
+    ``backoff``. Requests started before the last cut do not cut it again,
+    so a single congestion episode only backs off once.
+
+    Not thread safe: the caller serializes the updates.
+    """
+
+    def __init__(self, config: AdmissionConfig, *,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._config = config
+        self._clock = clock
+        self._limit = float(config.initial_limit)
+        self._samples: deque[float] = deque(maxlen=BASELINE_SAMPLES)
+        self._last_decrease = float("-inf")
+
+    @property
+    def value(self) -> int:
+        return int(self._limit)
+
+    def update(self, started: float, latency: float) -> None:
+        """Adjust the limit with a finished request.
+
+        :param started: clock reading when the request was sent
+        :param latency: seconds it took
+        """
+        config = self._config
+        self._samples.append(latency)
+        baseline = min(self._samples)
+        if latency <= baseline * config.latency_tolerance:
+            self._limit = min(config.max_limit, self._limit + 1 / self._limit)
+        elif started >= self._last_decrease:
+            self._limit = max(config.min_limit, self._limit * config.backoff)
+            self._last_decrease = self._clock()
+            logger.debug("Concurrency limit cut to %.1f (latency %.3fs, baseline %.3fs)",
+                         self._limit, latency, baseline)
+
+
+@dataclass
+class AdmissionStats:
+    """Counters of an admission provider."""
+    admitted: int = 0
+    rejected: int = 0
+
+
+class AdmissionProvider(LLMProvider):
+    """Limit the requests a provider receives, queueing or shedding the rest.
+
+    A token bucket caps the request rate and an :class:`AdaptiveLimit` caps
+    the requests in flight, learning from the latency how much concurrency
+    the backend absorbs before it slows down. Requests over the limit wait
+    in a queue for up to ``queue_timeout`` seconds; when the queue already
+    holds ``max_queue`` requests, or the wait runs out, they fail at once
+    with :class:`ProviderOverloadedError` instead of piling up.
+
+    Streams count as in flight until they finish, but their latency sample
+    is the time to the first chunk, which is what queueing inside the
+    backend delays.
+    """
+
+    def __init__(self, provider: Any, admission: AdmissionConfig, *,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param provider: provider to wrap (must expose ``config``)
+        :param admission: limits to apply
+        :param clock: time source, in seconds
+        """
+        self._provider = provider
+        self.config = provider.config
+        self._admission = admission
+        self._clock = clock
+        self._bucket = (
+            TokenBucket(admission.rate, admission.burst, clock=clock)
+            if admission.rate is not None else None
+        )
+        self._limit = AdaptiveLimit(admission, clock=clock)
+        self._lock = threading.Lock()
+        # One event per request waiting for a slot, oldest first
+        self._queue: deque[threading.Event] = deque()
+        self._in_flight = 0
+        self.stats = AdmissionStats()
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight."""
+        return self._limit.value
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _reject(self, reason: str) -> ProviderOverloadedError:
+        self.stats.rejected += 1
+        get_metrics().increment("admission_rejected_total", reason=reason)
+        return ProviderOverloadedError(f"Provider overloaded: request rejected ({reason}).")
+
+    def _admit(self) -> float:
+        """Wait for the rate limit and a free slot.
+
+        :returns: clock reading once admitted
+        :raises ProviderOverloadedError: If the request is shed.
+        """
+        arrived = self._clock()
+        timeout = self._admission.queue_timeout
+        if self._bucket is not None:
+            wait = self._bucket.reserve(timeout)
+            if wait is None:
+                raise self._reject("rate")
+            if wait:
+                time.sleep(wait)
+
+        with self._lock:
+            # Behind the requests already waiting, so none of them starves
+            if not self._queue and self._in_flight < self._limit.value:
+                ticket = None
+                self._in_flight += 1
+                self.stats.admitted += 1
+            elif len(self._queue) >= self._admission.max_queue:
+                self._refund()
+                raise self._reject("queue_full")
+            else:
+                ticket = threading.Event()
+                self._queue.append(ticket)
+        if ticket is not None:
+            self._wait_for_slot(ticket, arrived + timeout - self._clock())
+
+        admitted = self._clock()
+        get_metrics().observe("admission_queue_seconds", admitted - arrived)
+        return admitted
+
+    def _wait_for_slot(self, ticket: threading.Event, timeout: float) -> None:
+        """Wait until :meth:`_release` hands its slot over to ``ticket``."""
+        if ticket.wait(max(timeout, 0)):
+            return
+        with self._lock:
+            if ticket.is_set():
+                return  # handed over just as the wait ran out
+            self._queue.remove(ticket)
+        self._refund()
+        raise self._reject("timeout")
+
+    def _refund(self) -> None:
+        """Return the rate token of a request shed after reserving it."""
+        if self._bucket is not None:
+            self._bucket.refund()
+
+    def _release(self, started: float, latency: float | None) -> None:
+        """Free the slot; ``latency`` is None when the request gave no usable sample."""
+        with self._lock:
+            self._in_flight -= 1
+            if latency is not None:
+                self._limit.update(started, latency)
+            # Freed slots go straight to the oldest waiters, in_flight counts them already
+            while self._queue and self._in_flight < self._limit.value:
+                self._queue.popleft().set()
+                self._in_flight += 1
+                self.stats.admitted += 1
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        started = self._admit()
+        latency = None
+        try:
+            reply = self._provider.generate_response(prompt, history)
+            latency = self._clock() - started
+        finally:
+            self._release(started, latency)
+        return reply
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        started = self._admit()
+        latency = None
+        try:
+            for chunk in self._provider.stream_response(prompt, history):
+                if latency is None:
+                    latency = self._clock() - started
+                yield chunk
+        finally:
+            self._release(started, latency)
+
+    def validate_config(self) -> bool:
+        return self._provider.validate_config()
+
+    def close(self) -> None:
+        """Close the wrapped provider."""
+        close = getattr(self._provider, "close", None)
+        if close is not None:
+            close()
@@ -1,64 +1,305 @@
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
+from typing import Any
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from smartbot.core.interfaces import Message
+from smartbot.core.codec import dumps, get_codec
+from smartbot.core.interfaces import AsyncLLMProvider, Message
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import get_metrics
 
+from .base import chat_conversation
 from .models import OllamaConfig
 
+logger = get_logger(__name__)
+
+# Gateway errors are usually a restarting or overloaded Ollama, worth retrying
+RETRY_STATUS_CODES = (502, 503, 504)
+# Bodies are sent already encoded
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _request_fields(config: OllamaConfig, stream: bool) -> dict[str, Any]:
+    """Fields shared by /api/chat and /api/generate requests."""
+    fields: dict[str, Any] = {
+        "model": config.model_name,
+        "stream": stream,
+        "options": {
+            "temperature": config.temperature,
+            "top_p": config.top_p,
+        },
+    }
+    if config.keep_alive is not None:
+        fields["keep_alive"] = config.keep_alive
+    return fields
+
+
+def build_chat_payload(
+    config: OllamaConfig, prompt: Message, history: list[Message], stream: bool
+) -> dict[str, Any]:
+    """Build the body of an /api/chat request."""
+    return {
+        **_request_fields(config, stream),
+        "messages": [message.to_dict() for message in chat_conversation(prompt, history)],
+    }
+
+
+def encode_chat_payload(
+    config: OllamaConfig, prompt: Message, history: list[Message], stream: bool
+) -> bytes:
+    """Encode the body of an /api/chat request, the JSON form of :func:`build_chat_payload`.
+
+    The messages come from the codec cache, so only the new ones are encoded.
+    """
+    return get_codec().encode_body(
+        _request_fields(config, stream), "messages", chat_conversation(prompt, history)
+    )
+
+
+def build_generate_payload(
+    config: OllamaConfig, conversation: list[Message], context: list[int], stream: bool
+) -> dict[str, Any]:
+    """Build the body of an /api/generate request continuing ``context``.
+
+    Only the last message is sent as the prompt. A new conversation (empty
+    ``context``) may start with system messages, sent as the system prompt.
+    """
+    payload = {**_request_fields(config, stream), "prompt": conversation[-1].content}
+    if context:
+        payload["context"] = context
+    elif len(conversation) > 1:
+        payload["system"] = "\n\n".join(message.content for message in conversation[:-1])
+    return payload
+
+
+def parse_stream_line(line: str | bytes) -> tuple[str, bool]:
+    """Decode one NDJSON line of an /api/chat stream.
+
+    :returns: The text of the chunk and whether it is the last one.
+    :raises RuntimeError: If Ollama reports an error inside the stream.
+    :raises ValueError, KeyError: If the line has an unexpected structure.
+    """
+    data = json.loads(line)
+    if "error" in data:
+        raise RuntimeError(f"Ollama reported an error mid-stream: {data['error']}")
+    return data["message"]["content"], bool(data.get("done"))
+
+
+def parse_generate_line(line: str | bytes) -> tuple[str, list[int] | None]:
+    """Decode one NDJSON line of an /api/generate stream.
+
+    :returns: The text of the chunk and, on the last one, the new context tokens.
+    :raises RuntimeError: If Ollama reports an error inside the stream.
+    :raises ValueError, KeyError: If the line has an unexpected structure.
+    """
+    data = json.loads(line)
+    if "error" in data:
+        raise RuntimeError(f"Ollama reported an error mid-stream: {data['error']}")
+    return data["response"], data.get("context", []) if data.get("done") else None
+
+
+ConversationKey = tuple[tuple[str, str], ...]
+
+
+def _conversation_key(messages: list[Message]) -> ConversationKey:
+    return tuple((message.role, message.content) for message in messages)
+
+
+class ConversationContexts:
+    """Context tokens returned by /api/generate, keyed by the conversation they encode.
+
+    A turn continues a stored context only when the history before its
+    prompt is exactly the conversation that produced it, reply included.
+    Whatever else the memory puts in the history (a new summary, recalled
+    messages) or takes out of it (a trimmed window) changes the key, and the
+    turn goes through /api/chat with the history as it is. The oldest
+    conversations are dropped past ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[ConversationKey, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, conversation: list[Message]) -> list[int] | None:
+        """Context of everything before the last message, if it is still known."""
+        key = _conversation_key(conversation[:-1])
+        with self._lock:
+            context = self._entries.get(key)
+            if context is not None:
+                self._entries.move_to_end(key)
+            return context
+
+    def store(self, conversation: list[Message], reply: str, context: list[int]) -> None:
+        # The memory stores the reply stripped, so it is matched stripped
+        key = (*_conversation_key(conversation), ("assistant", reply.strip()))
+        with self._lock:
+            self._entries[key] = context
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def _can_fall_back(error: RuntimeError) -> bool:
+    """Whether /api/chat may still work after /api/generate failed (Ollama is reachable)."""
+    return not isinstance(error.__cause__, requests.exceptions.ConnectionError)
+
+
+def build_session(config: OllamaConfig) -> requests.Session:
+    """Create a pooled, keep-alive HTTP session configured from OllamaConfig."""
+    retry = Retry(
+        total=config.max_retries,
+        # A read timeout means the model is still busy: retrying would only add load
+        read=0,
+        backoff_factor=config.retry_backoff,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not config.http_keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
 
 class OllamaProvider:
-    def __init__(self, config: OllamaConfig) -> None:
-        self.config = config
-    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
-        """
-        Generates a response from the LLM by processing the current prompt and chat history.
-        """
-        messages_history = [
-            *history,
-            prompt,
-        ]
+    """Ollama client over a pooled HTTP session.
 
-        try:
-            response_llm = requests.post(
-                f"{self.config.base_url}/api/chat",
-                json={
-                    "model": self.config.model_name,
-                    "messages": [message.to_dict() for message in messages_history],
-                    "stream": False,
-                    "options": {
-                        "temperature": self.config.temperature,
-                        "top_p": self.config.top_p,
-                    },
-                },
-                timeout=60
-            )
+    With ``conversation_mode: context`` each turn only sends the new prompt
+    to /api/generate, together with the context tokens Ollama returned for
+    the previous turn, so the model does not evaluate the whole history
+    again. When that context is unknown (first start, evicted, over the
+    ``context_tokens`` budget, or a history that is no longer the one it
+    encodes) or rejected, the turn falls back to /api/chat with the history.
+    """
 
-            response_llm.raise_for_status()
+    def __init__(self, config: OllamaConfig, session: requests.Session | None = None) -> None:
+        self.config = config
+        self.session = session or build_session(config)
+        self._timeout = (config.connect_timeout, config.read_timeout)
+        self._contexts = ConversationContexts(config.max_conversations)
 
-            data = response_llm.json()
-            content = data["message"]["content"]
+    def _build_payload(self, prompt: Message, history: list[Message], stream: bool) -> bytes:
+        """Encode the body of an /api/chat request."""
+        return encode_chat_payload(self.config, prompt, history, stream)
+
+    def _post_chat(self, body: bytes, stream: bool) -> requests.Response:
+        """Send the chat request and translate transport errors."""
+        return self._post("/api/chat", body, stream)
 
+    def _post(self, endpoint: str, body: bytes, stream: bool) -> requests.Response:
+        """Send an encoded request to the Ollama API and translate transport errors."""
+        try:
+            response_llm = self.session.post(
+                f"{self.config.base_url}{endpoint}",
+                data=body,
+                headers=JSON_HEADERS,
+                timeout=self._timeout,
+                stream=stream,
+            )
         except requests.exceptions.ConnectionError as error:
             raise RuntimeError(
                 f"""Connection error: Could not connect to Ollama at {self.config.base_url}.
                 Is it running?"""
                 ) from error
 
+        except requests.exceptions.RequestException as error:
+            raise RuntimeError(f"Unexpected communication error with Ollama: {error}") from error
 
+        try:
+            response_llm.raise_for_status()
         except requests.exceptions.HTTPError as error :
             error_details = response_llm.text
             raise RuntimeError(
                 f"Ollama returned an HTTP error {response_llm.status_code}: {error_details}"
                 ) from error
 
+        return response_llm
+
+    def _context_for(self, conversation: list[Message]) -> list[int] | None:
+        """Context tokens to continue, [] for a new conversation, None to use /api/chat."""
+        if self.config.conversation_mode != "context":
+            return None
+        if all(message.role == "system" for message in conversation[:-1]):
+            get_metrics().increment("ollama_context_total", result="new")
+            return []
+        context = self._contexts.find(conversation)
+        get_metrics().increment("ollama_context_total",
+                                result="lost" if context is None else "reused")
+        return context
+
+    def _keep_context(self, conversation: list[Message], reply: str,
+                      context: list[int] | None) -> None:
+        budget = self.config.context_tokens
+        if not context or (budget is not None and len(context) >= budget):
+            # The next turn resends the (trimmed) history through /api/chat instead
+            return
+        self._contexts.store(conversation, reply, context)
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """
+        Generates a response from the LLM by processing the current prompt and chat history.
+        """
+        conversation = chat_conversation(prompt, history)
+        context = self._context_for(conversation)
+        if context is not None:
+            try:
+                return self._generate_with_context(conversation, context)
+            except RuntimeError as error:
+                if not _can_fall_back(error):
+                    raise
+                logger.warning("Ollama context request failed, resending the history: %s", error)
+                get_metrics().increment("ollama_context_total", result="fallback")
+
+        return self._generate_chat(prompt, history)
+
+    def _generate_with_context(self, conversation: list[Message], context: list[int]) -> Message:
+        payload = build_generate_payload(self.config, conversation, context, stream=False)
+        with get_metrics().span("provider_seconds", provider="ollama", phase="request"):
+            response_llm = self._post("/api/generate", dumps(payload), stream=False)
+
+        try:
+            data = response_llm.json()
+            content = data["response"]
         except (ValueError, KeyError) as error:
             raise RuntimeError(
                 f"Error processing Ollama's response. Unexpected structure: {error}"
                 ) from error
 
-        except requests.exceptions.RequestException as error:
-            raise RuntimeError(f"Unexpected communication error with Ollama: {error}") from error
+        self._keep_context(conversation, content, data.get("context"))
+        return Message(role="assistant", content=content, timestamp=datetime.now())
+
+    def _generate_chat(self, prompt: Message, history: list[Message]) -> Message:
+        metrics = get_metrics()
+        with metrics.span("provider_seconds", provider="ollama", phase="payload"):
+            body = self._build_payload(prompt, history, stream=False)
+        with metrics.span("provider_seconds", provider="ollama", phase="request"):
+            response_llm = self._post_chat(body, stream=False)
+
+        try:
+            with metrics.span("provider_seconds", provider="ollama", phase="parse"):
+                data = response_llm.json()
+                content = data["message"]["content"]
+
+        except (ValueError, KeyError) as error:
+            raise RuntimeError(
+                f"Error processing Ollama's response. Unexpected structure: {error}"
+                ) from error
 
         assistant_message = Message(
             role="assistant",
@@ -67,9 +308,202 @@ class OllamaProvider:
         )
         return assistant_message
 
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        """
+        Streams the response from the LLM, reading Ollama's NDJSON output line by line.
+        """
+        conversation = chat_conversation(prompt, history)
+        context = self._context_for(conversation)
+        if context is not None:
+            started = False
+            try:
+                for chunk in self._stream_with_context(conversation, context):
+                    started = True
+                    yield chunk
+            except RuntimeError as error:
+                # Once the reply has started the caller has seen part of it: no fallback
+                if started or not _can_fall_back(error):
+                    raise
+                logger.warning("Ollama context request failed, resending the history: %s", error)
+                get_metrics().increment("ollama_context_total", result="fallback")
+            else:
+                return
+
+        yield from self._stream_chat(prompt, history)
+
+    def _stream_with_context(self, conversation: list[Message],
+                             context: list[int]) -> Iterator[str]:
+        payload = build_generate_payload(self.config, conversation, context, stream=True)
+        response_llm = self._post("/api/generate", dumps(payload), stream=True)
+
+        chunks: list[str] = []
+        with response_llm:
+            try:
+                for line in response_llm.iter_lines():
+                    if not line:
+                        continue
+
+                    content, new_context = parse_generate_line(line)
+                    if content:
+                        chunks.append(content)
+                        yield content
+
+                    if new_context is not None:
+                        self._keep_context(conversation, "".join(chunks), new_context)
+                        break
+
+            except (ValueError, KeyError) as error:
+                raise RuntimeError(
+                    f"Error processing Ollama's stream. Unexpected structure: {error}"
+                    ) from error
+
+            except requests.exceptions.RequestException as error:
+                raise RuntimeError(f"Ollama stream was interrupted: {error}") from error
+
+    def _stream_chat(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        metrics = get_metrics()
+        with metrics.span("provider_seconds", provider="ollama", phase="payload"):
+            body = self._build_payload(prompt, history, stream=True)
+        with metrics.span("provider_seconds", provider="ollama", phase="request"):
+            response_llm = self._post_chat(body, stream=True)
+
+        with response_llm:
+            try:
+                for line in response_llm.iter_lines():
+                    if not line:
+                        continue
+
+                    content, done = parse_stream_line(line)
+                    if content:
+                        yield content
+
+                    if done:
+                        break
+
+            except (ValueError, KeyError) as error:
+                raise RuntimeError(
+                    f"Error processing Ollama's stream. Unexpected structure: {error}"
+                    ) from error
+
+            except requests.exceptions.RequestException as error:
+                raise RuntimeError(f"Ollama stream was interrupted: {error}") from error
+
     def validate_config(self) -> bool:
         try:
-            test_request = requests.get(f"{self.config.base_url}/api/tags")
+            test_request = self.session.get(
+                f"{self.config.base_url}/api/tags", timeout=self._timeout
+            )
             return test_request.status_code == 200
         except requests.RequestException:
             return False
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        self.session.close()
+
+
+def build_async_client(config: OllamaConfig) -> httpx.AsyncClient:
+    """Create the asyncio counterpart of :func:`build_session`.
+
+    httpx only retries failed connection attempts, not HTTP status codes.
+    """
+    limits = httpx.Limits(
+        max_connections=config.pool_maxsize,
+        max_keepalive_connections=config.pool_maxsize if config.http_keep_alive else 0,
+    )
+    return httpx.AsyncClient(
+        base_url=config.base_url,
+        timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+        transport=httpx.AsyncHTTPTransport(limits=limits, retries=config.max_retries),
+    )
+
+
+class AsyncOllamaProvider(AsyncLLMProvider):
+    """Asyncio Ollama client built on a shared ``httpx.AsyncClient``."""
+
+    def __init__(self, config: OllamaConfig, client: httpx.AsyncClient | None = None) -> None:
+        self.config = config
+        self.client = client or build_async_client(config)
+
+    async def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """
+        Generates a response from the LLM without blocking the event loop.
+        """
+        body = encode_chat_payload(self.config, prompt, history, stream=False)
+        try:
+            response_llm = await self.client.post("/api/chat", content=body,
+                                                  headers=JSON_HEADERS)
+            response_llm.raise_for_status()
+            content = response_llm.json()["message"]["content"]
+
+        except httpx.HTTPStatusError as error:
+            raise RuntimeError(
+                f"Ollama returned an HTTP error {error.response.status_code}: "
+                f"{error.response.text}"
+                ) from error
+
+        except (ValueError, KeyError) as error:
+            raise RuntimeError(
+                f"Error processing Ollama's response. Unexpected structure: {error}"
+                ) from error
+
+        except httpx.HTTPError as error:
+            raise _translate_transport_error(error, self.config.base_url) from error
+
+        return Message(role="assistant", content=content, timestamp=datetime.now())
+
+    async def stream_response(
+        self, prompt: Message, history: list[Message]
+    ) -> AsyncIterator[str]:
+        """
+        Streams the response from the LLM, reading Ollama's NDJSON output line by line.
+        """
+        body = encode_chat_payload(self.config, prompt, history, stream=True)
+        try:
+            async with self.client.stream("POST", "/api/chat", content=body,
+                                          headers=JSON_HEADERS) as response_llm:
+                if response_llm.is_error:
+                    await response_llm.aread()
+                    raise RuntimeError(
+                        f"Ollama returned an HTTP error {response_llm.status_code}: "
+                        f"{response_llm.text}"
+                    )
+
+                async for line in response_llm.aiter_lines():
+                    if not line:
+                        continue
+
+                    content, done = parse_stream_line(line)
+                    if content:
+                        yield content
+
+                    if done:
+                        break
+
+        except (ValueError, KeyError) as error:
+            raise RuntimeError(
+                f"Error processing Ollama's stream. Unexpected structure: {error}"
+                ) from error
+
+        except httpx.HTTPError as error:
+            raise _translate_transport_error(error, self.config.base_url) from error
+
+    async def validate_config(self) -> bool:
+        try:
+            test_request = await self.client.get("/api/tags")
+            return test_request.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections."""
+        await self.client.aclose()
+
+
+def _translate_transport_error(error: httpx.HTTPError, base_url: str) -> RuntimeError:
+    if isinstance(error, httpx.ConnectError):
+        return RuntimeError(
+            f"""Connection error: Could not connect to Ollama at {base_url}.
+            Is it running?"""
+        )
+    return RuntimeError(f"Unexpected communication error with Ollama: {error}")
@@ -1,12 +1,43 @@
 from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field, SecretStr
+from pydantic import BaseModel, Field, SecretStr, model_validator
+
+
+class AdmissionConfig(BaseModel):
+    """Settings for limiting the requests sent to a provider"""
+    # Requests per second allowed on average (None disables the rate limit)
+    rate: float | None = Field(gt=0, default=None)
+    # Requests that may be sent at once after an idle period
+    burst: int = Field(ge=1, default=10)
+    # Requests in flight: starts at initial_limit and adapts within [min_limit, max_limit].
+    # Keep initial_limit below what the backend handles: the first replies set the baseline
+    initial_limit: int = Field(ge=1, default=4)
+    min_limit: int = Field(ge=1, default=1)
+    max_limit: int = Field(ge=1, default=64)
+    # The limit is cut when a request takes this many times the unloaded latency
+    latency_tolerance: float = Field(gt=1, default=2.0)
+    backoff: float = Field(gt=0, lt=1, default=0.5)
+    # Requests waiting for a slot; beyond that they are rejected at once
+    max_queue: int = Field(ge=0, default=64)
+    queue_timeout: float = Field(ge=0, default=10.0)
+
+    @model_validator(mode="after")
+    def check_limits(self) -> "AdmissionConfig":
+        if not self.min_limit <= self.initial_limit <= self.max_limit:
+            raise ValueError("The limits must satisfy min_limit <= initial_limit <= max_limit.")
+        return self
 
 
 class BaseConfig(BaseModel):
     """Settings shared with each model"""
     temperature: float = Field(ge=0, le=1, default=0.7)
     top_p: float = Field(ge=0, le=1, default=1)
+    # Token budget for history + prompt sent per call (None sends the whole window)
+    context_tokens: int | None = Field(ge=1, default=None)
+    # "heuristic" (offline estimate) or "tiktoken:<encoding>"
+    tokenizer: str = "heuristic"
+    # Rate and adaptive concurrency limits of the requests (None sends them all at once)
+    admission: AdmissionConfig | None = None
 
 
 class OpenAIConfig(BaseConfig):
@@ -14,6 +45,7 @@ class OpenAIConfig(BaseConfig):
     provider: Literal["openai"] = "openai"
     api_key: SecretStr
     model_name: str = "gpt-4o"
+    tokenizer: str = "tiktoken:o200k_base"
 
 
 
@@ -22,16 +54,139 @@ class OllamaConfig(BaseConfig):
     provider: Literal["ollama"] = "ollama"
     base_url: str = "http://localhost:11434"
     model_name: str = "llama3.2:1b"
+    # Ollama's default num_ctx is 4096 and includes the reply, anything beyond is cut:
+    # about 3072 leaves room for the reply (None sends the whole window)
+    context_tokens: int | None = Field(ge=1, default=None)
+    # HTTP connection pool shared by every request of the provider
+    pool_connections: int = Field(ge=1, default=10)
+    pool_maxsize: int = Field(ge=1, default=10)
+    http_keep_alive: bool = True
+    connect_timeout: float = Field(gt=0, default=5.0)
+    read_timeout: float = Field(gt=0, default=60.0)
+    # Retries on connection failures and 502/503/504, with exponential backoff
+    max_retries: int = Field(ge=0, default=2)
+    retry_backoff: float = Field(ge=0, default=0.5)
+    # How long Ollama keeps the model (and its prompt cache) loaded after a request,
+    # e.g. "30m" or -1 for ever; None leaves Ollama's default (5 minutes)
+    keep_alive: str | int | None = None
+    # "chat" resends the history to /api/chat on every turn; "context" continues the
+    # conversation through /api/generate with the context tokens of the previous turn
+    conversation_mode: Literal["chat", "context"] = "chat"
+    # Conversations whose context tokens are kept in "context" mode
+    max_conversations: int = Field(ge=1, default=256)
+
+
 class EchoConfig(BaseConfig):
     """Settings for echo"""
     provider: Literal["echo"]="echo"
 
-ModelConfig = Annotated[
+BackendConfig = Annotated[
     OpenAIConfig| OllamaConfig|EchoConfig,
     Field(discriminator="provider")
 ]
 
+
+class RouterConfig(BaseConfig):
+    """Settings for routing requests over several backends
+
+    temperature and top_p only decide whether the response cache is used;
+    each backend samples with its own settings.
+    """
+    provider: Literal["router"] = "router"
+    backends: list[BackendConfig] = Field(min_length=1)
+    # "least_outstanding" or "latency" (outstanding requests weighted by average latency)
+    strategy: Literal["least_outstanding", "latency"] = "least_outstanding"
+    # Consecutive failures that take a backend out of rotation for cooldown_seconds
+    failure_threshold: int = Field(ge=1, default=3)
+    cooldown_seconds: float = Field(gt=0, default=30.0)
+    # Seconds between validate_config() checks of every backend (None disables them)
+    health_check_interval: float | None = Field(gt=0, default=None)
+
+    @model_validator(mode="after")
+    def inherit_context_budget(self) -> "RouterConfig":
+        """Without an explicit budget, use the smallest one among the backends."""
+        if self.context_tokens is None:
+            budgets = [b.context_tokens for b in self.backends if b.context_tokens is not None]
+            self.context_tokens = min(budgets, default=None)
+        return self
+
+
+ModelConfig = Annotated[
+    OpenAIConfig| OllamaConfig|EchoConfig|RouterConfig,
+    Field(discriminator="provider")
+]
+
+class MemoryConfig(BaseModel):
+    """Settings for the conversation memory"""
+    backend: Literal["json", "jsonl", "binary", "sqlite"] = "json"
+    file_path: str = "history.json"
+    max_messages: int = Field(ge=1, default=10)
+    # When set, sessions are kept in this folder instead of file_path
+    # (one file per session, or a single sessions.db for sqlite)
+    sessions_dir: str | None = None
+    max_hot_sessions: int = Field(ge=1, default=1024)
+    # json/jsonl: "always" writes every message, "batched" flushes in the background
+    # every flush_interval seconds or flush_every messages, "exit" only on close/exit
+    durability: Literal["always", "batched", "exit"] = "always"
+    flush_interval: float = Field(ge=0, default=1.0)
+    flush_every: int = Field(ge=1, default=32)
+    # binary: compress the larger records with zlib
+    compression: bool = False
+    # Messages pushed out of the window are folded into a summary every this many
+    # (None keeps dropping them); the summary is saved in summary_path
+    summarize_every: int | None = Field(ge=1, default=None)
+    summary_path: str | None = None
+    # Older messages most related to each question added to the window (None disables
+    # it); they are archived in archive_path and embedded with "hashing" or "ollama:<model>"
+    recall_top_k: int | None = Field(ge=1, default=None)
+    archive_path: str | None = None
+    embedder: str = "hashing"
+
+    @model_validator(mode="after")
+    def check_forgotten_messages(self) -> "MemoryConfig":
+        """The messages out of the window are either summarized or recalled, not both."""
+        if self.summarize_every is not None and self.recall_top_k is not None:
+            raise ValueError("summarize_every and recall_top_k cannot be combined.")
+        return self
+
+
+class CacheConfig(BaseModel):
+    """Settings for the response cache"""
+    enabled: bool = False
+    max_entries: int = Field(ge=1, default=1024)
+    ttl_seconds: float = Field(gt=0, default=3600)
+    disk_dir: str | None = None
+    # Replies are only cached with temperature 0 unless this is set
+    always: bool = False
+
+
+class CoalescingConfig(BaseModel):
+    """Settings for sharing identical in-flight requests"""
+    enabled: bool = False
+
+
+class HedgingConfig(BaseModel):
+    """Settings for sending late requests a second time"""
+    enabled: bool = False
+    # A request is hedged once it takes longer than this percentile of the recent ones
+    percentile: float = Field(gt=0, lt=1, default=0.95)
+    # Hedges allowed per request, e.g. 0.05 adds at most 5 % more load
+    max_extra_load: float = Field(gt=0, le=1, default=0.05)
+    # Requests measured before the first hedge
+    min_samples: int = Field(ge=1, default=20)
+
+
+class MetricsConfig(BaseModel):
+    """Settings for the in-process metrics"""
+    enabled: bool = False
+
+
 class ChatBotConfig(BaseModel):
     """Tu configuración global del bot"""
     bot_name: str
     llm: ModelConfig
+    memory: MemoryConfig = Field(default_factory=MemoryConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    coalescing: CoalescingConfig = Field(default_factory=CoalescingConfig)
+    hedging: HedgingConfig = Field(default_factory=HedgingConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
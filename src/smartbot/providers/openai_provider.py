@@ -1,11 +1,15 @@
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
 from typing import Any, cast
 
-from openai import APIConnectionError, AuthenticationError, OpenAI
+from openai import APIConnectionError, AsyncOpenAI, AuthenticationError, OpenAI, OpenAIError
 from openai.types.chat import ChatCompletionMessageParam
 
-from smartbot.core.interfaces import Message
+from smartbot.core.codec import get_codec
+from smartbot.core.interfaces import AsyncLLMProvider, Message, ProviderError
+from smartbot.utils.metrics import get_metrics
 
+from .base import chat_conversation
 from .models import OpenAIConfig
 
 
@@ -28,18 +32,22 @@ class OpenaiProvider:
         :rtype: str
         """
 
-        messages_history = [*history, prompt]
+        messages_history = chat_conversation(prompt, history)
 
-        response_llm = self.client.chat.completions.create(
-            model = self.config.model_name,
-            messages=cast(list[ChatCompletionMessageParam],
-                          [message.to_dict() for message in messages_history]),
-            temperature=self.config.temperature,
-            top_p=self.config.top_p,
-        )
+        with get_metrics().span("provider_seconds", provider="openai", phase="request"):
+            try:
+                response_llm = self.client.chat.completions.create(
+                    model = self.config.model_name,
+                    messages=cast(list[ChatCompletionMessageParam],
+                                  [get_codec().as_dict(message) for message in messages_history]),
+                    temperature=self.config.temperature,
+                    top_p=self.config.top_p,
+                )
+            except OpenAIError as error:
+                raise ProviderError(f"OpenAI request failed: {error}") from error
         text_response_llm = response_llm.choices[0].message.content
         if (text_response_llm is None):
-            raise ValueError("No response from LLM")
+            raise ProviderError("No response from LLM")
         assistant_message = Message(
             role="assistant",
             content=text_response_llm,
@@ -48,6 +56,38 @@ class OpenaiProvider:
 
         return assistant_message
 
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        """
+        Streams the response from the LLM as it is generated (``stream=True``).
+
+        :param prompt: The current message from the user.
+        :type prompt: Message
+        :param history: A list of prior chat messages.
+        :type history: list[Message]
+        :return: The text deltas of the response, in order.
+        :rtype: Iterator[str]
+        """
+
+        messages_history = chat_conversation(prompt, history)
+
+        try:
+            stream_llm = self.client.chat.completions.create(
+                model = self.config.model_name,
+                messages=cast(list[ChatCompletionMessageParam],
+                              [get_codec().as_dict(message) for message in messages_history]),
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                stream=True,
+            )
+            for chunk in stream_llm:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        except OpenAIError as error:
+            raise ProviderError(f"OpenAI stream failed: {error}") from error
+
     def validate_config(self) -> bool:
         """
         Validates the connectivity and configuration of the LLM provider.
@@ -60,3 +100,87 @@ class OpenaiProvider:
             return True
         except (AuthenticationError, APIConnectionError):
             return False
+
+
+class AsyncOpenaiProvider(AsyncLLMProvider):
+    """Asyncio OpenAI client built on ``AsyncOpenAI``."""
+
+    def __init__(self, config: OpenAIConfig, client: Any = None) -> None:
+        self.config = config
+        self.client = client or AsyncOpenAI(api_key=config.api_key.get_secret_value())
+
+    def _messages(
+        self, prompt: Message, history: list[Message]
+    ) -> list[ChatCompletionMessageParam]:
+        messages_history = chat_conversation(prompt, history)
+        return cast(list[ChatCompletionMessageParam],
+                    [get_codec().as_dict(message) for message in messages_history])
+
+    async def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """
+        Generates a response from the LLM without blocking the event loop.
+
+        :param prompt: The current message from the user.
+        :type prompt: Message
+        :param history: A list of prior chat messages.
+        :type history: list[Message]
+        :return: The response generated by the model.
+        :rtype: Message
+        """
+        try:
+            response_llm = await self.client.chat.completions.create(
+                model=self.config.model_name,
+                messages=self._messages(prompt, history),
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+            )
+        except OpenAIError as error:
+            raise ProviderError(f"OpenAI request failed: {error}") from error
+        text_response_llm = response_llm.choices[0].message.content
+        if text_response_llm is None:
+            raise ProviderError("No response from LLM")
+
+        return Message(role="assistant", content=text_response_llm, timestamp=datetime.now())
+
+    async def stream_response(
+        self, prompt: Message, history: list[Message]
+    ) -> AsyncIterator[str]:
+        """
+        Streams the response from the LLM as it is generated (``stream=True``).
+
+        :param prompt: The current message from the user.
+        :type prompt: Message
+        :param history: A list of prior chat messages.
+        :type history: list[Message]
+        :return: The text deltas of the response, in order.
+        :rtype: AsyncIterator[str]
+        """
+        try:
+            stream_llm = await self.client.chat.completions.create(
+                model=self.config.model_name,
+                messages=self._messages(prompt, history),
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                stream=True,
+            )
+            async for chunk in stream_llm:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        except OpenAIError as error:
+            raise ProviderError(f"OpenAI stream failed: {error}") from error
+
+    async def validate_config(self) -> bool:
+        """
+        Validates the connectivity and configuration of the LLM provider.
+
+        :return: True if the models endpoint answers, False otherwise.
+        :rtype: bool
+        """
+        try:
+            await self.client.models.list()
+            return True
+        except (AuthenticationError, APIConnectionError):
+            return False
@@ -0,0 +1,257 @@
+"""Spread requests over several providers, failing over when one of them breaks."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from smartbot.core.interfaces import (
+    PROVIDER_FAILURES,
+    LLMProvider,
+    Message,
+    ProviderError,
+    ProviderOverloadedError,
+)
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import get_metrics
+
+from .models import RouterConfig
+
+logger = get_logger(__name__)
+
+# Weight of the newest sample in the moving average of the latency
+LATENCY_SMOOTHING = 0.3
+
+
+class Backend:
+    """One provider of the router and its balancing and circuit state.
+
+    The circuit opens after ``failure_threshold`` consecutive failures. Once
+    the cooldown has passed it lets a single request through (half-open):
+    a success closes it again, a failure reopens it for another cooldown.
+    """
+
+    __slots__ = (
+        "failures", "healthy", "latency", "name", "open_until", "outstanding", "probing",
+        "provider",
+    )
+
+    def __init__(self, provider: Any, name: str) -> None:
+        self.provider = provider
+        self.name = name
+        self.outstanding = 0
+        # Seconds, smoothed; 0 until the first request finishes
+        self.latency = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.healthy = True
+
+    def available(self, now: float, failure_threshold: int) -> bool:
+        if not self.healthy:
+            return False
+        if self.failures < failure_threshold:
+            return True
+        return now >= self.open_until and not self.probing
+
+
+class RouterProvider(LLMProvider):
+    """Balance requests over several providers with failover and circuit breaking.
+
+    ``least_outstanding`` sends each request to the backend with the fewest
+    requests in progress. ``latency`` weights that count by the average
+    latency of the backend, so a degraded node receives less traffic before
+    it starts failing. A backend that raises is skipped and the request is
+    retried on the next one; a stream only fails over before its first chunk.
+    """
+
+    def __init__(
+        self,
+        config: RouterConfig,
+        providers: list[Any],
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param config: parsed router section
+        :param providers: one provider per entry of ``config.backends``, in order
+        :param clock: time source, in seconds
+        :raises ValueError: If there are no providers.
+        """
+        if not providers:
+            raise ValueError("The router needs at least one backend.")
+
+        self.config = config
+        self._clock = clock
+        self._backends = [
+            Backend(provider, _describe(index, provider.config))
+            for index, provider in enumerate(providers)
+        ]
+        self._lock = threading.Lock()
+        # Rotates the scan so ties are spread evenly
+        self._turn = 0
+        self._stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+
+        if config.health_check_interval is not None:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="smartbot-router-health", daemon=True
+            )
+            self._health_thread.start()
+
+    @property
+    def backends(self) -> list[Backend]:
+        return list(self._backends)
+
+    def _score(self, backend: Backend) -> float:
+        if self.config.strategy == "latency":
+            return (backend.outstanding + 1) * backend.latency
+        return backend.outstanding
+
+    def _acquire(self, tried: set[str]) -> Backend | None:
+        """Pick the best available backend not tried yet and count the request on it."""
+        now = self._clock()
+        threshold = self.config.failure_threshold
+        with self._lock:
+            candidates = [
+                backend for backend in self._backends
+                if backend.name not in tried and backend.available(now, threshold)
+            ]
+            if not candidates:
+                return None
+            start = self._turn % len(candidates)
+            self._turn += 1
+            backend = min(candidates[start:] + candidates[:start], key=self._score)
+            backend.outstanding += 1
+            if backend.failures >= threshold:
+                backend.probing = True
+            return backend
+
+    def _release(self, backend: Backend, elapsed: float, error: Exception | None) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            backend.probing = False
+            if isinstance(error, ProviderOverloadedError) or not _is_failure(error):
+                # Shedding load, or a bug in the calling code, is not a broken
+                # backend: the circuit stays as it was
+                pass
+            elif error is None:
+                backend.failures = 0
+                if backend.latency:
+                    backend.latency += LATENCY_SMOOTHING * (elapsed - backend.latency)
+                else:
+                    backend.latency = elapsed
+            else:
+                backend.failures += 1
+                if backend.failures >= self.config.failure_threshold:
+                    backend.open_until = self._clock() + self.config.cooldown_seconds
+                    logger.warning("Backend %s opened its circuit after %d failures: %s",
+                                   backend.name, backend.failures, error)
+
+        get_metrics().increment("router_requests_total", backend=backend.name,
+                                result=_result(error))
+
+    def _no_backend(self, errors: dict[str, Exception]) -> ProviderError:
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        if errors and all(isinstance(e, ProviderOverloadedError) for e in errors.values()):
+            return ProviderOverloadedError(f"Every backend is overloaded: {details}")
+        if errors:
+            return ProviderError(f"Every backend failed: {details}")
+        return ProviderError("No backend available: every circuit is open or unhealthy.")
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        """Ask the best backend, failing over to the others when it raises."""
+        tried: set[str] = set()
+        errors: dict[str, Exception] = {}
+        while (backend := self._acquire(tried)) is not None:
+            tried.add(backend.name)
+            start = self._clock()
+            try:
+                reply = backend.provider.generate_response(prompt, history)
+            except Exception as error:
+                self._release(backend, self._clock() - start, error)
+                if not isinstance(error, PROVIDER_FAILURES):
+                    raise
+                errors[backend.name] = error
+                continue
+            self._release(backend, self._clock() - start, None)
+            return reply
+        raise self._no_backend(errors)
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        """Stream from the best backend, failing over while nothing was yielded yet."""
+        tried: set[str] = set()
+        errors: dict[str, Exception] = {}
+        while (backend := self._acquire(tried)) is not None:
+            tried.add(backend.name)
+            start = self._clock()
+            started = False
+            try:
+                for chunk in backend.provider.stream_response(prompt, history):
+                    started = True
+                    yield chunk
+            except Exception as error:
+                self._release(backend, self._clock() - start, error)
+                if started or not isinstance(error, PROVIDER_FAILURES):
+                    raise
+                errors[backend.name] = error
+                continue
+            except GeneratorExit:
+                # The consumer closed the stream: not the backend's fault
+                self._release(backend, self._clock() - start, None)
+                raise
+            self._release(backend, self._clock() - start, None)
+            return
+        raise self._no_backend(errors)
+
+    def check_health(self) -> None:
+        """Run ``validate_config`` on every backend and take failing ones out of rotation."""
+        for backend in self._backends:
+            try:
+                healthy = bool(backend.provider.validate_config())
+            except Exception as error:
+                logger.debug("Health check of %s raised: %s", backend.name, error)
+                healthy = False
+            if healthy != backend.healthy:
+                logger.warning("Backend %s is now %s", backend.name,
+                               "healthy" if healthy else "unhealthy")
+            backend.healthy = healthy
+
+    def _health_loop(self) -> None:
+        interval = self.config.health_check_interval
+        assert interval is not None
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def validate_config(self) -> bool:
+        """The router works as long as one backend does."""
+        return any(backend.provider.validate_config() for backend in self._backends)
+
+    def close(self) -> None:
+        """Stop the health checks and close every backend."""
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+        for backend in self._backends:
+            close = getattr(backend.provider, "close", None)
+            if close is not None:
+                close()
+
+
+def _is_failure(error: Exception | None) -> bool:
+    """Whether ``error`` counts against the circuit: transport, provider and timeout errors."""
+    return error is None or isinstance(error, PROVIDER_FAILURES)
+
+
+def _result(error: Exception | None) -> str:
+    if error is None:
+        return "ok"
+    return "overloaded" if isinstance(error, ProviderOverloadedError) else "error"
+
+
+def _describe(index: int, config: Any) -> str:
+    """Readable and unique name of a backend, e.g. ``0:ollama@http://gpu1:11434``."""
+    location = getattr(config, "base_url", None) or getattr(config, "model_name", None)
+    return f"{index}:{config.provider}@{location}" if location else f"{index}:{config.provider}"
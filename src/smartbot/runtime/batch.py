@@ -0,0 +1,344 @@
+"""Offline batch processing of many prompts.
+
+Prompts are read from a JSONL file, one object per line::
+
+    {"id": "q-1", "prompt": "What are your opening hours?", "session_id": "alice"}
+
+and every result is appended to an output JSONL file in input order::
+
+    {"index": 0, "id": "q-1", "reply": "..."}
+    {"index": 1, "id": "q-2", "error": "..."}
+
+The successful results of the output file are the checkpoint: a resumed
+run skips their inputs and answers the rest again, including the items
+that failed, whose error records are dropped first. Their new results are
+appended after the ones already there. Items sharing a ``session_id`` are
+answered one at a time, in input order, so their turns never interleave in
+the session history.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from smartbot.core.agent import Agent
+from smartbot.core.context import TokenWindow
+from smartbot.core.interfaces import InvalidTurnError, LLMProvider, SessionMemoryBackend
+from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_PROGRESS_EVERY = 100
+# Results that may wait for a slower predecessor before being written
+IN_FLIGHT_PER_WORKER = 4
+ENCODING = "utf-8"
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One prompt of a batch."""
+    index: int
+    item_id: str
+    prompt: str
+    session_id: str | None = None
+
+
+@dataclass
+class BatchReport:
+    """Outcome of a batch run."""
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+Responder = Callable[[BatchItem], str]
+
+
+def build_responder(
+    provider: LLMProvider,
+    memory: SessionMemoryBackend | None = None,
+    context_window: TokenWindow | None = None,
+) -> Responder:
+    """Turn a provider into the callable used by :class:`BatchRunner`.
+
+    With a session-keyed ``memory`` every item continues its own
+    conversation (``session_id``, or the item id). Without it each item
+    is answered by a throwaway in-memory agent, so items never share a
+    history and nothing accumulates across the batch.
+
+    :param provider: provider answering the prompts
+    :param memory: optional session-keyed memory shared by the items
+    :param context_window: optional token budget of the provider
+    :returns: a function answering one item
+    """
+    if memory is not None:
+        agent = Agent(provider=provider, memory=memory, context_window=context_window)
+
+        def respond_in_session(item: BatchItem) -> str:
+            return agent.handle_message(item.prompt, session_id=item.session_id or item.item_id)
+
+        return respond_in_session
+
+    def respond(item: BatchItem) -> str:
+        agent = Agent(provider=provider, memory=InMemoryBackend(), context_window=context_window)
+        return agent.handle_message(item.prompt)
+
+    return respond
+
+
+def parse_item(index: int, line: str) -> BatchItem:
+    """Decode one input line.
+
+    :raises ValueError: If the line is not a JSON object with a non-blank ``prompt`` string.
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict) or not isinstance(data.get("prompt"), str):
+        raise ValueError("expected a JSON object with a 'prompt' string")
+    if not data["prompt"].strip():
+        raise ValueError("the prompt can't be empty")
+    session_id = data.get("session_id")
+    return BatchItem(
+        index=index,
+        item_id=str(data.get("id", index)),
+        prompt=data["prompt"],
+        session_id=str(session_id) if session_id is not None else None,
+    )
+
+
+def _answered_index(line: bytes) -> int | None:
+    """Index of a successful result line; None for errors and unreadable lines."""
+    if not line.endswith(b"\n"):
+        # A run killed mid-write leaves an incomplete line at the end of the file
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "error" in record:
+        return None
+    return record.get("index")
+
+
+def completed_items(output_path: Path) -> set[int]:
+    """Indexes of the inputs answered by previous runs.
+
+    Error records and a torn last line are dropped from the file, so the
+    resumed run answers those items again and writes their result once.
+    """
+    if not output_path.exists():
+        return set()
+
+    completed: set[int] = set()
+    dropped = 0
+    temp_path = output_path.with_name(f"{output_path.name}.tmp")
+    with output_path.open("rb") as output_file, temp_path.open("wb") as kept_file:
+        for line in output_file:
+            index = _answered_index(line)
+            if index is None:
+                dropped += 1
+                continue
+            completed.add(index)
+            kept_file.write(line)
+
+    if dropped:
+        logger.info("Retrying %d failed or incomplete results of %s", dropped, output_path)
+        temp_path.replace(output_path)
+    else:
+        temp_path.unlink()
+    return completed
+
+
+class BatchRunner:
+    """Answer a JSONL file of prompts with a bounded pool of worker threads.
+
+    At most ``workers * 4`` items are in flight; results are written in input
+    order as soon as their predecessors are done, so memory stays constant
+    regardless of the size of the input (a resumed run also keeps the set of
+    indexes already answered).
+    """
+
+    def __init__(
+        self,
+        respond: Responder,
+        workers: int = DEFAULT_WORKERS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        progress_every: int = DEFAULT_PROGRESS_EVERY,
+    ) -> None:
+        """
+        :param respond: answers one item (see :func:`build_responder`)
+        :param workers: number of worker threads
+        :param max_retries: extra attempts for an item that raised an error
+        :param retry_backoff: base of the exponential wait between attempts, in seconds
+        :param progress_every: log the throughput every this many items
+        :raises ValueError: If workers or progress_every is less than 1 or max_retries is negative.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if max_retries < 0:
+            raise ValueError("max_retries cannot be negative.")
+        if progress_every < 1:
+            raise ValueError("progress_every must be at least 1.")
+
+        self._respond = respond
+        self._workers = workers
+        self._max_in_flight = workers * IN_FLIGHT_PER_WORKER
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._progress_every = progress_every
+
+    def _answer(self, item: BatchItem, previous: Future[Any] | None = None) -> dict[str, Any]:
+        """Answer one item, retrying failures, and build its result record.
+
+        Never raises: one broken item must not abort a run of thousands.
+
+        :param item: item to answer
+        :param previous: pending turn of the same session, answered first
+        """
+        if previous is not None:
+            wait([previous])
+        record: dict[str, Any] = {"index": item.index, "id": item.item_id}
+        for attempt in range(self._max_retries + 1):
+            try:
+                record["reply"] = self._respond(item)
+                return record
+            except InvalidTurnError as error:
+                # Rejected by the Agent's validation: retrying can't help
+                logger.warning("Item %s is invalid: %s", item.item_id, error)
+                record["error"] = str(error)
+                return record
+            except Exception as error:
+                if attempt == self._max_retries:
+                    logger.warning("Item %s failed after %d attempts: %s",
+                                   item.item_id, attempt + 1, error)
+                    record["error"] = str(error)
+                    return record
+                time.sleep(self._retry_backoff * 2 ** attempt)
+        return record
+
+    def _read_items(
+        self, input_path: Path, skip: set[int]
+    ) -> Iterator[BatchItem | dict[str, Any]]:
+        """Yield the items to process, or an error record for unreadable lines."""
+        index = 0
+        with input_path.open(encoding=ENCODING) as input_file:
+            for line in input_file:
+                if not line.strip():
+                    continue
+                if index not in skip:
+                    try:
+                        yield parse_item(index, line)
+                    except ValueError as error:
+                        yield {"index": index, "id": str(index), "error": f"Invalid input: {error}"}
+                index += 1
+
+    def run(self, input_path: str, output_path: str, resume: bool = True) -> BatchReport:
+        """
+        Process every prompt of ``input_path`` and append the results to ``output_path``.
+
+        :param input_path: JSONL file of prompts
+        :param output_path: JSONL file of results
+        :param resume: skip the items already answered in ``output_path`` and
+        retry the failed ones; with False the output file is overwritten
+        :returns: counters and throughput of the run
+        """
+        output = Path(output_path)
+        report = BatchReport()
+        completed: set[int] = set()
+        if resume:
+            completed = completed_items(output)
+            report.skipped = len(completed)
+            if report.skipped:
+                logger.info("Resuming after %d completed items", report.skipped)
+        else:
+            output.unlink(missing_ok=True)
+
+        start = time.perf_counter()
+        pending: deque[Future[dict[str, Any]] | dict[str, Any]] = deque()
+        # Latest submitted turn of each session, so the next one waits for it
+        last_turns: dict[str, Future[dict[str, Any]]] = {}
+
+        with (
+            ThreadPoolExecutor(max_workers=self._workers) as pool,
+            output.open("a", encoding=ENCODING) as output_file,
+        ):
+            for item in self._read_items(Path(input_path), completed):
+                pending.append(self._submit(pool, item, last_turns)
+                               if isinstance(item, BatchItem) else item)
+                if len(pending) >= self._max_in_flight:
+                    self._write(output_file, pending.popleft(), report, start)
+            while pending:
+                self._write(output_file, pending.popleft(), report, start)
+
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            "Batch finished: %d succeeded, %d failed, %d skipped (%.1f items/s)",
+            report.succeeded, report.failed, report.skipped, report.throughput,
+        )
+        return report
+
+    def _submit(
+        self,
+        pool: ThreadPoolExecutor,
+        item: BatchItem,
+        last_turns: dict[str, Future[dict[str, Any]]],
+    ) -> Future[dict[str, Any]]:
+        """Queue an item behind the pending turn of its session, if any.
+
+        The pool runs tasks in submission order, so a turn only ever waits
+        for one that has already started: workers can't deadlock.
+        """
+        if item.session_id is None:
+            return pool.submit(self._answer, item)
+
+        future = pool.submit(self._answer, item, last_turns.get(item.session_id))
+        last_turns[item.session_id] = future
+        if len(last_turns) > self._max_in_flight:
+            # Finished turns block nobody; keep the map as small as the window
+            for session_id, turn in list(last_turns.items()):
+                if turn.done():
+                    del last_turns[session_id]
+        return future
+
+    def _write(
+        self,
+        output_file: Any,
+        result: Future[dict[str, Any]] | dict[str, Any],
+        report: BatchReport,
+        start: float,
+    ) -> None:
+        record = result.result() if isinstance(result, Future) else result
+        output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # One flush per result keeps the checkpoint exact if the run is killed
+        output_file.flush()
+
+        if "error" in record:
+            report.failed += 1
+        else:
+            report.succeeded += 1
+
+        if report.processed % self._progress_every == 0:
+            elapsed = time.perf_counter() - start
+            logger.info("Processed %d items (%.1f items/s)",
+                        report.processed, report.processed / elapsed if elapsed else 0.0)
@@ -0,0 +1,363 @@
+"""HTTP/JSON front end for SmartBot.
+
+Endpoints::
+
+    POST /chat          {"message": "...", "session_id": "alice"} -> {"reply": "...", ...}
+    POST /chat/stream   same body -> chunked NDJSON: {"chunk": "..."} ... {"done": true}
+    GET  /health        -> {"status": "ok", "in_flight": 3}
+    GET  /metrics       -> Prometheus text format (when metrics are enabled)
+
+Requests are served by a fixed pool of worker threads. Connections waiting
+for a worker are queued up to ``queue_size``; beyond that the server
+answers ``503`` straight away instead of piling up work it cannot finish.
+Idle keep-alive connections hold a worker for ``KEEP_ALIVE_TIMEOUT`` at
+most, and are closed as soon as a new connection has to wait for one.
+
+Invalid requests and turns answer ``400``, overloaded providers ``503`` and
+failed providers ``502``; anything else is a bug, logged with its
+traceback and answered ``500`` without details.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any
+
+from smartbot.core.agent import DEFAULT_SESSION_ID, Agent
+from smartbot.core.interfaces import (
+    PROVIDER_FAILURES,
+    InvalidTurnError,
+    ProviderOverloadedError,
+)
+from smartbot.runtime.workers import AgentWorkerPool
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 64
+# Turns of the same session run one at a time; sessions share this many locks
+SESSION_LOCK_STRIPES = 64
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 5.0
+# Time spent draining a rejected request so closing it does not reset the 503
+REJECT_DRAIN_TIMEOUT = 0.05
+ENCODING = "utf-8"
+INTERNAL_ERROR_MESSAGE = "Internal server error"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+OVERLOADED_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 30\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b'{"error": "Server overloaded"}'
+)
+
+
+class BadRequestError(ValueError):
+    """The request body cannot be turned into a chat turn."""
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections give their worker back after this many seconds
+    timeout = KEEP_ALIVE_TIMEOUT
+    server: ChatServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    @contextmanager
+    def _busy(self) -> Iterator[None]:
+        """Mark the connection as busy while a request is being answered."""
+        self.server.mark_busy(self.connection, busy=True)
+        try:
+            yield
+        finally:
+            self.server.mark_busy(self.connection, busy=False)
+            if self.server.closing:
+                self.close_connection = True
+
+    def do_GET(self) -> None:
+        with self._busy():
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "in_flight": self.server.in_flight})
+            elif self.path == "/metrics":
+                self._send_metrics()
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self) -> None:
+        with self._busy():
+            self._answer_post()
+
+    def _answer_post(self) -> None:
+        if self.path not in {"/chat", "/chat/stream"}:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            message, session_id = self._read_turn()
+        except BadRequestError as error:
+            self._send_json(400, {"error": str(error)})
+            return
+
+        with self.server.session_lock(session_id or DEFAULT_SESSION_ID):
+            if self.path == "/chat":
+                self._chat(message, session_id)
+            else:
+                self._stream(message, session_id)
+
+    def _read_turn(self) -> tuple[str, str | None]:
+        """Parse the JSON body of a chat request.
+
+        ``session_id`` is optional so single-conversation agents can be served.
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError as error:
+            raise BadRequestError("Invalid Content-Length") from error
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise BadRequestError("Request body too large")
+
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as error:
+            raise BadRequestError(f"Invalid JSON body: {error}") from error
+
+        if not isinstance(body, dict) or not isinstance(body.get("message"), str):
+            raise BadRequestError("The body must be a JSON object with a 'message' string")
+        session_id = body.get("session_id")
+        if session_id is not None and not isinstance(session_id, str):
+            raise BadRequestError("'session_id' must be a string")
+        return body["message"], session_id
+
+    def _chat(self, message: str, session_id: str | None) -> None:
+        try:
+            reply = self.server.agent.handle_message(message, session_id=session_id)
+        except Exception as error:
+            self._send_error(error, session_id)
+            return
+        self._send_json(200, {"reply": reply, "session_id": session_id})
+
+    def _stream(self, message: str, session_id: str | None) -> None:
+        chunks = self.server.agent.stream_message(message, session_id=session_id)
+        try:
+            # The first chunk is awaited before committing to a 200 status
+            first = next(chunks, None)
+        except Exception as error:
+            self._send_error(error, session_id)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            if first is not None:
+                self._write_chunk({"chunk": first})
+            for chunk in chunks:
+                self._write_chunk({"chunk": chunk})
+            self._write_chunk({"done": True, "session_id": session_id})
+        except Exception as error:
+            self._write_chunk({"error": _describe_failure(error, session_id)})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _send_error(self, error: Exception, session_id: str | None) -> None:
+        """Answer a turn that failed before its reply was started.
+
+        Must be called from the ``except`` block handling ``error``.
+        """
+        if isinstance(error, InvalidTurnError):
+            self._send_json(400, {"error": str(error)})
+        elif isinstance(error, ProviderOverloadedError):
+            self._send_json(503, {"error": str(error)})
+        else:
+            status = 502 if isinstance(error, PROVIDER_FAILURES) else 500
+            self._send_json(status, {"error": _describe_failure(error, session_id)})
+
+    def _write_chunk(self, payload: dict[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False).encode(ENCODING) + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def _send_metrics(self) -> None:
+        agent = self.server.agent
+        # Worker processes record their own metrics; the pool adds them up
+        sink = agent.metrics() if isinstance(agent, AgentWorkerPool) else get_metrics()
+        render = getattr(sink, "render_prometheus", None)
+        if render is None:
+            self._send_json(404, {"error": "Metrics are disabled"})
+            return
+        self._send(200, render().encode(ENCODING), PROMETHEUS_CONTENT_TYPE)
+
+    def _send_json(self, status: int, payload: dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode(ENCODING)
+        self._send(status, data, "application/json")
+
+    def _send(self, status: int, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _describe_failure(error: Exception, session_id: str | None) -> str:
+    """Log a failed turn and return the message the client may see.
+
+    Provider failures are reported as they are; anything else is a bug, whose
+    details stay in the log. Must be called from the ``except`` block.
+    """
+    if isinstance(error, PROVIDER_FAILURES):
+        logger.error("Chat turn failed for session %s: %s", session_id, error)
+        return str(error)
+    logger.exception("Unexpected error in a chat turn of session %s", session_id)
+    return INTERNAL_ERROR_MESSAGE
+
+
+class ChatServer(HTTPServer):
+    """Serve an :class:`Agent` over HTTP with a bounded pool of workers."""
+
+    def __init__(
+        self,
+        agent: Agent | AgentWorkerPool,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        """
+        :param agent: agent answering the requests, or a pool of agent processes
+        :param host: interface to listen on
+        :param port: TCP port, 0 picks a free one
+        :param workers: requests processed at the same time
+        :param queue_size: connections waiting for a worker before answering 503
+        :raises ValueError: If workers is less than 1 or queue_size is negative.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if queue_size < 0:
+            raise ValueError("queue_size cannot be negative.")
+
+        super().__init__((host, port), ChatRequestHandler)
+        self.agent = agent
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smartbot-http")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+        self._workers = workers
+        self._in_flight = 0
+        # Open connections and whether they are answering a request right now
+        self._connections: dict[socket.socket, bool] = {}
+        self._connections_lock = threading.Lock()
+        self.closing = False
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def in_flight(self) -> int:
+        """Connections being served or waiting for a worker."""
+        return self._in_flight
+
+    def mark_busy(self, connection: socket.socket, busy: bool) -> None:
+        with self._connections_lock:
+            if connection in self._connections:
+                self._connections[connection] = busy
+
+    def session_lock(self, session_id: str) -> threading.Lock:
+        """Lock that serializes the turns of a session."""
+        stripe = zlib.crc32(session_id.encode(ENCODING)) % SESSION_LOCK_STRIPES
+        return self._session_locks[stripe]
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Hand the connection to a worker, or reject it when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+
+        with self._connections_lock:
+            self._in_flight += 1
+            # Busy until its first request is answered, so it is never closed unread
+            self._connections[request] = True
+            waiting = self._in_flight > self._workers
+        try:
+            self._pool.submit(self._process, request, client_address)
+        except RuntimeError:
+            # The pool is shutting down
+            self._release(request)
+            self._reject(request)
+            return
+        if waiting:
+            # Every worker is taken: those parked on idle connections move on
+            self._close_idle_connections()
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            # Same contract as socketserver: log the failure, keep serving
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._release(request)
+
+    def _release(self, request: Any) -> None:
+        with self._connections_lock:
+            self._in_flight -= 1
+            self._connections.pop(request, None)
+        self._slots.release()
+
+    def _reject(self, request: socket.socket) -> None:
+        logger.warning("Server overloaded, rejecting a connection")
+        with suppress(OSError):
+            request.settimeout(REJECT_DRAIN_TIMEOUT)
+            request.recv(MAX_BODY_BYTES)
+        with suppress(OSError):
+            request.sendall(OVERLOADED_RESPONSE)
+        self.shutdown_request(request)
+
+    def _close_idle_connections(self) -> None:
+        """Wake up workers parked on idle keep-alive connections."""
+        with self._connections_lock:
+            idle = [connection for connection, busy in self._connections.items() if not busy]
+        for connection in idle:
+            with suppress(OSError):
+                connection.shutdown(socket.SHUT_RD)
+
+    def close(self) -> None:
+        """Stop accepting requests, finish the running ones and flush the agent.
+
+        Must be called from another thread than the one in ``serve_forever``.
+        """
+        if self.closing:
+            return
+        self.closing = True
+        self.shutdown()
+        self._close_idle_connections()
+        self._pool.shutdown(wait=True)
+        self.server_close()
+        self.agent.close()
+        logger.info("SmartBot server stopped.")
@@ -0,0 +1,453 @@
+"""Run agents in worker processes, each session always served by the same one.
+
+Validation, JSON and memory work run in Python and share one GIL per
+process. :class:`AgentWorkerPool` starts ``processes`` workers, each with
+its own :class:`Agent` and memory backends built by a factory, and sends
+every turn of a session to the same worker, so a history is never loaded
+by two processes. It answers ``handle_message`` and ``stream_message``
+like an Agent, so the HTTP server can use it as one.
+
+With several processes the memory must be session-keyed: a single
+conversation file would be written by every worker, each overwriting the
+others. Metrics are recorded by each worker and merged on request by
+:meth:`AgentWorkerPool.metrics`.
+
+A monitor thread pings every worker at once and replaces any that died or
+stopped answering, giving it ``stop_timeout`` seconds to flush its memory
+first; the turns it was running fail with :class:`WorkerCrashedError`.
+"""
+
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import pickle
+import queue
+import signal
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from multiprocessing.connection import Connection
+from typing import Any
+
+from smartbot.core.agent import DEFAULT_SESSION_ID, Agent
+from smartbot.utils.logger import get_logger
+from smartbot.utils.metrics import InMemoryMetrics, MetricsSnapshot, get_metrics
+
+logger = get_logger(__name__)
+
+# Turns a worker runs at once; the provider call of one turn does not block the others
+DEFAULT_THREADS = 8
+HEALTH_INTERVAL = 1.0
+HEALTH_TIMEOUT = 5.0
+STOP_TIMEOUT = 10.0
+ENCODING = "utf-8"
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised for the turns of a worker process that died or stopped answering."""
+
+
+def _portable(error: Exception) -> Exception:
+    """The error itself when it can cross the pipe, a RuntimeError describing it otherwise."""
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+    return error
+
+
+class _Reply:
+    """One-shot slot for the reply of a turn, cheaper to wait on than a Queue."""
+
+    __slots__ = ("_done", "_item")
+
+    def __init__(self) -> None:
+        self._done = threading.Lock()
+        self._done.acquire()
+        self._item: tuple[str, Any] | None = None
+
+    def put(self, item: tuple[str, Any]) -> None:
+        if self._item is None:
+            self._item = item
+            # A crash may race the reply itself: the first one wins
+            with suppress(RuntimeError):
+                self._done.release()
+
+    def get(self, timeout: float = -1) -> tuple[str, Any]:
+        if not self._done.acquire(timeout=timeout):
+            raise queue.Empty
+        assert self._item is not None
+        return self._item
+
+
+_Replies = _Reply | queue.Queue[tuple[str, Any]]
+
+
+class _WorkerLoop:
+    """Body of a worker process: read requests from the pipe and run them on threads."""
+
+    def __init__(self, agent: Agent, connection: Connection) -> None:
+        self._agent = agent
+        self._connection = connection
+        self._send_lock = threading.Lock()
+        self._cancelled: set[int] = set()
+
+    def _send(self, request_id: int | None, kind: str, payload: Any) -> None:
+        with self._send_lock:
+            self._connection.send((request_id, kind, payload))
+
+    def _run(self, request_id: int, kind: str, text: str, session_id: str | None) -> None:
+        try:
+            if kind == "chat":
+                reply = self._agent.handle_message(text, session_id=session_id)
+                self._send(request_id, "reply", reply)
+                return
+            for chunk in self._agent.stream_message(text, session_id=session_id):
+                if request_id in self._cancelled:
+                    break
+                self._send(request_id, "chunk", chunk)
+            self._send(request_id, "end", None)
+        except Exception as error:
+            self._send(request_id, "error", _portable(error))
+        finally:
+            self._cancelled.discard(request_id)
+
+    def serve(self, threads: int) -> None:
+        self._send(None, "ready", None)
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="smartbot-turn") as pool:
+            while True:
+                try:
+                    request_id, kind, text, session_id = self._connection.recv()
+                except EOFError:
+                    break
+                if kind == "stop":
+                    break
+                if kind == "ping":
+                    self._send(request_id, "pong", None)
+                elif kind == "metrics":
+                    self._send(request_id, "metrics", _metrics_snapshot())
+                elif kind == "cancel":
+                    self._cancelled.add(request_id)
+                else:
+                    pool.submit(self._run, request_id, kind, text, session_id)
+        # Running turns are finished by the pool above; now flush the memory
+        self._agent.close()
+
+
+def _metrics_snapshot() -> MetricsSnapshot | None:
+    sink = get_metrics()
+    return sink.snapshot() if isinstance(sink, InMemoryMetrics) else None
+
+
+def _build_agent(factory: Callable[[], Agent], shared: bool) -> Agent:
+    agent = factory()
+    if shared and not agent.session_keyed:
+        agent.close()
+        raise ValueError(
+            "Several worker processes need a session-keyed memory (memory.sessions_dir): "
+            "they would overwrite each other's history."
+        )
+    return agent
+
+
+def _worker_main(factory: Callable[[], Agent], connection: Connection, threads: int,
+                 shared: bool) -> None:
+    # The parent decides when the workers stop, so their memory is flushed first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    try:
+        agent = _build_agent(factory, shared)
+    except Exception as error:
+        connection.send((None, "failed", f"{type(error).__name__}: {error}"))
+        raise
+    _WorkerLoop(agent, connection).serve(threads)
+
+
+class _Worker:
+    """Parent side of a worker process: its pipe and the turns waiting for a reply."""
+
+    def __init__(self, index: int, context: Any, factory: Callable[[], Agent],
+                 threads: int, shared: bool) -> None:
+        self.index = index
+        self._connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(factory, child_connection, threads, shared),
+            name=f"smartbot-worker-{index}", daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+        self.ready = threading.Event()
+        # Set once the worker is ready, failed to build its Agent or exited
+        self.started = threading.Event()
+        self.failure: str | None = None
+        self._pending: dict[int, _Replies] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._dead = False
+        threading.Thread(target=self._read, name=f"smartbot-worker-{index}-reader",
+                         daemon=True).start()
+
+    def submit(self, request_id: int, kind: str, text: str = "",
+               session_id: str | None = None) -> _Replies:
+        """Send a request; its replies arrive on the returned queue."""
+        # Streams get many replies; every other request exactly one
+        replies: _Replies = queue.Queue() if kind == "stream" else _Reply()
+        with self._lock:
+            if self._dead:
+                raise WorkerCrashedError(f"Worker {self.index} is restarting.")
+            self._pending[request_id] = replies
+        self.send(request_id, kind, text, session_id)
+        return replies
+
+    def send(self, request_id: int, kind: str, text: str = "",
+             session_id: str | None = None) -> None:
+        try:
+            with self._send_lock:
+                self._connection.send((request_id, kind, text, session_id))
+        except (OSError, ValueError) as error:
+            self._fail_pending()
+            raise WorkerCrashedError(f"Worker {self.index} is gone: {error}") from error
+
+    def forget(self, request_id: int) -> None:
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def _read(self) -> None:
+        try:
+            while True:
+                request_id, kind, payload = self._connection.recv()
+                if kind in ("ready", "failed"):
+                    if kind == "ready":
+                        self.ready.set()
+                    self.failure = payload
+                    self.started.set()
+                    continue
+                replies = self._pending.get(request_id)
+                if replies is not None:
+                    replies.put((kind, payload))
+        except (EOFError, OSError):
+            pass
+        self.started.set()
+        self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        with self._lock:
+            self._dead = True
+            pending, self._pending = self._pending, {}
+        for replies in pending.values():
+            replies.put(("error", WorkerCrashedError(f"Worker {self.index} stopped.")))
+
+    def stop(self, timeout: float) -> None:
+        """Ask the worker to finish its turns and flush its memory, killing it after ``timeout``."""
+        with suppress(WorkerCrashedError):
+            self.send(0, "stop")
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._connection.close()
+
+
+class AgentWorkerPool:
+    """Agents in worker processes, with session affinity and automatic restarts.
+
+    Sessions are assigned by a stable hash of their ID, so a restarted
+    worker takes over the same sessions and finds their history on disk.
+    Without a session ID every turn goes to the worker of the default
+    session, as they all share one history.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Agent],
+        processes: int,
+        *,
+        threads: int = DEFAULT_THREADS,
+        health_interval: float = HEALTH_INTERVAL,
+        health_timeout: float = HEALTH_TIMEOUT,
+        stop_timeout: float = STOP_TIMEOUT,
+        start_method: str = "spawn",
+    ) -> None:
+        """
+        :param factory: picklable callable building the Agent of a worker, e.g.
+            ``functools.partial(build_agent, "config.yaml")``
+        :param processes: worker processes
+        :param threads: turns each worker runs at the same time
+        :param health_interval: seconds between health checks
+        :param health_timeout: seconds the workers have to answer a ping
+        :param stop_timeout: seconds a stopped or restarted worker has to flush
+            its memory before it is killed
+        :param start_method: multiprocessing start method; "spawn" does not
+            inherit the threads and open files of the parent
+        :raises ValueError: If processes or threads is less than 1.
+        :raises WorkerCrashedError: If a worker fails to build its Agent, e.g.
+            because several processes would share a conversation file.
+        """
+        if processes < 1 or threads < 1:
+            raise ValueError("processes and threads must be at least 1.")
+        self._factory = factory
+        self._threads = threads
+        self._shared = processes > 1
+        self._health_timeout = health_timeout
+        self._stop_timeout = stop_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._ids = itertools.count(1)
+        self._workers = [self._spawn(index) for index in range(processes)]
+        self._wait_started()
+        self.restarts = 0
+        self._stop = threading.Event()
+        self._monitor = threading.Thread(
+            target=self._health_loop, args=(health_interval,), name="smartbot-worker-monitor",
+            daemon=True,
+        )
+        self._monitor.start()
+
+    def _spawn(self, index: int) -> _Worker:
+        return _Worker(index, self._context, self._factory, self._threads, self._shared)
+
+    def _wait_started(self) -> None:
+        """Wait for the first workers, so that a factory that fails (e.g. on a bad
+        configuration) stops the startup instead of being restarted forever.
+        """
+        for worker in self._workers:
+            worker.started.wait()
+            if not worker.ready.is_set():
+                for other in self._workers:
+                    other.kill()
+                reason = worker.failure or f"exit code {worker.process.exitcode}"
+                raise WorkerCrashedError(
+                    f"Worker {worker.index} failed while building its agent: {reason}"
+                )
+
+    @property
+    def pids(self) -> list[int | None]:
+        return [worker.process.pid for worker in self._workers]
+
+    def worker_for(self, session_id: str | None) -> int:
+        """Index of the worker serving a session."""
+        key = (session_id or DEFAULT_SESSION_ID).encode(ENCODING)
+        return zlib.crc32(key) % len(self._workers)
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Wait until every worker has built its Agent."""
+        return all(worker.ready.wait(timeout) for worker in self._workers)
+
+    def _submit(self, kind: str, text: str,
+                session_id: str | None) -> tuple[_Worker, int, _Replies]:
+        worker = self._workers[self.worker_for(session_id)]
+        request_id = next(self._ids)
+        return worker, request_id, worker.submit(request_id, kind, text, session_id)
+
+    def handle_message(self, user_input: str, session_id: str | None = None) -> str:
+        """Run a turn on the worker of the session.
+
+        :raises WorkerCrashedError: If the worker dies during the turn.
+        """
+        worker, request_id, replies = self._submit("chat", user_input, session_id)
+        try:
+            kind, payload = replies.get()
+        finally:
+            worker.forget(request_id)
+        if kind == "error":
+            raise payload
+        return payload
+
+    def stream_message(self, user_input: str, session_id: str | None = None) -> Iterator[str]:
+        """Run a streamed turn on the worker of the session, yielding its chunks."""
+        worker, request_id, replies = self._submit("stream", user_input, session_id)
+        finished = False
+        try:
+            while True:
+                kind, payload = replies.get()
+                if kind == "chunk":
+                    yield payload
+                    continue
+                finished = True
+                if kind == "error":
+                    raise payload
+                return
+        finally:
+            worker.forget(request_id)
+            if not finished:
+                # The consumer went away: stop generating the rest
+                with suppress(WorkerCrashedError):
+                    worker.send(request_id, "cancel")
+
+    def _ask_all(self, kind: str, timeout: float) -> dict[int, tuple[str, Any]]:
+        """Send a request to every ready worker at once and wait ``timeout`` for all replies.
+
+        :returns: the reply of each worker that answered in time, by index
+        """
+        asked = []
+        for worker in list(self._workers):
+            # A worker still building its Agent is not expected to answer yet
+            if not worker.ready.is_set():
+                continue
+            request_id = next(self._ids)
+            with suppress(WorkerCrashedError):
+                asked.append((worker, request_id, worker.submit(request_id, kind)))
+
+        deadline = time.monotonic() + timeout
+        answers = {}
+        for worker, request_id, replies in asked:
+            try:
+                answers[worker.index] = replies.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                pass
+            finally:
+                worker.forget(request_id)
+        return answers
+
+    def check_health(self) -> None:
+        """Replace the workers that died or do not answer a ping."""
+        answers = self._ask_all("ping", self._health_timeout)
+        for index, worker in enumerate(self._workers):
+            alive = worker.process.is_alive()
+            pong = answers.get(index, ("timeout", None))[0] == "pong"
+            if alive and (pong or not worker.ready.is_set()):
+                continue
+            self._restart(index, "it stopped answering" if alive else "it exited")
+
+    def metrics(self) -> InMemoryMetrics | None:
+        """Metrics of this process and of every worker that answers in time, added up.
+
+        :returns: None when metrics are disabled
+        """
+        sink = get_metrics()
+        if not isinstance(sink, InMemoryMetrics):
+            return None
+        merged = InMemoryMetrics()
+        merged.merge(sink.snapshot())
+        for kind, snapshot in self._ask_all("metrics", self._health_timeout).values():
+            if kind == "metrics" and snapshot is not None:
+                merged.merge(snapshot)
+        return merged
+
+    def _restart(self, index: int, reason: str) -> None:
+        if self._stop.is_set():
+            return
+        old = self._workers[index]
+        logger.warning("Restarting worker %d (pid %s): %s", index, old.process.pid, reason)
+        # Before the replacement loads the same sessions from disk
+        old.stop(self._stop_timeout)
+        self._workers[index] = self._spawn(index)
+        self.restarts += 1
+        get_metrics().increment("worker_restarts_total", worker=str(index))
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def close(self) -> None:
+        """Stop the monitor and the workers, letting them flush their memory."""
+        self._stop.set()
+        self._monitor.join()
+        for worker in self._workers:
+            worker.stop(self._stop_timeout)
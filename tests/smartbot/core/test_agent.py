@@ -1,6 +1,10 @@
+import pytest
+
 from smartbot.core.agent import Agent
+from smartbot.core.context import TokenWindow
 from smartbot.core.interfaces import LLMProvider, Message
 from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.memory.session_memory import SessionMemory
 
 
 class FakeProvider(LLMProvider):
@@ -73,3 +77,137 @@ def test_agent_handles_multiple_messages() -> None:
 
     assert responses == ["echo: A", "echo: B"]
     assert len(memory.get_history()) == 4
+
+
+class ChunkedProvider(FakeProvider):
+    """Test double that streams the echo word by word."""
+
+    def stream_response(self, prompt: Message, history: list[Message]):
+        yield "echo: "
+        yield prompt.content
+
+
+def test_agent_stream_message_yields_chunks() -> None:
+    """Ensure Agent streams provider chunks and stores the assembled reply."""
+    memory: InMemoryBackend = InMemoryBackend()
+    agent: Agent = Agent(provider=ChunkedProvider(), memory=memory)
+
+    chunks: list[str] = list(agent.stream_message("Hola"))
+
+    assert chunks == ["echo: ", "Hola"]
+    history: list[Message] = memory.get_history()
+    assert [m.role for m in history] == ["user", "assistant"]
+    assert history[1].content == "echo: Hola"
+
+
+def test_agent_stream_commits_reply_only_when_finished() -> None:
+    """Ensure the assistant message is not stored until the stream is exhausted."""
+    memory: InMemoryBackend = InMemoryBackend()
+    agent: Agent = Agent(provider=ChunkedProvider(), memory=memory)
+
+    stream = agent.stream_message("Hola")
+    next(stream)
+
+    assert [m.role for m in memory.get_history()] == ["user"]
+
+    stream.close()
+
+    assert [m.role for m in memory.get_history()] == ["user"]
+
+
+def test_agent_stream_falls_back_to_single_chunk() -> None:
+    """Ensure providers without native streaming yield the whole reply once."""
+    memory: InMemoryBackend = InMemoryBackend()
+    agent: Agent = Agent(provider=FakeProvider(), memory=memory)
+
+    assert list(agent.stream_message("Hola")) == ["echo: Hola"]
+    assert memory.get_history()[-1].content == "echo: Hola"
+
+
+class EmptyStreamProvider(FakeProvider):
+    """Test double whose stream ends without any text."""
+
+    def stream_response(self, prompt: Message, history: list[Message]):
+        yield from []
+
+
+def test_agent_stream_does_not_store_empty_reply() -> None:
+    memory: InMemoryBackend = InMemoryBackend()
+    agent: Agent = Agent(provider=EmptyStreamProvider(), memory=memory)
+
+    assert list(agent.stream_message("Hola")) == []
+    assert [m.role for m in memory.get_history()] == ["user"]
+
+
+def test_agent_routes_messages_by_session(tmp_path) -> None:
+    """Ensure one Agent serves several conversations through a session-keyed memory."""
+    memory: SessionMemory = SessionMemory(directory=str(tmp_path))
+    agent: Agent = Agent(provider=FakeProvider(), memory=memory)
+
+    agent.handle_message("Hola", session_id="alice")
+    agent.handle_message("Hello", session_id="bob")
+    list(agent.stream_message("Again", session_id="alice"))
+
+    assert [m.content for m in memory.get_history("alice")] == [
+        "Hola", "echo: Hola", "Again", "echo: Again",
+    ]
+    assert [m.content for m in memory.get_history("bob")] == ["Hello", "echo: Hello"]
+
+
+def test_agent_rejects_session_with_single_memory() -> None:
+    """Ensure a session_id is refused when the memory holds one conversation."""
+    agent: Agent = Agent(provider=FakeProvider(), memory=InMemoryBackend())
+
+    with pytest.raises(ValueError):
+        agent.handle_message("Hola", session_id="alice")
+
+
+class RecordingProvider(FakeProvider):
+    """Test double that remembers the history it received."""
+
+    def __init__(self) -> None:
+        self.histories: list[list[Message]] = []
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.histories.append(history)
+        return super().generate_response(prompt, history)
+
+
+def test_agent_applies_token_window() -> None:
+    """Ensure the history sent to the provider is trimmed to the token budget."""
+    memory: InMemoryBackend = InMemoryBackend()
+    provider: RecordingProvider = RecordingProvider()
+    window: TokenWindow = TokenWindow(max_tokens=30)
+    agent: Agent = Agent(provider=provider, memory=memory, context_window=window)
+
+    agent.handle_message("x" * 100)
+    agent.handle_message("Hola")
+
+    assert len(memory.get_history()) == 4
+    assert [m.content for m in provider.histories[-1]] == ["Hola"]
+
+
+def test_agent_token_window_counts_prompt_once() -> None:
+    """A prompt taking most of the budget still leaves room for the previous turn."""
+    memory: InMemoryBackend = InMemoryBackend()
+    provider: RecordingProvider = RecordingProvider()
+    window: TokenWindow = TokenWindow(max_tokens=40)
+    agent: Agent = Agent(provider=provider, memory=memory, context_window=window)
+
+    agent.handle_message("Hola")
+    agent.handle_message("x" * 80)
+
+    assert [m.content for m in provider.histories[-1]][-1] == "x" * 80
+    assert len(provider.histories[-1]) == 3
+
+
+def test_agent_close_releases_session_memory(tmp_path) -> None:
+    """close() flushes and releases the memory backend, if it supports it."""
+    memory = SessionMemory(directory=str(tmp_path))
+    agent = Agent(provider=FakeProvider(), memory=memory)
+    agent.handle_message("Hola", session_id="alice")
+
+    agent.close()
+
+    assert memory.hot_sessions == 0
+    Agent(provider=FakeProvider(), memory=InMemoryBackend()).close()
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import pytest
+
+from smartbot.core.adapters import SyncMemoryAdapter, SyncProviderAdapter
+from smartbot.core.async_agent import AsyncAgent
+from smartbot.core.interfaces import AsyncLLMProvider, LLMProvider, Message, ProviderError
+from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+
+
+class SlowAsyncProvider(AsyncLLMProvider):
+    """Test double that simulates a slow network round trip."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    async def generate_response(
+        self,
+        prompt: Message,
+        history: list[Message],
+    ) -> Message:
+        await asyncio.sleep(self.delay)
+        return Message(role="assistant", content=f"echo: {prompt.content}")
+
+
+class EndlessProvider(LLMProvider):
+    """Sync provider streaming until it is closed, recording the threads that read it."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        self.threads: set[str] = set()
+        self.closed = threading.Event()
+        # Held like an SDK holds its open responses, so only close() ends them
+        self.streams: list[Iterator[str]] = []
+        self._fail_after = fail_after
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        raise NotImplementedError
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        stream = self._chunks()
+        self.streams.append(stream)
+        return stream
+
+    def _chunks(self) -> Iterator[str]:
+        try:
+            for number in range(1_000_000):
+                if number == self._fail_after:
+                    raise ProviderError("stream broken")
+                self.threads.add(threading.current_thread().name)
+                time.sleep(0.001)
+                yield f"{number} "
+        finally:
+            self.closed.set()
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.jobs = 0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future[Any]:
+        self.jobs += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_async_agent_full_flow() -> None:
+    """Ensure AsyncAgent stores messages and returns provider response content."""
+    memory: InMemoryBackend = InMemoryBackend()
+    agent: AsyncAgent = AsyncAgent(
+        provider=SlowAsyncProvider(delay=0),
+        memory=SyncMemoryAdapter(memory, offload=False),
+    )
+
+    response: str = asyncio.run(agent.handle_message("Hola"))
+
+    assert response == "echo: Hola"
+    assert [m.content for m in memory.get_history()] == ["Hola", "echo: Hola"]
+
+
+def test_async_agent_streams_through_sync_adapters() -> None:
+    """Ensure a sync provider stream is consumed chunk by chunk through the adapter."""
+    memory: InMemoryBackend = InMemoryBackend()
+    agent: AsyncAgent = AsyncAgent(
+        provider=SyncProviderAdapter(EchoProvider(EchoConfig())),
+        memory=SyncMemoryAdapter(memory),
+    )
+
+    async def collect() -> list[str]:
+        return [chunk async for chunk in agent.stream_message("uno dos tres")]
+
+    chunks: list[str] = asyncio.run(collect())
+
+    assert chunks == ["uno ", "dos ", "tres"]
+    assert memory.get_history()[-1].content == "uno dos tres"
+
+
+def test_sync_stream_is_read_by_one_thread_and_closed_early() -> None:
+    provider = EndlessProvider()
+    adapter = SyncProviderAdapter(provider)
+
+    executor = CountingExecutor()
+
+    async def take(count: int) -> list[str]:
+        asyncio.get_running_loop().set_default_executor(executor)
+        stream = adapter.stream_response(Message(role="user", content="Hola"), [])
+        chunks = [await anext(stream) for _ in range(count)]
+        await stream.aclose()
+        return chunks
+
+    assert asyncio.run(take(5)) == ["0 ", "1 ", "2 ", "3 ", "4 "]
+    # The consumer went away: the stream (and its connection) is closed
+    assert provider.closed.wait(timeout=2)
+    assert executor.jobs == 1
+    assert threading.current_thread().name not in provider.threads
+
+
+def test_sync_stream_errors_reach_the_consumer() -> None:
+    provider = EndlessProvider(fail_after=2)
+    adapter = SyncProviderAdapter(provider)
+
+    async def collect() -> list[str]:
+        chunks = []
+        async for chunk in adapter.stream_response(Message(role="user", content="Hola"), []):
+            chunks.append(chunk)
+        return chunks
+
+    with pytest.raises(ProviderError, match="stream broken"):
+        asyncio.run(collect())
+    assert provider.closed.is_set()
+
+
+def test_async_stream_falls_back_to_single_chunk() -> None:
+    """Ensure async providers without native streaming yield the reply once."""
+    agent: AsyncAgent = AsyncAgent(
+        provider=SlowAsyncProvider(delay=0),
+        memory=SyncMemoryAdapter(InMemoryBackend(), offload=False),
+    )
+
+    async def collect() -> list[str]:
+        return [chunk async for chunk in agent.stream_message("Hola")]
+
+    assert asyncio.run(collect()) == ["echo: Hola"]
+
+
+def test_async_agents_serve_sessions_concurrently() -> None:
+    """Ensure hundreds of sessions overlap their provider round trips on one loop."""
+    sessions = 300
+    delay = 0.05
+    provider = SlowAsyncProvider(delay=delay)
+    memories = [InMemoryBackend() for _ in range(sessions)]
+    agents = [
+        AsyncAgent(provider=provider, memory=SyncMemoryAdapter(memory, offload=False))
+        for memory in memories
+    ]
+
+    async def run_all() -> list[str]:
+        return await asyncio.gather(
+            *(agent.handle_message(f"msg {index}") for index, agent in enumerate(agents))
+        )
+
+    start = time.perf_counter()
+    responses = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+
+    assert responses == [f"echo: msg {index}" for index in range(sessions)]
+    assert all(len(memory.get_history()) == 2 for memory in memories)
+    # Serially this would take sessions * delay = 15 seconds
+    assert elapsed < sessions * delay / 10
@@ -0,0 +1,55 @@
+import json
+
+from smartbot.core.codec import MessageCodec, dumps
+from smartbot.core.interfaces import Message
+from smartbot.providers.local_provider import build_chat_payload, encode_chat_payload
+from smartbot.providers.models import OllamaConfig
+
+HISTORY = [
+    Message(role="user", content='Dijo "hola"\ny se fue'),
+    Message(role="assistant", content="¿Quién? ñandú 🐦"),
+    Message(role="user", content="Él"),
+]
+
+
+def test_encoded_body_matches_payload() -> None:
+    """The concatenated body decodes to exactly the payload built as a dict."""
+    config = OllamaConfig(keep_alive="30m")
+    prompt = HISTORY[-1]
+
+    body = encode_chat_payload(config, prompt, HISTORY, stream=True)
+
+    assert json.loads(body) == build_chat_payload(config, prompt, HISTORY, stream=True)
+    assert "ñandú".encode() in body  # UTF-8, not \\u escapes
+
+
+def test_fragments_are_encoded_once() -> None:
+    codec = MessageCodec()
+    first = codec.fragment(HISTORY[0])
+
+    # An equal message (e.g. reloaded from disk) reuses the same encoding
+    again = codec.fragment(Message(role="user", content=HISTORY[0].content))
+
+    assert again is first
+    assert json.loads(first) == HISTORY[0].to_dict()
+    assert codec.as_dict(HISTORY[1]) is codec.as_dict(HISTORY[1])
+
+
+def test_cache_is_bounded() -> None:
+    codec = MessageCodec(max_entries=2)
+    oldest = codec.fragment(HISTORY[0])
+    for message in HISTORY[1:]:
+        codec.fragment(message)
+
+    assert codec.fragment(HISTORY[0]) is not oldest
+
+
+def test_body_without_other_fields() -> None:
+    body = MessageCodec().encode_body({}, "messages", HISTORY[:1])
+
+    assert json.loads(body) == {"messages": [HISTORY[0].to_dict()]}
+    assert json.loads(MessageCodec().encode_body({"a": 1}, "m", [])) == {"a": 1, "m": []}
+
+
+def test_dumps_is_compact() -> None:
+    assert dumps({"a": [1, "é"]}) == '{"a":[1,"é"]}'.encode()
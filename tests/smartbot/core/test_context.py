@@ -0,0 +1,118 @@
+import pytest
+
+from smartbot.core.context import (
+    HeuristicTokenizer,
+    TokenWindow,
+    load_tokenizer,
+)
+from smartbot.core.interfaces import Message
+
+
+class CountingTokenizer:
+    """Test double: one token per word, remembering how often it was called."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+
+def _messages(*contents: str) -> list[Message]:
+    return [Message(role="user", content=content) for content in contents]
+
+
+def test_heuristic_tokenizer_estimates() -> None:
+    """The offline estimate grows with the text and is never zero."""
+    tokenizer = HeuristicTokenizer()
+
+    assert tokenizer.count("a") == 1
+    assert tokenizer.count("hello world, how are you") >= 5
+    assert tokenizer.count("x" * 400) == 100
+
+
+def test_fit_keeps_newest_messages_within_budget() -> None:
+    """Oldest messages are dropped until history and prompt fit the budget."""
+    window = TokenWindow(max_tokens=6, tokenizer=CountingTokenizer(), message_overhead=0)
+    history = _messages("one two three", "four five", "six")
+
+    fitted = window.fit(history, prompt=Message(role="user", content="seven"))
+
+    assert [m.content for m in fitted] == ["four five", "six"]
+
+
+def test_fit_may_drop_everything() -> None:
+    """A prompt that uses the whole budget leaves no room for history."""
+    window = TokenWindow(max_tokens=2, tokenizer=CountingTokenizer(), message_overhead=0)
+
+    fitted = window.fit(_messages("old"), prompt=Message(role="user", content="a b"))
+
+    assert fitted == []
+
+
+def test_prompt_already_in_history_counts_once() -> None:
+    """The agents store the prompt first: it is the last message, and is kept."""
+    window = TokenWindow(max_tokens=6, tokenizer=CountingTokenizer(), message_overhead=0)
+    prompt = Message(role="user", content="seven eight")
+    history = [*_messages("one two", "three", "four five"), prompt]
+
+    fitted = window.fit(history, prompt)
+
+    assert [m.content for m in fitted] == ["three", "four five", "seven eight"]
+
+
+def test_leading_system_messages_are_pinned() -> None:
+    window = TokenWindow(max_tokens=5, tokenizer=CountingTokenizer(), message_overhead=0)
+    history = [
+        Message(role="system", content="be nice"),
+        *_messages("one two three", "four five"),
+    ]
+
+    fitted = window.fit(history, prompt=Message(role="user", content="six"))
+
+    assert [m.content for m in fitted] == ["be nice", "four five"]
+
+
+def test_message_overhead_counts_per_message() -> None:
+    """Each message costs its tokens plus the chat template overhead."""
+    window = TokenWindow(max_tokens=10, tokenizer=CountingTokenizer(), message_overhead=4)
+
+    assert window.count_message(Message(role="user", content="a b")) == 6
+    assert [m.content for m in window.fit(_messages("a", "b", "c"))] == ["b", "c"]
+
+
+def test_token_counts_are_cached() -> None:
+    """Messages already seen are not tokenized again on the next turn."""
+    tokenizer = CountingTokenizer()
+    window = TokenWindow(max_tokens=100, tokenizer=tokenizer)
+    history = _messages("first", "second")
+
+    window.fit(history)
+    window.fit([*history, *_messages("third")])
+
+    assert tokenizer.calls == 3
+
+
+def test_cache_is_bounded() -> None:
+    """The per-message cache evicts the least recently used counts."""
+    tokenizer = CountingTokenizer()
+    window = TokenWindow(max_tokens=100, tokenizer=tokenizer, cache_size=2)
+
+    window.fit(_messages("a", "b", "c"))  # newest first: "c" is evicted by "a"
+    window.fit(_messages("a"))
+    window.fit(_messages("c"))
+
+    assert tokenizer.calls == 4
+
+
+def test_invalid_budget() -> None:
+    """The budget must be positive."""
+    with pytest.raises(ValueError):
+        TokenWindow(max_tokens=0)
+
+
+@pytest.mark.parametrize("name", ["heuristic", "unknown", "tiktoken:not-an-encoding"])
+def test_load_tokenizer_falls_back_to_heuristic(name: str) -> None:
+    """Unknown tokenizers (or a missing tiktoken) fall back to the offline estimate."""
+    assert isinstance(load_tokenizer(name), HeuristicTokenizer)
@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from smartbot.memory.binary_memory import BinaryMemory, read_records
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.jsonl_memory import JsonlMemory
+from smartbot.memory.migrate import main as migrate_main
+from smartbot.memory.migrate import migrate_history
+from smartbot.memory.session_memory import SessionMemory
+
+
+@pytest.fixture
+def journal_limit_3(tmp_path: Path) -> BinaryMemory:
+    """Binary journal with a window of 3 that compacts after 6 records."""
+    return BinaryMemory(file_path=str(tmp_path / "history.bin"), max_messages=3)
+
+
+def _contents(memory: BinaryMemory) -> list[str]:
+    return [m.content for m in memory.get_history()]
+
+
+def test_replay_between_instances(tmp_path: Path) -> None:
+    """A new instance reads back the window, accents and newlines included."""
+    file = tmp_path / "persist.bin"
+    mem1 = BinaryMemory(file_path=str(file), max_messages=2, compact_threshold=10)
+    for content in ["uno", "dos\nlíneas", "tres ñ"]:
+        mem1.add_message("user", content)
+
+    mem2 = BinaryMemory(file_path=str(file), max_messages=2, compact_threshold=10)
+
+    assert _contents(mem2) == ["dos\nlíneas", "tres ñ"]
+    assert [r.content for r in read_records(file)] == ["uno", "dos\nlíneas", "tres ñ"]
+
+
+def test_compaction_applies_window(journal_limit_3: BinaryMemory) -> None:
+    """Once the journal reaches the threshold it is rewritten with the window only."""
+    for index in range(6):
+        journal_limit_3.add_message("user", f"msg{index}")
+
+    assert [r.content for r in read_records(journal_limit_3._file_path)] == [
+        "msg3", "msg4", "msg5",
+    ]
+
+
+def test_long_journal_compacts_on_next_append(tmp_path: Path) -> None:
+    """Loading only decodes the tail; the older records go away with the next append."""
+    file = tmp_path / "long.bin"
+    writer = BinaryMemory(file_path=str(file), max_messages=50, compact_threshold=100)
+    for index in range(40):
+        writer.add_message("user", f"msg{index}")
+
+    reader = BinaryMemory(file_path=str(file), max_messages=3)
+    assert _contents(reader) == ["msg37", "msg38", "msg39"]
+
+    reader.add_message("user", "new")
+
+    assert [r.content for r in read_records(file)] == ["msg38", "msg39", "new"]
+
+
+def test_compression_shrinks_long_messages(tmp_path: Path) -> None:
+    """Long, repetitive messages are stored compressed and read back intact."""
+    text = "El horario de apertura es de 9 a 18 horas. " * 40 + "Gracias."
+    plain = BinaryMemory(file_path=str(tmp_path / "plain.bin"))
+    packed = BinaryMemory(file_path=str(tmp_path / "packed.bin"), compression=True)
+    for memory in (plain, packed):
+        memory.add_message("assistant", text)
+        memory.add_message("user", "Gracias")
+
+    assert packed._file_path.stat().st_size < plain._file_path.stat().st_size / 4
+    assert _contents(BinaryMemory(file_path=str(packed._file_path))) == [text, "Gracias"]
+
+
+def test_torn_tail_is_discarded(tmp_path: Path) -> None:
+    """A record cut by a crash is dropped and the journal rewritten clean."""
+    file = tmp_path / "torn.bin"
+    memory = BinaryMemory(file_path=str(file))
+    memory.add_message("user", "Hola")
+    memory.add_message("assistant", "Buenas")
+    file.write_bytes(file.read_bytes()[:-5])
+
+    recovered = BinaryMemory(file_path=str(file))
+    recovered.add_message("user", "¿Sigues ahí?")
+
+    assert _contents(BinaryMemory(file_path=str(file))) == ["Hola", "¿Sigues ahí?"]
+
+
+def test_corrupt_record_detected_by_checksum(tmp_path: Path) -> None:
+    """A flipped byte in the last record is caught by its checksum."""
+    file = tmp_path / "flipped.bin"
+    memory = BinaryMemory(file_path=str(file))
+    memory.add_message("user", "Hola")
+    memory.add_message("assistant", "Buenas")
+    data = bytearray(file.read_bytes())
+    data[-12] ^= 0xFF
+    file.write_bytes(bytes(data))
+
+    assert _contents(BinaryMemory(file_path=str(file))) == ["Hola"]
+
+
+def test_session_memory_binary_storage(tmp_path: Path) -> None:
+    """Sessions can be stored as binary journals, one .bin file each."""
+    sessions = SessionMemory(directory=str(tmp_path), storage="binary")
+    sessions.add_message("alice", "user", "Hola")
+
+    assert (tmp_path / "alice.bin").exists()
+    assert [m.content for m in sessions.get_history("alice")] == ["Hola"]
+
+
+@pytest.mark.parametrize(("memory_class", "suffix"), [
+    (JsonFileMemory, ".json"),
+    (JsonlMemory, ".jsonl"),
+])
+def test_migrate_history(tmp_path: Path, memory_class: type[JsonFileMemory],
+                         suffix: str) -> None:
+    """JSON and JSONL histories are migrated in order and left untouched."""
+    source = tmp_path / f"history{suffix}"
+    memory = memory_class(file_path=str(source))
+    for content in ["one", "two", "three"]:
+        memory.add_message("user", content)
+    before = source.read_bytes()
+
+    count = migrate_history(source, tmp_path / "history.bin", compression=True)
+
+    assert count == 3
+    assert source.read_bytes() == before
+    migrated = BinaryMemory(file_path=str(tmp_path / "history.bin"))
+    assert _contents(migrated) == ["one", "two", "three"]
+
+
+def test_migrate_cli_folder(tmp_path: Path) -> None:
+    """The command line tool migrates a whole sessions folder."""
+    source = tmp_path / "sessions"
+    SessionMemory(directory=str(source), storage="json").add_message("bob", "user", "Hola")
+
+    assert migrate_main([str(source), str(tmp_path / "binary")]) == 0
+
+    sessions = SessionMemory(directory=str(tmp_path / "binary"), storage="binary")
+    assert [m.content for m in sessions.get_history("bob")] == ["Hola"]
+
+
+def test_migrate_cli_rejects_invalid_source(tmp_path: Path) -> None:
+    source = tmp_path / "broken.json"
+    source.write_text(json.dumps({"not": "a list"}), encoding="utf-8")
+
+    assert migrate_main([str(source), str(tmp_path / "out.bin")]) == 1
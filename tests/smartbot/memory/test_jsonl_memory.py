@@ -0,0 +1,115 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from smartbot.core.interfaces import MemoryError, Message
+from smartbot.memory.jsonl_memory import JsonlMemory
+
+
+@pytest.fixture
+def journal_limit_3(tmp_path: Path) -> JsonlMemory:
+    """Journal with a window of 3 that compacts after 6 lines."""
+    return JsonlMemory(file_path=str(tmp_path / "history.jsonl"), max_messages=3)
+
+
+def _journal_lines(memory: JsonlMemory) -> list[str]:
+    return memory._file_path.read_text(encoding="utf-8").splitlines()
+
+
+def test_add_message_appends_one_line(journal_limit_3: JsonlMemory) -> None:
+    """Each message is a single appended JSON line, the file is never rewritten."""
+    journal_limit_3.add_message("user", "Hola")
+    journal_limit_3.add_message("assistant", "Hola, ¿qué tal?")
+
+    lines = _journal_lines(journal_limit_3)
+
+    assert len(lines) == 2
+    assert Message.model_validate_json(lines[1]).content == "Hola, ¿qué tal?"
+
+
+def test_add_invalid_message_ignored(journal_limit_3: JsonlMemory) -> None:
+    """Defensive Programming: Empty messages should not be journaled."""
+    journal_limit_3.add_message("user", "   ")
+
+    assert journal_limit_3.get_history() == []
+    assert not journal_limit_3._file_path.exists()
+
+
+def test_compaction_applies_window(journal_limit_3: JsonlMemory) -> None:
+    """Once the journal reaches the threshold it is rewritten with the window only."""
+    for index in range(5):
+        journal_limit_3.add_message("user", f"msg{index}")
+
+    assert len(_journal_lines(journal_limit_3)) == 5
+
+    journal_limit_3.add_message("user", "msg5")
+
+    lines = _journal_lines(journal_limit_3)
+    assert [Message.model_validate_json(line).content for line in lines] == [
+        "msg3", "msg4", "msg5",
+    ]
+    assert [m.content for m in journal_limit_3.get_history()] == ["msg3", "msg4", "msg5"]
+
+
+def test_replay_between_instances(tmp_path: Path) -> None:
+    """A new instance replays the journal and keeps only the window."""
+    file = tmp_path / "persist.jsonl"
+    mem1 = JsonlMemory(file_path=str(file), max_messages=2, compact_threshold=10)
+    for content in ["one", "two", "three"]:
+        mem1.add_message("user", content)
+
+    mem2 = JsonlMemory(file_path=str(file), max_messages=2, compact_threshold=10)
+
+    assert [m.content for m in mem2.get_history()] == ["two", "three"]
+
+
+def test_replay_discards_torn_tail(tmp_path: Path) -> None:
+    """A partially written last record (crash mid-append) is dropped and repaired."""
+    file = tmp_path / "torn.jsonl"
+    good = Message(role="user", content="survivor").model_dump_json()
+    file.write_text(f'{good}\n{{"role": "assistant", "cont', encoding="utf-8")
+
+    mem = JsonlMemory(file_path=str(file))
+    mem.add_message("assistant", "after crash")
+
+    assert [m.content for m in mem.get_history()] == ["survivor", "after crash"]
+    assert len(_journal_lines(mem)) == 2
+
+
+def test_replay_skips_corrupt_records(tmp_path: Path) -> None:
+    """Corrupt lines in the middle of the journal are skipped, not fatal."""
+    file = tmp_path / "corrupt.jsonl"
+    first = Message(role="user", content="first").model_dump_json()
+    last = Message(role="user", content="last").model_dump_json()
+    file.write_text(f"{first}\n{{ not json }}\n{last}\n", encoding="utf-8")
+
+    mem = JsonlMemory(file_path=str(file))
+
+    assert [m.content for m in mem.get_history()] == ["first", "last"]
+    assert len(_journal_lines(mem)) == 2
+
+
+def test_clear_deletes_journal(journal_limit_3: JsonlMemory) -> None:
+    """clear() cleans both RAM and the journal on disk."""
+    journal_limit_3.add_message("user", "Delete me")
+
+    journal_limit_3.clear()
+
+    assert journal_limit_3.get_history() == []
+    assert not journal_limit_3._file_path.exists()
+
+
+def test_invalid_compact_threshold(tmp_path: Path) -> None:
+    """The compaction threshold can't be smaller than the window."""
+    with pytest.raises(ValueError):
+        JsonlMemory(file_path=str(tmp_path / "h.jsonl"), max_messages=5, compact_threshold=4)
+
+
+def test_append_io_error_handling(journal_limit_3: JsonlMemory) -> None:
+    """Simulate a disk failure when appending to the journal."""
+    with (
+        patch("pathlib.Path.open", side_effect=OSError("Disk full")),
+        pytest.raises(MemoryError),
+    ):
+        journal_limit_3.add_message("user", "Boom")
@@ -121,3 +121,19 @@ def test_corrupt_json_recovery(tmp_path: Path) -> None:
 
     mem = JsonFileMemory(file_path=str(file))
     assert len(mem.get_history()) == 0 # Should start empty
+
+
+def test_loads_history_written_by_older_versions(tmp_path: Path) -> None:
+    """Records without a timestamp or with a numeric one are kept, not reset."""
+    file = tmp_path / "history.json"
+    legacy = Path(__file__).parents[2] / "fixtures" / "legacy_history.json"
+    file.write_bytes(legacy.read_bytes())
+
+    mem = JsonFileMemory(file_path=str(file))
+    mem.add_message("assistant", "Son las 9:17")
+
+    contents = [message.content for message in JsonFileMemory(file_path=str(file)).get_history()]
+    assert contents == [
+        "Eres un asistente amable.", "Hola, ¿qué tal?", "¡Muy bien! ¿En qué te ayudo?",
+        "Dime la hora", "Son las 9:17",
+    ]
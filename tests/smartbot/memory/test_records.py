@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from smartbot.core.interfaces import Message
+from smartbot.memory.records import MessageRecord
+
+
+def test_create_validates_like_message() -> None:
+    """Records strip the content and reject what Message rejects."""
+    record = MessageRecord.create("user", "  Hola  ")
+
+    assert record.content == "Hola"
+    with pytest.raises(ValueError):
+        MessageRecord.create("user", "   ")
+    with pytest.raises(ValueError):
+        MessageRecord.create("robot", "Hola")
+
+
+def test_round_trip_matches_message_dump() -> None:
+    """to_dict has the shape of Message.model_dump and reads back unchanged."""
+    message = Message(role="assistant", content="Hi", timestamp=datetime(2024, 5, 1, 12, 0, 0, 5))
+
+    record = MessageRecord.from_dict(message.model_dump(mode="json"))
+
+    assert record.to_dict() == message.model_dump(mode="json")
+    assert record.to_message() == message
+
+
+@pytest.mark.parametrize("raw", [
+    ["not", "a", "dict"],
+    {"role": "user", "content": "Hi", "timestamp": "yesterday"},
+    {"role": "user", "content": "  ", "timestamp": "2024-05-01T12:00:00"},
+    {"role": ["user"], "content": "Hi", "timestamp": "2024-05-01T12:00:00"},
+])
+def test_from_dict_rejects_malformed_records(raw: object) -> None:
+    with pytest.raises(ValueError):
+        MessageRecord.from_dict(raw)
+
+
+@pytest.mark.parametrize("raw", [
+    {"role": "user", "content": "Hi"},
+    {"role": "user", "content": "Hi", "timestamp": 1714564800},
+    {"role": "user", "content": "Hi", "timestamp": "1714564800"},
+])
+def test_from_dict_accepts_what_message_accepts(raw: dict[str, object]) -> None:
+    """Records missing the timestamp, or with a non-ISO one, load as Message loads them."""
+    record = MessageRecord.from_dict(raw)
+
+    assert record.content == "Hi"
+    if "timestamp" in raw:
+        assert record.timestamp == Message.model_validate(raw).timestamp
+
+
+def test_message_is_built_once() -> None:
+    """Reading a history twice reuses the converted Message."""
+    record = MessageRecord.create("user", "Hola")
+
+    assert record.to_message() is record.to_message()
+    assert record.to_message().timestamp == record.timestamp
+
+
+def test_records_have_no_instance_dict() -> None:
+    assert not hasattr(MessageRecord.create("user", "Hola"), "__dict__")
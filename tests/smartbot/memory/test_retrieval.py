@@ -0,0 +1,205 @@
+import struct
+from array import array
+from pathlib import Path
+
+import pytest
+
+from smartbot.memory import retrieval
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.retrieval import (
+    HashingEmbedder,
+    OllamaEmbedder,
+    RetrievalMemory,
+    VectorIndex,
+    load_embedder,
+    unit_vector,
+)
+
+FACTS = [
+    "My dog is called Toby and he loves the beach",
+    "I work as a nurse in the night shift",
+    "The meeting with the bank moved to Thursday",
+    "Paella needs bomba rice and saffron",
+]
+
+
+class FlakyEmbedder(HashingEmbedder):
+    """Hashing embedder that raises while ``fail`` is set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fail = False
+        self.calls = 0
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("embedding server down")
+        return super().embed(texts)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def index_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run each test with the NumPy index (when installed) and the pure Python one."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(retrieval, "_load_numpy", lambda: None)
+    return request.param
+
+
+def _memory(tmp_path: Path, embedder: HashingEmbedder | None = None) -> RetrievalMemory:
+    window = JsonFileMemory(file_path=str(tmp_path / "history.json"), max_messages=2)
+    return RetrievalMemory(window, embedder or HashingEmbedder(),
+                           str(tmp_path / "archive.jsonl"), top_k=1)
+
+
+def _contents(memory: RetrievalMemory) -> list[str]:
+    return [message.content for message in memory.get_history()]
+
+
+def test_related_old_message_is_recalled(tmp_path: Path, index_backend: str) -> None:
+    memory = _memory(tmp_path)
+    for fact in FACTS:
+        memory.add_message("user", fact)
+        memory.add_message("assistant", "Noted.")
+
+    memory.add_message("user", "What is the name of my dog?")
+
+    assert len(memory) == 7
+    assert _contents(memory) == [FACTS[0], "Noted.", "What is the name of my dog?"]
+
+
+def test_unrelated_question_recalls_nothing(tmp_path: Path, index_backend: str) -> None:
+    memory = _memory(tmp_path)
+    for fact in FACTS:
+        memory.add_message("user", fact)
+
+    memory.add_message("user", "Hola")
+
+    assert _contents(memory) == [FACTS[3], "Hola"]
+
+
+def test_archive_and_vectors_survive_restart(tmp_path: Path, index_backend: str) -> None:
+    memory = _memory(tmp_path)
+    for fact in FACTS:
+        memory.add_message("user", fact)
+
+    embedder = FlakyEmbedder()
+    restarted = _memory(tmp_path, embedder)
+    restarted.add_message("user", "When is the meeting with the bank?")
+
+    assert embedder.calls == 1  # only the question: the stored vectors were reused
+    assert _contents(restarted)[0] == FACTS[2]
+
+
+def test_failed_embeddings_are_retried(tmp_path: Path, index_backend: str) -> None:
+    """Messages archived while the embedder is down get their vectors later."""
+    embedder = FlakyEmbedder()
+    memory = _memory(tmp_path, embedder)
+    embedder.fail = True
+    for fact in FACTS:
+        memory.add_message("user", fact)
+
+    assert _contents(memory) == FACTS[2:]
+
+    embedder.fail = False
+    memory.add_message("user", "Do I work the night shift?")
+
+    assert _contents(memory) == [FACTS[1], FACTS[3], "Do I work the night shift?"]
+
+
+def test_clear_removes_archive(tmp_path: Path) -> None:
+    memory = _memory(tmp_path)
+    for fact in FACTS:
+        memory.add_message("user", fact)
+
+    memory.clear()
+
+    assert memory.get_history() == []
+    assert len(memory) == 0
+    assert not (tmp_path / "archive.jsonl").exists()
+    assert not (tmp_path / "archive.jsonl.vec").exists()
+
+
+def test_vector_index_top_k(index_backend: str) -> None:
+    index = VectorIndex()
+    embedder = HashingEmbedder(dimensions=64)
+    index.add([unit_vector(v) for v in embedder.embed(["red apple", "blue sky", "red car"])])
+
+    hits = index.search(unit_vector(embedder.embed(["red"])[0]), k=2)
+
+    assert sorted(position for position, _ in hits) == [0, 2]
+    assert hits[0][1] >= hits[1][1]
+
+
+def test_load_embedder() -> None:
+    assert isinstance(load_embedder("hashing"), HashingEmbedder)
+    assert isinstance(load_embedder("ollama:nomic-embed-text"), OllamaEmbedder)
+    with pytest.raises(ValueError, match="Unknown embedder"):
+        load_embedder("word2vec")
+
+
+class ResizedEmbedder:
+    """Embedder without a name whose vector size changes while in use."""
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return HashingEmbedder(self.dimensions).embed(texts)
+
+
+def test_switching_embedder_rebuilds_index(tmp_path: Path, index_backend: str) -> None:
+    memory = _memory(tmp_path, HashingEmbedder(256))
+    for fact in FACTS:
+        memory.add_message("user", fact)
+
+    restarted = _memory(tmp_path, HashingEmbedder(64))
+    restarted.add_message("user", "When is the meeting with the bank?")
+
+    assert _contents(restarted)[0] == FACTS[2]
+    assert b"hashing:64" in (tmp_path / "archive.jsonl.vec").read_bytes()
+
+
+def test_embedder_changing_size_in_use(tmp_path: Path, index_backend: str) -> None:
+    embedder = ResizedEmbedder(256)
+    memory = RetrievalMemory(
+        JsonFileMemory(file_path=str(tmp_path / "history.json"), max_messages=2),
+        embedder, str(tmp_path / "archive.jsonl"), top_k=1,
+    )
+    for fact in FACTS:
+        memory.add_message("user", fact)
+
+    embedder.dimensions = 64
+    # Nothing new to archive: the question itself reveals the new size
+    history = memory.get_history()
+
+    assert [message.content for message in history][-1] == FACTS[3]
+    header = (tmp_path / "archive.jsonl.vec").read_bytes()[:10]
+    assert struct.unpack("<4sIH", header)[1] == 64
+
+
+def test_vectors_without_embedder_name_are_recomputed(tmp_path: Path) -> None:
+    """Files written before the header named the embedder hold no usable vectors."""
+    memory = _memory(tmp_path)
+    for fact in FACTS:
+        memory.add_message("user", fact)
+    (tmp_path / "archive.jsonl.vec").write_bytes(
+        struct.pack("<I", 8) + array("f", [0.5] * 16).tobytes()
+    )
+
+    embedder = FlakyEmbedder()
+    restarted = _memory(tmp_path, embedder)
+    restarted.add_message("user", "When is the meeting with the bank?")
+
+    assert embedder.calls == 2  # the archive again, then the question
+    assert _contents(restarted)[0] == FACTS[2]
+
+
+def test_search_rejects_query_of_other_size(index_backend: str) -> None:
+    index = VectorIndex()
+    index.add([unit_vector(v) for v in HashingEmbedder(64).embed(["red apple"])])
+
+    with pytest.raises(ValueError, match="dimensions"):
+        index.search(unit_vector(HashingEmbedder(32).embed(["red"])[0]), k=1)
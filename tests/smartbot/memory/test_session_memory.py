@@ -0,0 +1,155 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from smartbot.core.interfaces import MemoryBackend, MemoryError
+from smartbot.memory.jsonl_memory import JsonlMemory
+from smartbot.memory.session_memory import SessionMemory
+
+
+@pytest.fixture
+def sessions(tmp_path: Path) -> SessionMemory:
+    """Multi-session memory that keeps at most 2 sessions in RAM."""
+    return SessionMemory(directory=str(tmp_path), max_messages=3, max_hot_sessions=2)
+
+
+def test_sessions_are_isolated(sessions: SessionMemory) -> None:
+    """Messages of one session never leak into another."""
+    sessions.add_message("alice", "user", "Hola")
+    sessions.add_message("bob", "user", "Hello")
+
+    assert [m.content for m in sessions.get_history("alice")] == ["Hola"]
+    assert [m.content for m in sessions.get_history("bob")] == ["Hello"]
+
+
+def test_window_applies_per_session(sessions: SessionMemory) -> None:
+    """Each session keeps its own max_messages window."""
+    for index in range(5):
+        sessions.add_message("alice", "user", f"msg{index}")
+
+    assert [m.content for m in sessions.get_history("alice")] == ["msg2", "msg3", "msg4"]
+
+
+def test_lru_keeps_hot_sessions_bounded(sessions: SessionMemory) -> None:
+    """Old sessions are evicted from RAM but reloaded lazily from disk."""
+    for index in range(10):
+        sessions.add_message(f"user{index}", "user", f"message {index}")
+
+    assert sessions.hot_sessions == 2
+
+    history = sessions.get_history("user0")
+
+    assert [m.content for m in history] == ["message 0"]
+    assert sessions.hot_sessions == 2
+
+
+def test_sessions_persist_between_instances(tmp_path: Path) -> None:
+    """Sessions survive a restart of the backend."""
+    first = SessionMemory(directory=str(tmp_path), storage="json")
+    first.add_message("alice", "user", "I will survive")
+    first.close()
+
+    second = SessionMemory(directory=str(tmp_path), storage="json")
+
+    assert [m.content for m in second.get_history("alice")] == ["I will survive"]
+    assert (tmp_path / "alice.json").exists()
+
+
+def test_clear_only_affects_one_session(sessions: SessionMemory) -> None:
+    """clear() removes a single session from RAM and disk."""
+    sessions.add_message("alice", "user", "bye")
+    sessions.add_message("bob", "user", "stay")
+
+    sessions.clear("alice")
+
+    assert sessions.get_history("alice") == []
+    assert [m.content for m in sessions.get_history("bob")] == ["stay"]
+
+
+def test_session_view_is_a_memory_backend(sessions: SessionMemory) -> None:
+    """session() exposes one conversation through the MemoryBackend interface."""
+    view = sessions.session("alice")
+    view.add_message("user", "Hola")
+
+    assert isinstance(view, MemoryBackend)
+    assert [m.content for m in sessions.get_history("alice")] == ["Hola"]
+
+
+@pytest.mark.parametrize("session_id", ["", "../escape", "a/b", ".hidden", "x" * 200])
+def test_invalid_session_ids_rejected(sessions: SessionMemory, session_id: str) -> None:
+    """Session IDs can't be used to escape the sessions directory."""
+    with pytest.raises(ValueError):
+        sessions.add_message(session_id, "user", "Hola")
+
+
+def test_invalid_limits(tmp_path: Path) -> None:
+    """Limits must be positive and storage known."""
+    with pytest.raises(ValueError):
+        SessionMemory(directory=str(tmp_path), max_hot_sessions=0)
+    with pytest.raises(ValueError):
+        SessionMemory(directory=str(tmp_path), storage="xml")  # type: ignore[arg-type]
+
+
+class FailingFlushMemory(JsonlMemory):
+    """Journal whose flushes fail while ``failing`` is set."""
+
+    failing = True
+
+    def flush(self) -> None:
+        if FailingFlushMemory.failing:
+            raise MemoryError("disk full")
+        super().flush()
+
+
+class SlowFlushMemory(JsonlMemory):
+    """Journal whose flush waits until the test releases it."""
+
+    flushing = threading.Event()
+    release = threading.Event()
+
+    def flush(self) -> None:
+        SlowFlushMemory.flushing.set()
+        SlowFlushMemory.release.wait(timeout=5)
+        super().flush()
+
+
+def test_failed_eviction_keeps_the_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A session whose flush fails stays hot with its buffered messages."""
+    sessions = SessionMemory(directory=str(tmp_path), max_hot_sessions=1, durability="exit")
+    sessions._backend_class = FailingFlushMemory
+    sessions.add_message("alice", "user", "Hola")
+
+    sessions.add_message("bob", "user", "Hello")
+
+    assert sessions.hot_sessions == 2
+    assert [m.content for m in sessions.get_history("alice")] == ["Hola"]
+
+    monkeypatch.setattr(FailingFlushMemory, "failing", False)
+    sessions.add_message("carol", "user", "Hi")
+    assert sessions.hot_sessions == 1
+    reloaded = SessionMemory(directory=str(tmp_path))
+    assert [m.content for m in reloaded.get_history("alice")] == ["Hola"]
+
+
+def test_eviction_does_not_block_other_sessions(tmp_path: Path) -> None:
+    """Flushing an evicted session only holds that session's lock."""
+    sessions = SessionMemory(directory=str(tmp_path), max_hot_sessions=1, durability="exit")
+    sessions._backend_class = SlowFlushMemory
+    sessions.add_message("alice", "user", "Hola")
+    evicting = threading.Thread(target=sessions.add_message, args=("bob", "user", "Hello"))
+    evicting.start()
+    try:
+        assert SlowFlushMemory.flushing.wait(timeout=5)
+
+        other = threading.Thread(target=sessions.add_message, args=("carol", "user", "Hi"))
+        other.start()
+        other.join(timeout=2)
+
+        assert not other.is_alive()
+        assert [m.content for m in sessions.get_history("carol")] == ["Hi"]
+    finally:
+        SlowFlushMemory.release.set()
+        evicting.join()
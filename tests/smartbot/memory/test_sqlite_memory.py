@@ -0,0 +1,165 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from smartbot.core.interfaces import Role
+from smartbot.memory.sqlite_memory import POOL_SIZE, SqliteMemory, SqliteSessionMemory
+
+
+@pytest.fixture
+def sqlite_limit_3(tmp_path: Path) -> SqliteMemory:
+    """SQLite memory with a short limit in a temp folder."""
+    return SqliteMemory(db_path=str(tmp_path / "history.db"), max_messages=3)
+
+
+@pytest.mark.parametrize("role, content", [
+    ("user", "Hello world"),
+    ("assistant", "Response"),
+    ("system", "Instruction"),
+])
+def test_add_valid_message(sqlite_limit_3: SqliteMemory, role: Role, content: str) -> None:
+    """Verify that all valid roles can be stored correctly."""
+    sqlite_limit_3.add_message(role, content)
+    history = sqlite_limit_3.get_history()
+
+    assert len(history) == 1
+    assert history[0].role == role
+    assert history[0].content == content
+
+
+def test_add_invalid_message_ignored(sqlite_limit_3: SqliteMemory) -> None:
+    """Defensive Programming: Empty messages should not be saved."""
+    sqlite_limit_3.add_message("user", "   ")
+    assert sqlite_limit_3.get_history() == []
+
+
+def test_rolling_window_logic(sqlite_limit_3: SqliteMemory, tmp_path: Path) -> None:
+    """The window keeps the newest messages and older rows are deleted."""
+    for content in ["msg1", "msg2", "msg3", "msg4"]:
+        sqlite_limit_3.add_message("user", content)
+
+    assert [m.content for m in sqlite_limit_3.get_history()] == ["msg2", "msg3", "msg4"]
+
+    with sqlite3.connect(tmp_path / "history.db") as connection:
+        (rows,) = connection.execute("SELECT COUNT(*) FROM messages").fetchone()
+    assert rows == 3
+
+
+def test_batched_insert_applies_window_once(sqlite_limit_3: SqliteMemory) -> None:
+    """add_messages stores a batch in one go, skipping invalid entries."""
+    sqlite_limit_3.add_messages([("user", "a"), ("assistant", " "), ("user", "b"),
+                                 ("assistant", "c"), ("user", "d")])
+
+    assert [m.content for m in sqlite_limit_3.get_history()] == ["b", "c", "d"]
+
+
+def test_persistence_between_instances(tmp_path: Path) -> None:
+    """Verify that data persists across bot restarts."""
+    db = str(tmp_path / "persist.db")
+    mem1 = SqliteMemory(db_path=db)
+    mem1.add_message("user", "I will survive")
+    mem1.close()
+
+    mem2 = SqliteMemory(db_path=db)
+
+    assert [m.content for m in mem2.get_history()] == ["I will survive"]
+
+
+def test_wal_mode_enabled(sqlite_limit_3: SqliteMemory, tmp_path: Path) -> None:
+    """The database runs in write-ahead logging mode."""
+    sqlite_limit_3.add_message("user", "Hola")
+
+    with sqlite3.connect(tmp_path / "history.db") as connection:
+        (mode,) = connection.execute("PRAGMA journal_mode").fetchone()
+    assert mode == "wal"
+
+
+def test_sessions_share_database(tmp_path: Path) -> None:
+    """Each session has its own window inside one database."""
+    store = SqliteSessionMemory(db_path=str(tmp_path / "sessions.db"), max_messages=2)
+    for index in range(3):
+        store.add_message("alice", "user", f"alice {index}")
+    store.add_message("bob", "user", "bob 0")
+
+    assert [m.content for m in store.get_history("alice")] == ["alice 1", "alice 2"]
+    assert [m.content for m in store.get_history("bob")] == ["bob 0"]
+
+    store.clear("alice")
+
+    assert store.get_history("alice") == []
+    assert len(store.get_history("bob")) == 1
+
+
+def test_concurrent_writers(tmp_path: Path) -> None:
+    """Several threads can write to different sessions at the same time."""
+    store = SqliteSessionMemory(db_path=str(tmp_path / "sessions.db"), max_messages=50)
+
+    def write(session_id: str) -> None:
+        for index in range(20):
+            store.add_message(session_id, "user", f"{session_id} {index}")
+
+    threads = [threading.Thread(target=write, args=(f"s{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(len(store.get_history(f"s{n}")) == 20 for n in range(4))
+
+
+def test_short_lived_threads_share_pooled_connections(tmp_path: Path) -> None:
+    """A thread per request does not leave one open connection per thread behind."""
+    store = SqliteSessionMemory(db_path=str(tmp_path / "sessions.db"))
+
+    for number in range(20):
+        thread = threading.Thread(target=store.add_message, args=(f"s{number}", "user", "Hola"))
+        thread.start()
+        thread.join()
+
+    assert len(store._idle) <= POOL_SIZE
+
+
+def test_close_does_not_cut_off_borrowed_connections(tmp_path: Path) -> None:
+    store = SqliteSessionMemory(db_path=str(tmp_path / "sessions.db"))
+
+    with store._connection() as connection:
+        store.close()
+        # Still usable by the thread that borrowed it; closed once returned
+        assert connection.execute("SELECT COUNT(*) FROM messages").fetchone() == (0,)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+
+
+def test_write_behind_inserts_turns_together(tmp_path: Path) -> None:
+    """Buffered messages are visible right away and stored in one flush."""
+    db = tmp_path / "sessions.db"
+    store = SqliteSessionMemory(db_path=str(db), max_messages=3, durability="exit")
+    for content in ["uno", "dos", "tres", "cuatro"]:
+        store.add_message("alice", "user", content)
+    store.add_message("bob", "user", "hola")
+
+    assert [m.content for m in store.get_history("alice")] == ["dos", "tres", "cuatro"]
+    with sqlite3.connect(db) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM messages").fetchone() == (0,)
+
+    store.close()
+
+    reopened = SqliteSessionMemory(db_path=str(db), max_messages=3)
+    assert [m.content for m in reopened.get_history("alice")] == ["dos", "tres", "cuatro"]
+    assert [m.content for m in reopened.get_history("bob")] == ["hola"]
+
+
+def test_write_behind_merges_stored_and_pending(tmp_path: Path) -> None:
+    store = SqliteMemory(db_path=str(tmp_path / "history.db"), max_messages=3,
+                         durability="exit")
+    store.add_messages([("user", "a"), ("assistant", "b")])
+    store.flush()
+    store.add_messages([("user", "c"), ("assistant", "d")])
+
+    assert [m.content for m in store.get_history()] == ["b", "c", "d"]
+    store.clear()
+    store.close()
+    assert store.get_history() == []
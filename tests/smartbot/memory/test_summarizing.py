@@ -0,0 +1,118 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from smartbot.core.interfaces import Message
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.summarizing import ProviderSummarizer, SummarizingMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+
+
+class RecordingSummarizer:
+    """Test double that lists the folded messages instead of summarizing them."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str | None, list[str]]] = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def __call__(self, summary: str | None, messages: list[Message]) -> str:
+        self.release.wait()
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        contents = [message.content for message in messages]
+        self.calls.append((summary, contents))
+        return ", ".join(filter(None, [summary, *contents]))
+
+
+@pytest.fixture
+def summarizer() -> RecordingSummarizer:
+    return RecordingSummarizer()
+
+
+def _memory(tmp_path: Path, summarizer: RecordingSummarizer) -> SummarizingMemory:
+    window = JsonFileMemory(file_path=str(tmp_path / "history.json"), max_messages=2)
+    return SummarizingMemory(window, summarizer, str(tmp_path / "history.summary.json"),
+                             summarize_every=2)
+
+
+def test_forgotten_messages_are_folded_into_summary(
+    tmp_path: Path, summarizer: RecordingSummarizer
+) -> None:
+    memory = _memory(tmp_path, summarizer)
+    for index in range(6):
+        memory.add_message("user", f"m{index}")
+    memory.flush()
+
+    history = memory.get_history()
+
+    assert summarizer.calls == [(None, ["m0", "m1"]), ("m0, m1", ["m2", "m3"])]
+    assert history[0].role == "system"
+    assert history[0].content.endswith("m0, m1, m2, m3")
+    assert [message.content for message in history[1:]] == ["m4", "m5"]
+
+
+def test_pending_messages_stay_in_history(
+    tmp_path: Path, summarizer: RecordingSummarizer
+) -> None:
+    """While the summary is being written nothing is lost and the turn does not wait."""
+    summarizer.release.clear()
+    memory = _memory(tmp_path, summarizer)
+    for index in range(4):
+        memory.add_message("user", f"m{index}")
+
+    assert [message.content for message in memory.get_history()] == ["m0", "m1", "m2", "m3"]
+
+    summarizer.release.set()
+    memory.flush()
+    assert [message.content for message in memory.get_history()][1:] == ["m2", "m3"]
+
+
+def test_summary_survives_restart(tmp_path: Path, summarizer: RecordingSummarizer) -> None:
+    memory = _memory(tmp_path, summarizer)
+    for index in range(5):
+        memory.add_message("user", f"m{index}")
+    memory.close()
+
+    reloaded = _memory(tmp_path, summarizer)
+
+    assert reloaded.summary == "m0, m1"
+    assert [message.content for message in reloaded.get_history()][1:] == ["m2", "m3", "m4"]
+
+
+def test_failed_summary_keeps_messages_pending(
+    tmp_path: Path, summarizer: RecordingSummarizer
+) -> None:
+    summarizer.fail = True
+    memory = _memory(tmp_path, summarizer)
+    for index in range(4):
+        memory.add_message("user", f"m{index}")
+    memory.flush()
+
+    assert memory.summary is None
+    assert [message.content for message in memory.get_history()] == ["m0", "m1", "m2", "m3"]
+
+
+def test_clear_removes_summary(tmp_path: Path, summarizer: RecordingSummarizer) -> None:
+    memory = _memory(tmp_path, summarizer)
+    for index in range(4):
+        memory.add_message("user", f"m{index}")
+    memory.flush()
+
+    memory.clear()
+
+    assert memory.get_history() == []
+    assert not (tmp_path / "history.summary.json").exists()
+
+
+def test_provider_summarizer_sends_transcript() -> None:
+    """EchoProvider returns the prompt, which must carry the summary and the messages."""
+    summarize = ProviderSummarizer(EchoProvider(EchoConfig()))
+
+    prompt = summarize("Alice likes tea", [Message(role="user", content="I also like coffee")])
+
+    assert "Alice likes tea" in prompt
+    assert "user: I also like coffee" in prompt
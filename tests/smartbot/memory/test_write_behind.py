@@ -0,0 +1,115 @@
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from smartbot.core.interfaces import MemoryError
+from smartbot.memory import write_behind
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.memory.jsonl_memory import JsonlMemory
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _stored(path: Path) -> list[str]:
+    return [message.content for message in JsonFileMemory(file_path=str(path)).get_history()]
+
+
+def test_exit_mode_writes_only_on_flush(tmp_path: Path) -> None:
+    path = tmp_path / "history.json"
+    memory = JsonFileMemory(file_path=str(path), durability="exit")
+
+    memory.add_message("user", "Hola")
+    memory.add_message("assistant", "¿Qué tal?")
+    assert not path.exists()
+
+    memory.close()
+    assert _stored(path) == ["Hola", "¿Qué tal?"]
+
+
+def test_batched_mode_flushes_after_interval(tmp_path: Path) -> None:
+    path = tmp_path / "history.json"
+    memory = JsonFileMemory(file_path=str(path), durability="batched", flush_interval=0.05)
+
+    memory.add_message("user", "Hola")
+
+    assert _wait_for(path.exists)
+    assert _stored(path) == ["Hola"]
+
+
+def test_batched_mode_flushes_when_buffer_is_full(tmp_path: Path) -> None:
+    """flush_every triggers the write right away, without waiting for the interval."""
+    path = tmp_path / "history.jsonl"
+    memory = JsonlMemory(file_path=str(path), durability="batched",
+                         flush_interval=60, flush_every=3)
+
+    for index in range(3):
+        memory.add_message("user", f"m{index}")
+
+    assert _wait_for(lambda: path.exists() and len(path.read_text().splitlines()) == 3)
+
+
+def test_failed_flush_keeps_messages_buffered(tmp_path: Path) -> None:
+    path = tmp_path / "history.json"
+    memory = JsonFileMemory(file_path=str(path), durability="exit")
+    memory.add_message("user", "Hola")
+
+    with patch("pathlib.Path.write_bytes", side_effect=OSError("Disk full")), \
+            pytest.raises(MemoryError):
+        memory.flush()
+
+    memory.flush()
+    assert _stored(path) == ["Hola"]
+
+
+def test_flusher_survives_unexpected_errors(tmp_path: Path) -> None:
+    """A backend whose flush raises anything does not stop the shared flusher."""
+
+    class BrokenBackend:
+        def flush(self) -> None:
+            raise TypeError("bug")
+
+    broken = BrokenBackend()
+    write_behind.schedule(broken, 0)
+    path = tmp_path / "history.json"
+    memory = JsonFileMemory(file_path=str(path), durability="batched", flush_interval=0.05)
+    memory.add_message("user", "Hola")
+
+    assert _wait_for(path.exists)
+    write_behind.untrack(broken)
+
+
+def test_save_is_atomic(tmp_path: Path) -> None:
+    """A failure while writing leaves the previous file untouched."""
+    path = tmp_path / "history.json"
+    memory = JsonFileMemory(file_path=str(path))
+    memory.add_message("user", "Hola")
+
+    with patch("pathlib.Path.replace", side_effect=OSError("Crash")), \
+            pytest.raises(MemoryError):
+        memory.add_message("user", "Adiós")
+
+    assert _stored(path) == ["Hola"]
+
+
+def test_pending_writes_are_flushed_at_exit(tmp_path: Path) -> None:
+    path = tmp_path / "history.json"
+    memory = JsonFileMemory(file_path=str(path), durability="exit")
+    memory.add_message("user", "Hola")
+
+    write_behind._flush_at_exit()
+
+    assert _stored(path) == ["Hola"]
+
+
+def test_invalid_durability() -> None:
+    with pytest.raises(ValueError):
+        JsonFileMemory(durability="never")  # type: ignore[arg-type]
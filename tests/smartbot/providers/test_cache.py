@@ -0,0 +1,136 @@
+from pathlib import Path
+
+import pytest
+
+from smartbot.core.interfaces import LLMProvider, Message
+from smartbot.providers.cache import CachingProvider, request_key
+from smartbot.providers.models import EchoConfig, OllamaConfig
+
+
+class CountingProvider(LLMProvider):
+    """Test double that counts upstream calls."""
+
+    def __init__(self, temperature: float = 0.0) -> None:
+        self.config = OllamaConfig(model_name="llama3", temperature=temperature)
+        self.calls = 0
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.calls += 1
+        return Message(role="assistant", content=f"reply {self.calls}")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+PROMPT = Message(role="user", content="What are your opening hours?")
+
+
+def test_request_key_ignores_timestamps() -> None:
+    """Equal conversations hash equally, whatever their timestamps."""
+    config = OllamaConfig()
+    first = request_key(config, PROMPT, [])
+    second = request_key(config, Message(role="user", content=PROMPT.content), [])
+
+    assert first == second
+    assert first != request_key(OllamaConfig(temperature=0.1), PROMPT, [])
+    assert first != request_key(OllamaConfig(model_name="other"), PROMPT, [])
+    assert first != request_key(EchoConfig(), PROMPT, [])
+
+
+def test_identical_requests_hit_the_cache() -> None:
+    """With temperature 0 the second identical request skips the provider."""
+    upstream = CountingProvider()
+    provider = CachingProvider(upstream)
+
+    first = provider.generate_response(PROMPT, [])
+    second = provider.generate_response(PROMPT, [])
+
+    assert upstream.calls == 1
+    assert first.content == second.content
+    assert provider.stats.hits == 1
+    assert provider.stats.misses == 1
+
+
+def test_sampling_temperature_bypasses_cache() -> None:
+    """Replies are not cached when the provider samples, unless opted in."""
+    upstream = CountingProvider(temperature=0.7)
+    provider = CachingProvider(upstream)
+
+    provider.generate_response(PROMPT, [])
+    provider.generate_response(PROMPT, [])
+
+    assert upstream.calls == 2
+    assert provider.stats.bypassed == 2
+
+    opted_in = CachingProvider(upstream, always=True)
+    opted_in.generate_response(PROMPT, [])
+    opted_in.generate_response(PROMPT, [])
+
+    assert upstream.calls == 3
+
+
+def test_entries_expire_after_ttl() -> None:
+    """An entry older than the TTL is fetched again."""
+    clock = FakeClock()
+    upstream = CountingProvider()
+    provider = CachingProvider(upstream, ttl_seconds=10, clock=clock)
+
+    provider.generate_response(PROMPT, [])
+    clock.now += 11
+    provider.generate_response(PROMPT, [])
+
+    assert upstream.calls == 2
+
+
+def test_lru_eviction() -> None:
+    """The least recently used entry is evicted when the cache is full."""
+    upstream = CountingProvider()
+    provider = CachingProvider(upstream, max_entries=1)
+
+    provider.generate_response(PROMPT, [])
+    provider.generate_response(Message(role="user", content="Other"), [])
+    provider.generate_response(PROMPT, [])
+
+    assert upstream.calls == 3
+    assert provider.stats.evictions == 2
+
+
+def test_disk_tier_survives_restart(tmp_path: Path) -> None:
+    """Replies stored on disk are served by a new cache instance."""
+    upstream = CountingProvider()
+    CachingProvider(upstream, disk_dir=str(tmp_path)).generate_response(PROMPT, [])
+
+    restarted = CachingProvider(upstream, disk_dir=str(tmp_path))
+    reply = restarted.generate_response(PROMPT, [])
+
+    assert reply.content == "reply 1"
+    assert upstream.calls == 1
+    assert restarted.stats.disk_hits == 1
+
+    restarted.clear()
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_stream_is_cached_once_complete() -> None:
+    """A finished stream is replayed from the cache as a single chunk."""
+    upstream = CountingProvider()
+    provider = CachingProvider(upstream)
+
+    assert list(provider.stream_response(PROMPT, [])) == ["reply 1"]
+    assert list(provider.stream_response(PROMPT, [])) == ["reply 1"]
+    assert upstream.calls == 1
+
+
+def test_invalid_settings() -> None:
+    with pytest.raises(ValueError):
+        CachingProvider(CountingProvider(), max_entries=0)
+    with pytest.raises(ValueError):
+        CachingProvider(CountingProvider(), ttl_seconds=0)
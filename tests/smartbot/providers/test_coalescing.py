@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from smartbot.core.interfaces import AsyncLLMProvider, LLMProvider, Message
+from smartbot.providers.coalescing import AsyncCoalescingProvider, CoalescingProvider
+from smartbot.providers.models import OllamaConfig
+
+DELAY = 0.2
+PROMPT = Message(role="user", content="Hola")
+
+
+class SlowProvider(LLMProvider):
+    """Test double that simulates a slow model and counts upstream calls."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.config = OllamaConfig()
+        self.calls = 0
+        self.fail = fail
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.calls += 1
+        time.sleep(DELAY)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return Message(role="assistant", content=f"echo: {prompt.content}")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class SlowAsyncProvider(AsyncLLMProvider):
+    def __init__(self) -> None:
+        self.config = OllamaConfig()
+        self.calls = 0
+
+    async def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.calls += 1
+        await asyncio.sleep(DELAY)
+        return Message(role="assistant", content=f"echo: {prompt.content}")
+
+
+def _concurrently(provider: CoalescingProvider, prompts: list[Message]) -> list[object]:
+    results: list[object] = [None] * len(prompts)
+
+    def call(index: int) -> None:
+        try:
+            results[index] = provider.generate_response(prompts[index], []).content
+        except RuntimeError as error:
+            results[index] = error
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_share_one_call() -> None:
+    upstream = SlowProvider()
+    provider = CoalescingProvider(upstream)
+
+    start = time.perf_counter()
+    results = _concurrently(provider, [PROMPT] * 10)
+    elapsed = time.perf_counter() - start
+
+    assert results == ["echo: Hola"] * 10
+    assert upstream.calls == 1
+    assert provider.stats.coalesced == 9
+    assert elapsed < DELAY * 3
+
+
+def test_different_requests_are_not_coalesced() -> None:
+    upstream = SlowProvider()
+    provider = CoalescingProvider(upstream)
+
+    results = _concurrently(provider, [PROMPT, Message(role="user", content="Adiós")])
+
+    assert results == ["echo: Hola", "echo: Adiós"]
+    assert upstream.calls == 2
+
+
+def test_finished_requests_are_not_remembered() -> None:
+    upstream = SlowProvider()
+    provider = CoalescingProvider(upstream)
+
+    provider.generate_response(PROMPT, [])
+    provider.generate_response(PROMPT, [])
+
+    assert upstream.calls == 2
+
+
+def test_waiters_share_the_failure() -> None:
+    upstream = SlowProvider(fail=True)
+    provider = CoalescingProvider(upstream)
+
+    results = _concurrently(provider, [PROMPT] * 3)
+
+    assert upstream.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_async_identical_requests_share_one_call() -> None:
+    upstream = SlowAsyncProvider()
+    provider = AsyncCoalescingProvider(upstream)
+
+    async def run() -> list[Message]:
+        return await asyncio.gather(*(provider.generate_response(PROMPT, []) for _ in range(10)))
+
+    replies = asyncio.run(run())
+
+    assert [reply.content for reply in replies] == ["echo: Hola"] * 10
+    assert upstream.calls == 1
+    assert provider.stats.coalesced == 9
+
+
+def test_async_cancelled_waiter_does_not_cancel_the_call() -> None:
+    upstream = SlowAsyncProvider()
+    provider = AsyncCoalescingProvider(upstream)
+
+    async def run() -> Message:
+        first = asyncio.ensure_future(provider.generate_response(PROMPT, []))
+        second = asyncio.ensure_future(provider.generate_response(PROMPT, []))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()).content == "echo: Hola"
+    assert upstream.calls == 1
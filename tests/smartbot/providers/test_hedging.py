@@ -0,0 +1,200 @@
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from smartbot.core.interfaces import LLMProvider, Message, ProviderError
+from smartbot.providers.hedging import HedgingProvider, LatencyTracker
+from smartbot.providers.models import HedgingConfig, OllamaConfig
+from smartbot.utils.metrics import InMemoryMetrics, set_metrics
+
+PROMPT = Message(role="user", content="Hola")
+FAST = 0.005
+SLOW = 0.5
+
+
+class ScriptedProvider(LLMProvider):
+    """Stub streaming two chunks after the delay scripted for each call."""
+
+    def __init__(self, delays: list[float], default: float = FAST) -> None:
+        self.config = OllamaConfig()
+        self._delays = delays
+        self._default = default
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.fail = False
+        self.abandoned = threading.Semaphore(0)
+        self.threads: set[str] = set()
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        with self._lock:
+            self.calls += 1
+            self.threads.add(threading.current_thread().name)
+            delay = self._delays.pop(0) if self._delays else self._default
+        time.sleep(delay)
+        if self.fail:
+            raise ProviderError("backend down")
+        finished = False
+        try:
+            yield "Hola"
+            yield " mundo"
+            finished = True
+        finally:
+            if not finished:
+                self.abandoned.release()
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        return Message(role="assistant", content="".join(self.stream_response(prompt, history)))
+
+    def validate_config(self) -> bool:
+        return True
+
+
+def _hedging(provider: ScriptedProvider, **settings: float) -> HedgingProvider:
+    hedging = HedgingProvider(provider, HedgingConfig(enabled=True, min_samples=5, **settings))
+    for _ in range(5):
+        hedging.generate_response(PROMPT, [])
+    return hedging
+
+
+def test_slow_request_is_hedged_and_loser_cancelled() -> None:
+    provider = ScriptedProvider([FAST] * 5 + [SLOW])
+    hedging = _hedging(provider)
+
+    start = time.monotonic()
+    reply = hedging.generate_response(PROMPT, [])
+
+    assert time.monotonic() - start < SLOW / 2
+    assert reply.content == "Hola mundo"
+    assert (hedging.stats.hedged, hedging.stats.hedge_wins) == (1, 1)
+    assert hedging.stats.saved_seconds >= 0
+    # The slow copy is closed as soon as its first chunk shows up
+    assert provider.abandoned.acquire(timeout=2 * SLOW)
+
+
+def test_no_hedge_before_min_samples() -> None:
+    """Without enough measured requests there is no percentile to hedge on."""
+    hedging = HedgingProvider(ScriptedProvider([SLOW]), HedgingConfig(enabled=True))
+
+    start = time.monotonic()
+    hedging.generate_response(PROMPT, [])
+
+    assert time.monotonic() - start >= SLOW
+    assert hedging.stats.hedged == 0
+
+
+def test_requests_run_on_the_calling_thread_until_they_can_be_hedged() -> None:
+    provider = ScriptedProvider([])
+    hedging = HedgingProvider(provider, HedgingConfig(enabled=True, min_samples=5))
+
+    for _ in range(3):
+        hedging.generate_response(PROMPT, [])
+        assert list(hedging.stream_response(PROMPT, [])) == ["Hola", " mundo"]
+
+    assert provider.threads == {threading.current_thread().name}
+
+
+class BlockingProvider(LLMProvider):
+    """Provider without native streaming: a call can't be stopped once sent."""
+
+    def __init__(self, delays: list[float]) -> None:
+        self.config = OllamaConfig()
+        self._delays = delays
+        self.calls = 0
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.calls += 1
+        time.sleep(self._delays.pop(0) if self._delays else FAST)
+        return Message(role="assistant", content="Hola")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+def test_blocking_provider_is_not_hedged() -> None:
+    """The losing copy could not be cancelled, so hedging would only double the load."""
+    provider = BlockingProvider([FAST] * 5 + [SLOW])
+    hedging = HedgingProvider(provider, HedgingConfig(enabled=True, min_samples=5))
+
+    for _ in range(6):
+        hedging.generate_response(PROMPT, [])
+
+    assert hedging.stats.hedged == 0
+    assert provider.calls == 6
+
+
+def test_hedges_stay_within_budget() -> None:
+    """A backend slow for everyone gets about max_extra_load more requests, not twice as many."""
+    provider = ScriptedProvider([FAST] * 5, default=0.02)
+    hedging = _hedging(provider, max_extra_load=0.05)
+
+    for _ in range(40):
+        hedging.generate_response(PROMPT, [])
+
+    # One hedge of initial credit plus 0.05 per request
+    assert hedging.stats.hedged <= 1 + 0.05 * hedging.stats.requests
+    assert provider.calls == hedging.stats.requests + hedging.stats.hedged
+
+
+def test_stream_hedges_on_first_chunk() -> None:
+    provider = ScriptedProvider([])
+    hedging = _hedging(provider)
+    # The first stream has no samples of its own yet: warm them up too
+    for _ in range(5):
+        list(hedging.stream_response(PROMPT, []))
+    provider._delays.append(SLOW)
+
+    start = time.monotonic()
+    chunks = list(hedging.stream_response(PROMPT, []))
+
+    assert time.monotonic() - start < SLOW / 2
+    assert chunks == ["Hola", " mundo"]
+    assert hedging.stats.hedge_wins == 1
+
+
+def test_error_without_hedge_is_raised() -> None:
+    provider = ScriptedProvider([])
+    hedging = _hedging(provider)
+    provider.fail = True
+
+    with pytest.raises(ProviderError, match="backend down"):
+        hedging.generate_response(PROMPT, [])
+    with pytest.raises(ProviderError, match="backend down"):
+        list(hedging.stream_response(PROMPT, []))
+
+
+def test_metrics_report_hedge_rate_and_savings() -> None:
+    metrics = InMemoryMetrics()
+    set_metrics(metrics)
+    try:
+        hedging = _hedging(ScriptedProvider([FAST] * 5 + [SLOW]))
+        hedging.generate_response(PROMPT, [])
+    finally:
+        set_metrics(None)
+
+    assert metrics.counter("hedging_requests_total") == 6
+    assert metrics.counter("hedging_hedges_total", result="sent") == 1
+    assert metrics.counter("hedging_wins_total", attempt="hedge") == 1
+    assert metrics.histogram("hedging_saved_seconds") is not None
+
+
+def test_latency_tracker() -> None:
+    tracker = LatencyTracker()
+    for seconds in [0.1, 0.2, 0.3, 0.4, 1.0]:
+        tracker.add(seconds)
+
+    assert tracker.percentile(0.5) == 0.3
+    assert tracker.percentile(0.99) == 1.0
+    assert tracker.expected_remaining(0.35) == pytest.approx(0.35)
+    assert tracker.expected_remaining(2.0) == 0.0
+
+
+def test_latency_tracker_forgets_oldest_samples() -> None:
+    tracker = LatencyTracker(samples=3)
+    for seconds in [5.0, 0.3, 0.1, 0.2]:
+        tracker.add(seconds)
+
+    assert len(tracker) == 3
+    assert tracker.percentile(0.99) == 0.3
+    assert tracker.percentile(0.0) == 0.1
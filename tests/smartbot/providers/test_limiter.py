@@ -0,0 +1,248 @@
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from smartbot.core.interfaces import LLMProvider, Message, ProviderOverloadedError
+from smartbot.providers.limiter import AdaptiveLimit, AdmissionProvider, TokenBucket
+from smartbot.providers.models import AdmissionConfig, OllamaConfig
+
+PROMPT = Message(role="user", content="Hola")
+# The thrashing model: requests beyond CAPACITY slow every other one down
+CAPACITY = 4
+BASE_LATENCY = 0.02
+CLIENTS = 32
+RUN_SECONDS = 1.0
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ThrashingProvider(LLMProvider):
+    """Stub whose latency grows with the square of the requests over its capacity.
+
+    Like a model server swapping KV caches, it gets slower overall when
+    pushed past its capacity instead of just queueing.
+    """
+
+    def __init__(self) -> None:
+        self.config = OllamaConfig()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            excess = max(0, self.in_flight - CAPACITY)
+        time.sleep(BASE_LATENCY * (1 + (excess / CAPACITY) ** 2))
+        with self._lock:
+            self.in_flight -= 1
+        return Message(role="assistant", content="ok")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class GatedProvider(LLMProvider):
+    """Stub holding every request until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.config = OllamaConfig()
+        self.release = threading.Event()
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.release.wait(timeout=5)
+        return Message(role="assistant", content="ok")
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        self.release.wait(timeout=5)
+        yield "o"
+        yield "k"
+
+    def validate_config(self) -> bool:
+        return True
+
+
+def _throughput(provider: LLMProvider) -> tuple[float, int]:
+    """Replies per second of CLIENTS threads calling in a loop, and the rejections."""
+    deadline = time.monotonic() + RUN_SECONDS
+    done = [0] * CLIENTS
+    rejected = [0] * CLIENTS
+
+    def client(index: int) -> None:
+        while time.monotonic() < deadline:
+            try:
+                provider.generate_response(PROMPT, [])
+            except ProviderOverloadedError:
+                rejected[index] += 1
+            else:
+                done[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / (time.monotonic() - start), sum(rejected)
+
+
+def test_throughput_stays_stable_under_overload() -> None:
+    """Past its capacity the stub collapses; admission control keeps it near its best rate."""
+    unlimited, _ = _throughput(ThrashingProvider())
+    limited_provider = AdmissionProvider(ThrashingProvider(), AdmissionConfig())
+    limited, rejected = _throughput(limited_provider)
+
+    best = CAPACITY / BASE_LATENCY
+    assert limited > 3 * unlimited
+    assert limited > best / 2
+    assert rejected == 0
+    assert limited_provider.limit <= 2 * CAPACITY
+
+
+def test_adaptive_limit_backs_off_once_per_episode() -> None:
+    clock = FakeClock()
+    limit = AdaptiveLimit(AdmissionConfig(initial_limit=8), clock=clock)
+    limit.update(started=0.0, latency=0.1)
+    clock.now = 1.0
+
+    limit.update(started=0.5, latency=0.5)
+    limit.update(started=0.6, latency=0.5)  # sent before the cut: already accounted for
+    assert limit.value == 4
+
+    for _ in range(8):
+        limit.update(started=2.0, latency=0.1)
+    assert limit.value == 5  # about one more per round trip of 4 requests
+
+
+def test_adaptive_limit_stays_within_bounds() -> None:
+    limit = AdaptiveLimit(AdmissionConfig(initial_limit=2, min_limit=2, max_limit=3))
+    limit.update(started=0.0, latency=0.1)
+    for started in range(1, 10):
+        limit.update(started=float(started), latency=1.0)
+    assert limit.value == 2
+
+    for _ in range(50):
+        limit.update(started=100.0, latency=0.1)
+    assert limit.value == 3
+
+
+def test_token_bucket_reserves_and_refunds() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert [bucket.reserve(timeout=1) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    assert bucket.reserve(timeout=1) is None  # would wait 1.5 s: the token is given back
+
+    clock.now = 1.0
+    assert bucket.reserve(timeout=1) == 0.5
+
+    bucket.refund()
+    assert bucket.reserve(timeout=1) == 0.5
+
+
+def test_rate_limit_rejects_beyond_queue_timeout() -> None:
+    provider = AdmissionProvider(GatedProvider(),
+                                 AdmissionConfig(rate=1, burst=1, queue_timeout=0))
+    provider._provider.release.set()
+
+    provider.generate_response(PROMPT, [])
+    with pytest.raises(ProviderOverloadedError, match="rate"):
+        provider.generate_response(PROMPT, [])
+
+
+def _saturate(provider: AdmissionProvider, count: int) -> list[threading.Thread]:
+    threads = [
+        threading.Thread(target=provider.generate_response, args=(PROMPT, []))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    while provider.in_flight < count:
+        time.sleep(0.001)
+    return threads
+
+
+def test_full_queue_is_rejected_at_once() -> None:
+    upstream = GatedProvider()
+    provider = AdmissionProvider(upstream, AdmissionConfig(initial_limit=1, max_queue=0))
+    threads = _saturate(provider, 1)
+
+    start = time.monotonic()
+    with pytest.raises(ProviderOverloadedError, match="queue_full"):
+        provider.generate_response(PROMPT, [])
+    assert time.monotonic() - start < 0.1
+
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+    assert provider.stats.rejected == 1
+    assert provider.in_flight == 0
+
+
+def test_shed_requests_give_their_rate_token_back() -> None:
+    """A request rejected for a full queue was never sent, so it costs no rate token."""
+    upstream = GatedProvider()
+    provider = AdmissionProvider(
+        upstream,
+        AdmissionConfig(rate=1, burst=2, initial_limit=1, max_queue=0, queue_timeout=0),
+        clock=FakeClock(),
+    )
+    threads = _saturate(provider, 1)
+    for _ in range(3):
+        with pytest.raises(ProviderOverloadedError, match="queue_full"):
+            provider.generate_response(PROMPT, [])
+
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+    # The clock never moved: only the token of the admitted request is spent
+    assert provider.generate_response(PROMPT, []).content == "ok"
+
+
+def test_queued_request_times_out() -> None:
+    upstream = GatedProvider()
+    provider = AdmissionProvider(upstream, AdmissionConfig(initial_limit=1, queue_timeout=0.05))
+    threads = _saturate(provider, 1)
+
+    with pytest.raises(ProviderOverloadedError, match="timeout"):
+        provider.generate_response(PROMPT, [])
+
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_queued_request_runs_when_a_slot_frees() -> None:
+    upstream = GatedProvider()
+    provider = AdmissionProvider(upstream, AdmissionConfig(initial_limit=1))
+    threads = _saturate(provider, 1)
+
+    threading.Timer(0.05, upstream.release.set).start()
+    reply = provider.generate_response(PROMPT, [])
+
+    for thread in threads:
+        thread.join()
+    assert reply.content == "ok"
+    assert provider.stats.admitted == 2
+
+
+def test_stream_holds_its_slot_until_closed() -> None:
+    upstream = GatedProvider()
+    upstream.release.set()
+    provider = AdmissionProvider(upstream, AdmissionConfig(initial_limit=1))
+
+    chunks = provider.stream_response(PROMPT, [])
+    assert next(chunks) == "o"
+    assert provider.in_flight == 1
+
+    chunks.close()
+    assert provider.in_flight == 0
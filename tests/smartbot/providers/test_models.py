@@ -3,6 +3,7 @@ from pydantic import SecretStr, ValidationError
 
 from smartbot.providers.models import (
     BaseConfig,
+    CacheConfig,
     ChatBotConfig,
     OllamaConfig,
     OpenAIConfig,
@@ -82,3 +83,64 @@ def test_chatbot_config_invalid_provider():
     }
     with pytest.raises(ValidationError) :
         ChatBotConfig(**data)
+
+def test_ollama_config_connection_defaults():
+    """Verify the connection pool defaults for Ollama."""
+    config = OllamaConfig()
+    assert config.http_keep_alive
+    assert config.pool_maxsize >= 1
+    assert config.connect_timeout < config.read_timeout
+
+@pytest.mark.parametrize("param, value", [
+    ("pool_maxsize", 0),
+    ("connect_timeout", 0),
+    ("max_retries", -1),
+])
+def test_ollama_config_invalid_connection_settings(param:str, value:float):
+    """Verify that throw error if connection settings are out of range."""
+    with pytest.raises(ValidationError):
+        OllamaConfig(**{param: value})
+
+def test_chatbot_config_memory_defaults():
+    """Without a 'memory' section the bot keeps using history.json."""
+    config = ChatBotConfig(bot_name="TestBot", llm={"provider": "echo"})
+    assert config.memory.backend == "json"
+    assert config.memory.file_path == "history.json"
+    assert config.memory.max_messages == 10
+    assert config.memory.sessions_dir is None
+
+def test_chatbot_config_memory_sessions():
+    """A 'memory' section can enable the session-keyed storage."""
+    config = ChatBotConfig(
+        bot_name="TestBot",
+        llm={"provider": "echo"},
+        memory={"backend": "jsonl", "sessions_dir": "sessions", "max_hot_sessions": 50},
+    )
+    assert config.memory.sessions_dir == "sessions"
+    assert config.memory.max_hot_sessions == 50
+
+def test_chatbot_config_memory_sqlite():
+    """SQLite is one of the memory backends."""
+    config = ChatBotConfig(
+        bot_name="TestBot", llm={"provider": "echo"}, memory={"backend": "sqlite"}
+    )
+    assert config.memory.backend == "sqlite"
+
+def test_context_token_budget_per_provider():
+    """Token budgets are opt-in: without one the whole window is sent."""
+    assert OllamaConfig().context_tokens is None
+    assert OpenAIConfig(api_key=SecretStr("sk")).context_tokens is None
+    assert OpenAIConfig(api_key=SecretStr("sk")).tokenizer.startswith("tiktoken:")
+    assert OllamaConfig(context_tokens=8000).context_tokens == 8000
+    with pytest.raises(ValidationError):
+        OllamaConfig(context_tokens=0)
+
+
+def test_cache_config_defaults_to_disabled() -> None:
+    """The response cache is opt-in and validates its limits."""
+    config = ChatBotConfig(bot_name="Bot", llm={"provider": "echo"})
+
+    assert config.cache.enabled is False
+    assert config.cache.always is False
+    with pytest.raises(ValidationError):
+        CacheConfig(max_entries=0)
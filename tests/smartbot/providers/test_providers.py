@@ -1,13 +1,23 @@
+import asyncio
+import json
 from datetime import datetime
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
+import httpx
 import pytest
+import requests
 
 from smartbot.core.interfaces import Message
+from smartbot.memory.in_memory import InMemoryBackend
 from smartbot.providers.echo_provider import EchoProvider, OllamaConfig
-from smartbot.providers.local_provider import OllamaProvider
+from smartbot.providers.local_provider import (
+    AsyncOllamaProvider,
+    OllamaProvider,
+    build_chat_payload,
+    build_session,
+)
 from smartbot.providers.models import EchoConfig
-from smartbot.providers.openai_provider import OpenaiProvider
+from smartbot.providers.openai_provider import AsyncOpenaiProvider, OpenaiProvider
 
 
 @pytest.fixture
@@ -48,7 +58,23 @@ def test_generate_response(
     assert result.content == "Test response"
 
 
-@patch('requests.post')
+
+def test_openai_does_not_repeat_stored_prompt(
+    mock_openai_client: MagicMock,
+    mock_openai_config: MagicMock
+    ):
+    provider = OpenaiProvider(client=mock_openai_client, config=mock_openai_config)
+    prompt = Message(role="user", content="¿Y mañana?")
+    history = [Message(role="user", content="Hola"), Message(role="assistant", content="Buenas"),
+               prompt]
+
+    provider.generate_response(prompt, history)
+
+    messages = mock_openai_client.chat.completions.create.call_args.kwargs["messages"]
+    assert [m["content"] for m in messages] == ["Hola", "Buenas", "¿Y mañana?"]
+
+
+@patch('requests.Session.post')
 def test_generate_response_success(mock_post:MagicMock):
     mock_response = MagicMock()
     mock_response.json.return_value = {
@@ -76,5 +102,311 @@ def test_generate_response_success(mock_post:MagicMock):
     mock_post.assert_called_once()
     args, kwargs = mock_post.call_args
     assert args[0] == "http://localhost/api/chat"
-    assert kwargs['json']['model'] == "llama3"
-    assert not kwargs['json']['stream']
+    body = json.loads(kwargs['data'])
+    assert body['model'] == "llama3"
+    assert not body['stream']
+
+
+def test_echoprovider_streams_words():
+    config = EchoConfig(provider="echo")
+    provider = EchoProvider(config)
+    prompt = Message(role="user", content="Hola, ¿Eres tú?")
+
+    chunks = list(provider.stream_response(prompt, []))
+
+    assert len(chunks) == 3
+    assert "".join(chunks) == "Hola, ¿Eres tú?"
+
+
+def test_openai_stream_response(
+    mock_openai_client: MagicMock,
+    mock_openai_config: MagicMock
+    ):
+    def chunk(content):
+        piece = Mock()
+        piece.choices = [Mock()]
+        piece.choices[0].delta.content = content
+        return piece
+
+    mock_openai_client.chat.completions.create.return_value = iter(
+        [chunk("Test "), chunk(None), chunk("response")]
+    )
+    provider = OpenaiProvider(client=mock_openai_client, config=mock_openai_config)
+
+    prompt = Message(role="user", content="Test")
+    result = list(provider.stream_response(prompt, []))
+
+    assert result == ["Test ", "response"]
+    _, kwargs = mock_openai_client.chat.completions.create.call_args
+    assert kwargs["stream"] is True
+
+
+@patch('requests.Session.post')
+def test_ollama_stream_response_reads_ndjson(mock_post:MagicMock):
+    mock_response = MagicMock()
+    mock_response.__enter__.return_value = mock_response
+    mock_response.iter_lines.return_value = [
+        b'{"message": {"role": "assistant", "content": "Hola"}, "done": false}',
+        b'',
+        b'{"message": {"role": "assistant", "content": " mundo"}, "done": false}',
+        b'{"message": {"role": "assistant", "content": ""}, "done": true}',
+    ]
+    mock_post.return_value = mock_response
+
+    provider = OllamaProvider(OllamaConfig(base_url="http://localhost", model_name="llama3"))
+    prompt = Message(role="user", content="Hola")
+
+    result = list(provider.stream_response(prompt, []))
+
+    assert result == ["Hola", " mundo"]
+    _, kwargs = mock_post.call_args
+    assert json.loads(kwargs['data'])['stream']
+    assert kwargs['stream']
+
+
+@patch('requests.Session.post')
+def test_ollama_stream_response_reports_errors(mock_post:MagicMock):
+    mock_response = MagicMock()
+    mock_response.__enter__.return_value = mock_response
+    mock_response.iter_lines.return_value = [b'{"error": "model not found"}']
+    mock_post.return_value = mock_response
+
+    provider = OllamaProvider(OllamaConfig(base_url="http://localhost", model_name="llama3"))
+
+    with pytest.raises(RuntimeError, match="model not found"):
+        list(provider.stream_response(Message(role="user", content="Hola"), []))
+
+
+def test_async_ollama_generate_and_stream():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        assert request.url.path == "/api/chat"
+        if body["stream"]:
+            lines = [
+                {"message": {"role": "assistant", "content": "Hola"}, "done": False},
+                {"message": {"role": "assistant", "content": " mundo"}, "done": True},
+            ]
+            return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+        return httpx.Response(200, json={"message": {"content": "Hola mundo"}})
+
+    config = OllamaConfig(base_url="http://localhost", model_name="llama3")
+    client = httpx.AsyncClient(base_url=config.base_url, transport=httpx.MockTransport(handler))
+    provider = AsyncOllamaProvider(config, client=client)
+    prompt = Message(role="user", content="Hola")
+
+    async def run():
+        reply = await provider.generate_response(prompt, [])
+        chunks = [chunk async for chunk in provider.stream_response(prompt, [])]
+        await provider.aclose()
+        return reply, chunks
+
+    reply, chunks = asyncio.run(run())
+
+    assert reply.content == "Hola mundo"
+    assert chunks == ["Hola", " mundo"]
+
+
+def test_async_ollama_http_error():
+    config = OllamaConfig(base_url="http://localhost", model_name="llama3")
+    transport = httpx.MockTransport(lambda request: httpx.Response(500, text="boom"))
+    client = httpx.AsyncClient(base_url=config.base_url, transport=transport)
+    provider = AsyncOllamaProvider(config, client=client)
+
+    with pytest.raises(RuntimeError, match="HTTP error 500"):
+        asyncio.run(provider.generate_response(Message(role="user", content="Hola"), []))
+
+
+def test_async_openai_generate_response(mock_openai_config: MagicMock):
+    client = Mock()
+    mock_response = Mock()
+    mock_response.choices = [Mock()]
+    mock_response.choices[0].message.content = "Test response"
+    client.chat.completions.create = AsyncMock(return_value=mock_response)
+    provider = AsyncOpenaiProvider(client=client, config=mock_openai_config)
+
+    result = asyncio.run(provider.generate_response(Message(role="user", content="Test"), []))
+
+    assert result.content == "Test response"
+
+
+def test_ollama_session_uses_pool_settings():
+    config = OllamaConfig(pool_connections=2, pool_maxsize=8, max_retries=3, retry_backoff=0.1)
+
+    session = build_session(config)
+    adapter = session.get_adapter("http://localhost:11434")
+
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 8
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert 503 in adapter.max_retries.status_forcelist
+    assert session.headers.get("Connection") != "close"
+
+
+def test_ollama_session_without_keep_alive():
+    session = build_session(OllamaConfig(http_keep_alive=False))
+
+    assert session.headers["Connection"] == "close"
+
+
+@patch('requests.Session.post')
+def test_ollama_uses_connect_and_read_timeouts(mock_post:MagicMock):
+    mock_post.return_value.json.return_value = {"message": {"content": "ok"}}
+    config = OllamaConfig(connect_timeout=1.5, read_timeout=30)
+
+    provider = OllamaProvider(config)
+    provider.generate_response(Message(role="user", content="Hola"), [])
+
+    _, kwargs = mock_post.call_args
+    assert kwargs["timeout"] == (1.5, 30)
+
+
+def test_ollama_reuses_injected_session():
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+
+    provider = OllamaProvider(OllamaConfig(), session=session)
+
+    assert provider.validate_config()
+    assert provider.validate_config()
+    assert session.get.call_count == 2
+    provider.close()
+    session.close.assert_called_once()
+
+
+def test_ollama_payload_does_not_repeat_stored_prompt():
+    """The Agent stores the prompt before reading the history: it is sent once."""
+    prompt = Message(role="user", content="¿Y mañana?")
+    history = [Message(role="user", content="Hola"), Message(role="assistant", content="Buenas"),
+               Message(role="user", content="¿Y mañana?")]
+
+    payload = build_chat_payload(OllamaConfig(keep_alive="30m"), prompt, history, stream=False)
+
+    assert [m["content"] for m in payload["messages"]] == ["Hola", "Buenas", "¿Y mañana?"]
+    assert payload["keep_alive"] == "30m"
+    assert "keep_alive" not in build_chat_payload(OllamaConfig(), prompt, [], stream=False)
+
+
+class FakeOllamaSession:
+    """Session double answering /api/generate with a growing context and /api/chat plainly."""
+
+    def __init__(self, generate_status: int = 200) -> None:
+        self.requests: list[tuple[str, dict]] = []
+        self.generate_status = generate_status
+
+    def post(self, url: str, **kwargs) -> MagicMock:
+        endpoint, body = url.rsplit("/", 1)[-1], json.loads(kwargs["data"])
+        self.requests.append((endpoint, body))
+        response = MagicMock()
+        response.__enter__.return_value = response
+        if endpoint == "generate" and self.generate_status != 200:
+            response.status_code = self.generate_status
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError()
+            return response
+        reply = f"reply {len(self.requests)}"
+        context = [*body.get("context", []), len(self.requests)]
+        if endpoint == "chat":
+            response.json.return_value = {"message": {"content": reply}}
+        else:
+            response.json.return_value = {"response": reply, "context": context}
+        response.iter_lines.return_value = [
+            json.dumps({"response": reply, "done": False}).encode(),
+            json.dumps({"response": "", "done": True, "context": context}).encode(),
+        ]
+        return response
+
+
+def _talk(provider: OllamaProvider, memory: InMemoryBackend, text: str,
+          stream: bool = False) -> str:
+    """One Agent-like turn: store the prompt, read the history, store the reply."""
+    prompt = Message(role="user", content=text)
+    memory.add_message("user", text)
+    if stream:
+        reply = "".join(provider.stream_response(prompt, memory.get_history()))
+    else:
+        reply = provider.generate_response(prompt, memory.get_history()).content
+    memory.add_message("assistant", reply)
+    return reply
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_ollama_context_mode_sends_only_new_turn(stream: bool):
+    session = FakeOllamaSession()
+    provider = OllamaProvider(OllamaConfig(conversation_mode="context", keep_alive=-1),
+                              session=session)
+    memory = InMemoryBackend()
+
+    for text in ["Hola", "¿Qué tal?", "Adiós"]:
+        _talk(provider, memory, text, stream)
+
+    assert [endpoint for endpoint, _ in session.requests] == ["generate"] * 3
+    assert [body["prompt"] for _, body in session.requests] == ["Hola", "¿Qué tal?", "Adiós"]
+    assert [body.get("context") for _, body in session.requests] == [None, [1], [1, 2]]
+    assert all(body["keep_alive"] == -1 for _, body in session.requests)
+
+
+def test_ollama_context_mode_falls_back_when_state_is_lost():
+    session = FakeOllamaSession()
+    memory = InMemoryBackend()
+    _talk(OllamaProvider(OllamaConfig(conversation_mode="context"), session=session),
+          memory, "Hola")
+
+    # A new process knows nothing about the stored conversation
+    restarted = OllamaProvider(OllamaConfig(conversation_mode="context"), session=session)
+    _talk(restarted, memory, "¿Sigues ahí?")
+
+    endpoint, body = session.requests[-1]
+    assert endpoint == "chat"
+    assert [m["content"] for m in body["messages"]] == ["Hola", "reply 1", "¿Sigues ahí?"]
+
+
+def test_ollama_context_mode_falls_back_on_rejected_context():
+    session = FakeOllamaSession(generate_status=400)
+    provider = OllamaProvider(OllamaConfig(conversation_mode="context"), session=session)
+
+    assert _talk(provider, InMemoryBackend(), "Hola") == "reply 2"
+    assert [endpoint for endpoint, _ in session.requests] == ["generate", "chat"]
+
+
+def test_ollama_context_over_budget_is_dropped():
+    session = FakeOllamaSession()
+    provider = OllamaProvider(OllamaConfig(conversation_mode="context", context_tokens=2),
+                              session=session)
+    memory = InMemoryBackend()
+
+    for text in ["uno", "dos", "tres"]:
+        _talk(provider, memory, text)
+
+    assert [endpoint for endpoint, _ in session.requests] == ["generate", "generate", "chat"]
+
+
+def test_ollama_context_mode_sends_system_prompt_first():
+    session = FakeOllamaSession()
+    provider = OllamaProvider(OllamaConfig(conversation_mode="context"), session=session)
+    memory = InMemoryBackend()
+    memory.add_message("system", "Responde en castellano.")
+
+    for text in ["Hola", "¿Qué tal?"]:
+        _talk(provider, memory, text)
+
+    assert [endpoint for endpoint, _ in session.requests] == ["generate"] * 2
+    assert session.requests[0][1]["system"] == "Responde en castellano."
+    assert "system" not in session.requests[1][1]
+
+
+def test_ollama_context_mode_falls_back_when_history_changes():
+    """A summary replacing old turns is not in the stored context: the history goes to chat."""
+    session = FakeOllamaSession()
+    provider = OllamaProvider(OllamaConfig(conversation_mode="context"), session=session)
+    memory = InMemoryBackend()
+    _talk(provider, memory, "Hola")
+
+    prompt = Message(role="user", content="¿Sigues ahí?")
+    summary = Message(role="system", content="Resumen: el usuario saludó.")
+    provider.generate_response(prompt, [summary, *memory.get_history(), prompt])
+
+    endpoint, body = session.requests[-1]
+    assert endpoint == "chat"
+    assert [m["content"] for m in body["messages"]] == [
+        "Resumen: el usuario saludó.", "Hola", "reply 1", "¿Sigues ahí?"
+    ]
@@ -0,0 +1,220 @@
+import threading
+
+import pytest
+
+from smartbot.core.interfaces import (
+    LLMProvider,
+    Message,
+    ProviderError,
+    ProviderOverloadedError,
+)
+from smartbot.providers.models import ChatBotConfig, EchoConfig, OllamaConfig, RouterConfig
+from smartbot.providers.router import RouterProvider
+
+
+class FakeBackend(LLMProvider):
+    """Test double answering with its name, or failing on demand."""
+
+    def __init__(self, name: str) -> None:
+        self.config = OllamaConfig(base_url=f"http://{name}:11434")
+        self.name = name
+        self.calls = 0
+        self.failing = False
+        self.error: type[Exception] = RuntimeError
+        self.healthy = True
+        self.release = threading.Event()
+        self.release.set()
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.calls += 1
+        self.release.wait()
+        if self.failing:
+            raise self.error(f"{self.name} is down")
+        return Message(role="assistant", content=self.name)
+
+    def validate_config(self) -> bool:
+        return self.healthy
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+PROMPT = Message(role="user", content="Hola")
+
+
+def _router(backends: list[FakeBackend], clock: FakeClock | None = None,
+            **settings: object) -> RouterProvider:
+    config = RouterConfig(backends=[EchoConfig() for _ in backends], **settings)
+    return RouterProvider(config, backends, clock=clock or FakeClock())
+
+
+def test_requests_are_spread_over_idle_backends() -> None:
+    backends = [FakeBackend("a"), FakeBackend("b"), FakeBackend("c")]
+    router = _router(backends)
+
+    for _ in range(6):
+        router.generate_response(PROMPT, [])
+
+    assert [backend.calls for backend in backends] == [2, 2, 2]
+
+
+def test_least_outstanding_avoids_busy_backend() -> None:
+    """While a backend is stuck on a request the others take the traffic."""
+    slow, fast = FakeBackend("slow"), FakeBackend("fast")
+    slow.release.clear()
+    router = _router([slow, fast])
+
+    stuck = threading.Thread(target=router.generate_response, args=(PROMPT, []))
+    stuck.start()
+    while slow.calls == 0:
+        pass
+    replies = [router.generate_response(PROMPT, []).content for _ in range(3)]
+    slow.release.set()
+    stuck.join()
+
+    assert replies == ["fast", "fast", "fast"]
+
+
+def test_latency_strategy_prefers_fast_backend() -> None:
+    clock = FakeClock()
+    slow, fast = FakeBackend("slow"), FakeBackend("fast")
+    router = _router([slow, fast], clock, strategy="latency")
+    backends = {backend.name.split("@")[1]: backend for backend in router.backends}
+    backends["http://slow:11434"].latency = 2.0
+    backends["http://fast:11434"].latency = 0.1
+
+    replies = {router.generate_response(PROMPT, []).content for _ in range(4)}
+
+    assert replies == {"fast"}
+
+
+def test_failover_and_circuit_breaker() -> None:
+    """A failing backend is skipped and, after enough failures, left alone until cooldown."""
+    clock = FakeClock()
+    broken, spare = FakeBackend("broken"), FakeBackend("spare")
+    broken.failing = True
+    router = _router([broken, spare], clock, failure_threshold=2, cooldown_seconds=10)
+
+    replies = [router.generate_response(PROMPT, []).content for _ in range(6)]
+
+    assert replies == ["spare"] * 6
+    assert broken.calls == 2
+
+    # Half-open after the cooldown: a single successful probe closes the circuit
+    broken.failing = False
+    clock.now = 11
+    replies = {router.generate_response(PROMPT, []).content for _ in range(4)}
+    assert replies == {"broken", "spare"}
+
+
+def test_every_backend_failing_raises_provider_error() -> None:
+    backends = [FakeBackend("a"), FakeBackend("b")]
+    for backend in backends:
+        backend.failing = True
+    router = _router(backends)
+
+    with pytest.raises(ProviderError, match="a is down"):
+        router.generate_response(PROMPT, [])
+
+
+def test_failover_on_non_runtime_errors() -> None:
+    """Transport errors (OSError) fail over and release the backend."""
+    broken, spare = FakeBackend("broken"), FakeBackend("spare")
+    broken.failing = True
+    broken.error = ConnectionError
+    router = _router([broken, spare])
+
+    replies = [router.generate_response(PROMPT, []).content for _ in range(2)]
+    streamed = list(router.stream_response(PROMPT, []))
+
+    assert replies == ["spare", "spare"]
+    assert streamed == ["spare"]
+    assert [backend.outstanding for backend in router.backends] == [0, 0]
+    assert router.backends[0].failures == 3
+
+
+@pytest.mark.parametrize("error", [KeyError, TypeError])
+def test_programming_errors_propagate_without_opening_circuit(error: type[Exception]) -> None:
+    """A bug is re-raised unchanged: it neither fails over nor counts against the backend."""
+    backends = [FakeBackend("a"), FakeBackend("b")]
+    for backend in backends:
+        backend.failing = True
+        backend.error = error
+    router = _router(backends, failure_threshold=1)
+
+    with pytest.raises(error):
+        router.generate_response(PROMPT, [])
+    with pytest.raises(error):
+        list(router.stream_response(PROMPT, []))
+
+    assert sum(backend.calls for backend in backends) == 2
+    assert [backend.outstanding for backend in router.backends] == [0, 0]
+    assert [backend.failures for backend in router.backends] == [0, 0]
+
+
+def test_overloaded_backend_fails_over_without_opening_circuit() -> None:
+    """A backend shedding load is skipped, but it is not counted as broken."""
+    busy, spare = FakeBackend("busy"), FakeBackend("spare")
+    busy.failing = True
+    busy.error = ProviderOverloadedError
+    router = _router([busy, spare])
+
+    replies = [router.generate_response(PROMPT, []).content for _ in range(4)]
+
+    assert replies == ["spare"] * 4
+    assert router.backends[0].failures == 0
+
+    spare.failing = True
+    spare.error = ProviderOverloadedError
+    with pytest.raises(ProviderOverloadedError, match="Every backend is overloaded"):
+        router.generate_response(PROMPT, [])
+
+
+def test_closed_stream_is_not_a_failure() -> None:
+    backend = FakeBackend("a")
+    router = _router([backend])
+
+    stream = router.stream_response(PROMPT, [])
+    next(stream)
+    stream.close()
+
+    assert router.backends[0].outstanding == 0
+    assert router.backends[0].failures == 0
+
+
+def test_health_check_takes_backend_out_of_rotation() -> None:
+    sick, well = FakeBackend("sick"), FakeBackend("well")
+    sick.healthy = False
+    router = _router([sick, well])
+
+    router.check_health()
+    replies = {router.generate_response(PROMPT, []).content for _ in range(4)}
+
+    assert replies == {"well"}
+    assert router.validate_config()
+
+
+def test_stream_fails_over_before_first_chunk() -> None:
+    broken, spare = FakeBackend("broken"), FakeBackend("spare")
+    broken.failing = True
+    router = _router([broken, spare])
+
+    assert list(router.stream_response(PROMPT, [])) == ["spare"]
+
+
+def test_router_config_inherits_smallest_context_budget() -> None:
+    config = ChatBotConfig(bot_name="bot", llm={
+        "provider": "router",
+        "backends": [
+            {"provider": "ollama", "context_tokens": 2048},
+            {"provider": "ollama", "base_url": "http://gpu2:11434"},
+        ],
+    })
+
+    assert isinstance(config.llm, RouterConfig)
+    assert config.llm.context_tokens == 2048
@@ -0,0 +1,245 @@
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+from smartbot.runtime.batch import BatchItem, BatchRunner, build_responder, completed_items
+
+
+def write_prompts(path: Path, count: int) -> None:
+    with path.open("w", encoding="utf-8") as prompt_file:
+        for index in range(count):
+            prompt_file.write(json.dumps({"id": f"q{index}", "prompt": f"prompt {index}"}) + "\n")
+
+
+def read_results(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.fixture
+def prompts(tmp_path: Path) -> Path:
+    path = tmp_path / "prompts.jsonl"
+    write_prompts(path, 50)
+    return path
+
+
+def test_results_are_written_in_input_order(prompts: Path, tmp_path: Path) -> None:
+    """Workers finish out of order, the output is still in input order."""
+    def slow_echo(item: BatchItem) -> str:
+        time.sleep(random.uniform(0, 0.005))
+        return item.prompt.upper()
+
+    output = tmp_path / "results.jsonl"
+    report = BatchRunner(slow_echo, workers=8).run(str(prompts), str(output))
+
+    results = read_results(output)
+    assert [result["index"] for result in results] == list(range(50))
+    assert results[3] == {"index": 3, "id": "q3", "reply": "PROMPT 3"}
+    assert report.succeeded == 50
+    assert report.throughput > 0
+
+
+def test_in_flight_items_are_bounded(prompts: Path, tmp_path: Path) -> None:
+    """Only a bounded number of items is submitted ahead of the writer."""
+    started: list[int] = []
+    release = threading.Event()
+
+    def blocking(item: BatchItem) -> str:
+        started.append(item.index)
+        if item.index == 0:
+            release.wait(timeout=5)
+        return "ok"
+
+    runner = BatchRunner(blocking, workers=2)
+    thread = threading.Thread(
+        target=runner.run, args=(str(prompts), str(tmp_path / "results.jsonl"))
+    )
+    thread.start()
+    time.sleep(0.2)
+    in_flight = len(started)
+    release.set()
+    thread.join()
+
+    assert in_flight <= 2 * 4
+    assert len(started) == 50
+
+
+def test_failed_items_are_retried(prompts: Path, tmp_path: Path) -> None:
+    """Transient errors are retried; persistent ones become error records."""
+    attempts: dict[int, int] = {}
+
+    def flaky(item: BatchItem) -> str:
+        attempts[item.index] = attempts.get(item.index, 0) + 1
+        if item.index == 1 and attempts[item.index] < 2:
+            raise RuntimeError("temporary")
+        if item.index == 2:
+            raise RuntimeError("permanent")
+        return "ok"
+
+    output = tmp_path / "results.jsonl"
+    report = BatchRunner(flaky, workers=1, max_retries=2, retry_backoff=0).run(
+        str(prompts), str(output)
+    )
+
+    results = read_results(output)
+    assert results[1]["reply"] == "ok"
+    assert results[2]["error"] == "permanent"
+    assert attempts[2] == 3
+    assert report.failed == 1
+
+
+def test_invalid_lines_become_error_records(tmp_path: Path) -> None:
+    """A malformed input line does not stop the batch."""
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text('{"prompt": "hi"}\nnot json\n\n{"prompt": "bye"}\n', encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+
+    BatchRunner(lambda item: item.prompt).run(str(prompts), str(output))
+
+    results = read_results(output)
+    assert [result.get("reply") for result in results] == ["hi", None, "bye"]
+    assert "Invalid input" in results[1]["error"]
+
+
+def test_unexpected_errors_do_not_abort_the_run(tmp_path: Path) -> None:
+    """Blank prompts and non-RuntimeError failures (e.g. SDK errors) become error records."""
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text('{"prompt": "hi"}\n{"prompt": "   "}\n{"prompt": "boom"}\n'
+                       '{"prompt": "bye"}\n', encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+
+    def respond(item: BatchItem) -> str:
+        if item.prompt == "boom":
+            raise ConnectionError("connection reset")
+        return item.prompt
+
+    report = BatchRunner(respond, retry_backoff=0).run(str(prompts), str(output))
+
+    results = read_results(output)
+    assert [result.get("reply") for result in results] == ["hi", None, None, "bye"]
+    assert "Invalid input" in results[1]["error"]
+    assert results[2]["error"] == "connection reset"
+    assert report.failed == 2
+
+
+def test_session_turns_run_in_input_order(tmp_path: Path) -> None:
+    """Items of the same session never overlap and keep their input order."""
+    prompts = tmp_path / "prompts.jsonl"
+    with prompts.open("w", encoding="utf-8") as prompt_file:
+        for index in range(40):
+            item = {"prompt": f"turn {index}", "session_id": f"user{index % 2}"}
+            prompt_file.write(json.dumps(item) + "\n")
+    memory = SessionMemory(directory=str(tmp_path / "sessions"), max_messages=100)
+    respond = build_responder(EchoProvider(EchoConfig()), memory=memory)
+
+    def jittery(item: BatchItem) -> str:
+        time.sleep(random.uniform(0, 0.002))
+        return respond(item)
+
+    BatchRunner(jittery, workers=8).run(str(prompts), str(tmp_path / "results.jsonl"))
+
+    history = [m.content for m in memory.get_history("user0")]
+    assert history == [f"turn {index}" for index in range(0, 40, 2) for _ in range(2)]
+
+
+def test_resume_skips_completed_items(prompts: Path, tmp_path: Path) -> None:
+    """A resumed run only processes the items missing from the output."""
+    output = tmp_path / "results.jsonl"
+    BatchRunner(lambda item: "first").run(str(prompts), str(output))
+    lines = output.read_text(encoding="utf-8").splitlines(keepends=True)
+    # Simulate a run killed after 20 results, in the middle of the 21st
+    output.write_text("".join(lines[:20]) + lines[20][:5], encoding="utf-8")
+
+    seen: list[int] = []
+
+    def second(item: BatchItem) -> str:
+        seen.append(item.index)
+        return "second"
+
+    report = BatchRunner(second).run(str(prompts), str(output))
+
+    results = read_results(output)
+    assert [result["index"] for result in results] == list(range(50))
+    assert sorted(seen) == list(range(20, 50))
+    assert report.skipped == 20
+    assert completed_items(output) == set(range(50))
+
+
+def test_resume_retries_failed_items(prompts: Path, tmp_path: Path) -> None:
+    """Failed items are answered again; their error records are replaced."""
+    output = tmp_path / "results.jsonl"
+
+    def flaky(item: BatchItem) -> str:
+        if item.index % 10 == 3:
+            raise ConnectionError("connection reset")
+        return "first"
+
+    BatchRunner(flaky, max_retries=0).run(str(prompts), str(output))
+    report = BatchRunner(lambda item: "second").run(str(prompts), str(output))
+
+    results = read_results(output)
+    assert report.skipped == 45
+    assert report.succeeded == 5
+    assert sorted(result["index"] for result in results) == list(range(50))
+    assert all("error" not in result for result in results)
+    assert [result["reply"] for result in results[-5:]] == ["second"] * 5
+
+
+def test_only_agent_validation_errors_skip_retries(tmp_path: Path) -> None:
+    """A ValueError raised by a provider is retried like any other failure."""
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text('{"prompt": "hi"}\n', encoding="utf-8")
+    attempts: list[int] = []
+
+    def respond(item: BatchItem) -> str:
+        attempts.append(item.index)
+        if len(attempts) == 1:
+            raise ValueError("unexpected response format")
+        return "ok"
+
+    BatchRunner(respond, retry_backoff=0).run(str(prompts), str(tmp_path / "results.jsonl"))
+
+    assert len(attempts) == 2
+
+
+def test_no_resume_overwrites_output(prompts: Path, tmp_path: Path) -> None:
+    output = tmp_path / "results.jsonl"
+    BatchRunner(lambda item: "first").run(str(prompts), str(output))
+    BatchRunner(lambda item: "second").run(str(prompts), str(output), resume=False)
+
+    results = read_results(output)
+    assert len(results) == 50
+    assert {result["reply"] for result in results} == {"second"}
+
+
+def test_responder_isolates_items_without_memory() -> None:
+    """Without session memory every item is answered with an empty history."""
+    respond = build_responder(EchoProvider(EchoConfig()))
+
+    assert respond(BatchItem(index=0, item_id="a", prompt="one")) == "one"
+    assert respond(BatchItem(index=1, item_id="b", prompt="two")) == "two"
+
+
+def test_responder_uses_sessions(tmp_path: Path) -> None:
+    """With session memory each item continues its own conversation."""
+    memory = SessionMemory(directory=str(tmp_path))
+    respond = build_responder(EchoProvider(EchoConfig()), memory=memory)
+
+    respond(BatchItem(index=0, item_id="a", prompt="one", session_id="alice"))
+    respond(BatchItem(index=1, item_id="b", prompt="two"))
+
+    assert [m.content for m in memory.get_history("alice")] == ["one", "one"]
+    assert [m.content for m in memory.get_history("b")] == ["two", "two"]
+
+
+def test_invalid_settings() -> None:
+    with pytest.raises(ValueError):
+        BatchRunner(lambda item: "", workers=0)
+    with pytest.raises(ValueError):
+        BatchRunner(lambda item: "", max_retries=-1)
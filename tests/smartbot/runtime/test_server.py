@@ -0,0 +1,248 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import requests
+
+from smartbot.core.agent import Agent
+from smartbot.core.interfaces import LLMProvider, Message, ProviderOverloadedError
+from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+from smartbot.runtime.server import ChatServer
+from smartbot.utils.metrics import InMemoryMetrics, set_metrics
+
+
+class BlockingProvider(LLMProvider):
+    """Provider that holds every request until it is released."""
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        self.started.set()
+        self.release.wait(timeout=5)
+        return Message(role="assistant", content="done")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class SdkErrorProvider(LLMProvider):
+    """Provider failing like an SDK client does, with a non-RuntimeError exception."""
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        raise ConnectionError("connection reset by peer")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class BuggyProvider(LLMProvider):
+    """Provider with a programming error, whose details must not reach the client."""
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        raise ValueError("unexpected field 'secret'")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+class OverloadedProvider(LLMProvider):
+    """Provider whose admission control sheds every request."""
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        raise ProviderOverloadedError("Provider overloaded: request rejected (queue_full).")
+
+    def validate_config(self) -> bool:
+        return True
+
+
+def serve(agent: Agent, **options: int) -> ChatServer:
+    server = ChatServer(agent, port=0, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[ChatServer]:
+    agent = Agent(provider=EchoProvider(EchoConfig()), memory=SessionMemory(str(tmp_path)))
+    chat_server = serve(agent)
+    yield chat_server
+    chat_server.close()
+
+
+def test_chat_keeps_sessions_apart(server: ChatServer) -> None:
+    """Each session_id continues its own conversation."""
+    reply = requests.post(f"{server.url}/chat", json={"message": "Hola", "session_id": "alice"})
+    requests.post(f"{server.url}/chat", json={"message": "Hello", "session_id": "bob"})
+
+    assert reply.status_code == 200
+    assert reply.json() == {"reply": "Hola", "session_id": "alice"}
+    history = server.agent._memory.get_history("alice")
+    assert [m.content for m in history] == ["Hola", "Hola"]
+
+
+def test_stream_returns_ndjson_chunks(server: ChatServer) -> None:
+    """The streaming endpoint sends one JSON line per chunk and a final marker."""
+    response = requests.post(
+        f"{server.url}/chat/stream",
+        json={"message": "one two three", "session_id": "alice"},
+        stream=True,
+    )
+
+    lines = [json.loads(line) for line in response.iter_lines() if line]
+    assert "".join(line.get("chunk", "") for line in lines) == "one two three"
+    assert lines[-1] == {"done": True, "session_id": "alice"}
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[]", b'{"message": 3}'])
+def test_invalid_bodies_are_rejected(server: ChatServer, body: bytes) -> None:
+    response = requests.post(f"{server.url}/chat", data=body)
+
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_invalid_session_id_is_a_bad_request(server: ChatServer) -> None:
+    response = requests.post(f"{server.url}/chat", json={"message": "Hi", "session_id": "../x"})
+
+    assert response.status_code == 400
+
+
+def test_empty_message_is_a_bad_request(server: ChatServer) -> None:
+    response = requests.post(f"{server.url}/chat", json={"message": "  "})
+
+    assert response.status_code == 400
+
+
+def test_unknown_endpoint(server: ChatServer) -> None:
+    assert requests.get(f"{server.url}/nope").status_code == 404
+    assert requests.get(f"{server.url}/health").json()["status"] == "ok"
+
+
+def test_single_conversation_agent_is_served() -> None:
+    """Without session memory the requests simply omit session_id."""
+    chat_server = serve(Agent(provider=EchoProvider(EchoConfig()), memory=InMemoryBackend()))
+    try:
+        response = requests.post(f"{chat_server.url}/chat", json={"message": "Hi"})
+        assert response.json() == {"reply": "Hi", "session_id": None}
+    finally:
+        chat_server.close()
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_provider_errors_answer_502(path: str) -> None:
+    chat_server = serve(Agent(provider=SdkErrorProvider(), memory=InMemoryBackend()))
+    try:
+        response = requests.post(f"{chat_server.url}{path}", json={"message": "Hi"})
+
+        assert response.status_code == 502
+        assert response.json() == {"error": "connection reset by peer"}
+    finally:
+        chat_server.close()
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_unexpected_errors_answer_500(path: str, caplog: pytest.LogCaptureFixture) -> None:
+    """A bug is not the client's fault (400) nor the backend's (502)."""
+    chat_server = serve(Agent(provider=BuggyProvider(), memory=InMemoryBackend()))
+    try:
+        response = requests.post(f"{chat_server.url}{path}", json={"message": "Hi"})
+
+        assert response.status_code == 500
+        assert response.json() == {"error": "Internal server error"}
+        assert any(record.exc_info for record in caplog.records)
+    finally:
+        chat_server.close()
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_shed_requests_answer_503(path: str) -> None:
+    """Load shed by the provider is reported as temporary, not as a broken backend."""
+    chat_server = serve(Agent(provider=OverloadedProvider(), memory=InMemoryBackend()))
+    try:
+        response = requests.post(f"{chat_server.url}{path}", json={"message": "Hi"})
+
+        assert response.status_code == 503
+        assert "overloaded" in response.json()["error"]
+    finally:
+        chat_server.close()
+
+
+def test_full_queue_answers_503() -> None:
+    """Once workers and queue are busy, new requests are rejected right away."""
+    provider = BlockingProvider()
+    chat_server = serve(Agent(provider=provider, memory=InMemoryBackend()), workers=1,
+                        queue_size=0)
+    busy = threading.Thread(
+        target=requests.post, args=(f"{chat_server.url}/chat",), kwargs={"json": {"message": "a"}}
+    )
+    busy.start()
+    try:
+        assert provider.started.wait(timeout=5)
+        rejected = requests.post(f"{chat_server.url}/chat", json={"message": "b"})
+
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "1"
+    finally:
+        provider.release.set()
+        busy.join()
+        chat_server.close()
+
+
+def test_idle_connection_gives_its_worker_back() -> None:
+    """A keep-alive client that stays idle does not hold the only worker."""
+    chat_server = serve(Agent(provider=EchoProvider(EchoConfig()), memory=InMemoryBackend()),
+                        workers=1)
+    idle = requests.Session()
+    try:
+        assert idle.post(f"{chat_server.url}/chat", json={"message": "a"}).status_code == 200
+
+        start = time.monotonic()
+        response = requests.post(f"{chat_server.url}/chat", json={"message": "b"}, timeout=5)
+
+        assert response.status_code == 200
+        assert time.monotonic() - start < 1
+    finally:
+        idle.close()
+        chat_server.close()
+
+
+def test_close_flushes_agent(tmp_path: Path) -> None:
+    """Graceful shutdown closes the memory backend of the agent."""
+    memory = SessionMemory(str(tmp_path))
+    chat_server = serve(Agent(provider=EchoProvider(EchoConfig()), memory=memory))
+    requests.post(f"{chat_server.url}/chat", json={"message": "Hi", "session_id": "alice"})
+
+    chat_server.close()
+
+    assert memory.hot_sessions == 0
+    assert (tmp_path / "alice.jsonl").exists()
+
+
+def test_invalid_settings() -> None:
+    agent = Agent(provider=EchoProvider(EchoConfig()), memory=InMemoryBackend())
+    with pytest.raises(ValueError):
+        ChatServer(agent, port=0, workers=0)
+
+
+def test_metrics_endpoint(server: ChatServer) -> None:
+    """/metrics is only served when a metrics sink is installed."""
+    assert requests.get(f"{server.url}/metrics").status_code == 404
+
+    set_metrics(InMemoryMetrics())
+    try:
+        requests.post(f"{server.url}/chat", json={"message": "Hi", "session_id": "alice"})
+        response = requests.get(f"{server.url}/metrics")
+    finally:
+        set_metrics(None)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert 'smartbot_turn_seconds_count{mode="blocking"} 1' in response.text
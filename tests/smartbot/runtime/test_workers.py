@@ -0,0 +1,270 @@
+import functools
+import os
+import signal
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import requests
+
+from smartbot.core.agent import Agent
+from smartbot.core.interfaces import LLMProvider, Message
+from smartbot.memory.in_memory import InMemoryBackend
+from smartbot.memory.session_memory import SessionMemory
+from smartbot.runtime.server import ChatServer
+from smartbot.runtime.workers import AgentWorkerPool, WorkerCrashedError
+from smartbot.utils.metrics import InMemoryMetrics, set_metrics
+
+
+class PidProvider(LLMProvider):
+    """Provider answering with its process ID and the length of the history it was sent."""
+
+    def generate_response(self, prompt: Message, history: list[Message]) -> Message:
+        if prompt.content == "boom":
+            raise ConnectionError("backend unreachable")
+        if prompt.content == "hang":
+            time.sleep(60)
+        return Message(role="assistant", content=f"{os.getpid()}:{len(history)}")
+
+    def stream_response(self, prompt: Message, history: list[Message]) -> Iterator[str]:
+        yield from ["Hola", " desde ", str(os.getpid())]
+
+    def validate_config(self) -> bool:
+        return True
+
+
+def pid_agent(directory: str) -> Agent:
+    """Worker factory: module level, so the spawned processes can unpickle it."""
+    return Agent(provider=PidProvider(), memory=SessionMemory(directory=directory))
+
+
+def buffered_agent(directory: str) -> Agent:
+    """Worker factory whose writes stay in memory until the agent is closed."""
+    memory = SessionMemory(directory=directory, durability="batched", flush_interval=60)
+    return Agent(provider=PidProvider(), memory=memory)
+
+
+def measured_agent(directory: str) -> Agent:
+    set_metrics(InMemoryMetrics())
+    return pid_agent(directory)
+
+
+def single_conversation_agent() -> Agent:
+    return Agent(provider=PidProvider(), memory=InMemoryBackend())
+
+
+def broken_agent() -> Agent:
+    raise ValueError("invalid configuration")
+
+
+def start_pool(tmp_path: Path, processes: int = 2, **options: float) -> AgentWorkerPool:
+    pool = AgentWorkerPool(functools.partial(pid_agent, str(tmp_path)), processes, **options)
+    assert pool.wait_ready(timeout=30)
+    return pool
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory: pytest.TempPathFactory) -> Iterator[AgentWorkerPool]:
+    pool = start_pool(tmp_path_factory.mktemp("sessions"))
+    yield pool
+    pool.close()
+
+
+def _wait_for_restart(pool: AgentWorkerPool, restarts: int) -> None:
+    deadline = time.monotonic() + 30
+    while pool.restarts < restarts:
+        assert time.monotonic() < deadline, "worker was not restarted"
+        time.sleep(0.05)
+    assert pool.wait_ready(timeout=30)
+
+
+def test_sessions_stick_to_one_worker(pool: AgentWorkerPool) -> None:
+    """Every turn of a session reaches the same process, which keeps its history."""
+    served_by = set()
+    for number in range(10):
+        session_id = f"user-{number}"
+        replies = [pool.handle_message("Hola", session_id=session_id) for _ in range(3)]
+        pids = {reply.split(":")[0] for reply in replies}
+
+        assert len(pids) == 1
+        assert pids == {str(pool.pids[pool.worker_for(session_id)])}
+        # The prompt is part of the history, which grows by two messages a turn
+        assert [reply.split(":")[1] for reply in replies] == ["1", "3", "5"]
+        served_by |= pids
+
+    assert len(served_by) == 2
+
+
+def test_concurrent_turns(pool: AgentWorkerPool) -> None:
+    replies: list[str] = []
+
+    def chat(number: int) -> None:
+        replies.append(pool.handle_message("Hola", session_id=f"concurrent-{number}"))
+
+    threads = [threading.Thread(target=chat, args=(number,)) for number in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(replies) == 16
+
+
+def test_stream_from_worker(pool: AgentWorkerPool) -> None:
+    chunks = list(pool.stream_message("Hola", session_id="stream"))
+
+    assert chunks == ["Hola", " desde ", str(pool.pids[pool.worker_for("stream")])]
+
+
+def test_errors_cross_the_process_boundary(pool: AgentWorkerPool) -> None:
+    with pytest.raises(ConnectionError, match="backend unreachable"):
+        pool.handle_message("boom", session_id="errors")
+    # SessionMemory rejects IDs that would escape its directory
+    with pytest.raises(ValueError):
+        pool.handle_message("Hola", session_id="../escape")
+
+
+def test_served_over_http(pool: AgentWorkerPool) -> None:
+    server = ChatServer(pool, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        response = requests.post(
+            f"{server.url}/chat", json={"message": "Hola", "session_id": "http"}, timeout=10
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response.status_code == 200
+    assert response.json()["reply"].startswith(str(pool.pids[pool.worker_for("http")]))
+
+
+def test_dead_worker_is_replaced(tmp_path: Path) -> None:
+    pool = start_pool(tmp_path, health_interval=0.05)
+    try:
+        index = pool.worker_for("alice")
+        pool.handle_message("Hola", session_id="alice")
+        old_pid = pool.pids[index]
+
+        os.kill(old_pid, signal.SIGKILL)
+        _wait_for_restart(pool, 1)
+        reply = pool.handle_message("Hola", session_id="alice")
+    finally:
+        pool.close()
+
+    # A new process, which reloaded the session from disk
+    assert reply.split(":") == [str(pool.pids[index]), "3"]
+    assert pool.pids[index] != old_pid
+
+
+def test_turns_of_a_crashed_worker_fail(tmp_path: Path) -> None:
+    pool = start_pool(tmp_path, processes=1, health_interval=60)
+    try:
+        errors: list[Exception] = []
+
+        def hang() -> None:
+            try:
+                pool.handle_message("hang", session_id="bob")
+            except WorkerCrashedError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=hang)
+        thread.start()
+        time.sleep(0.2)
+        os.kill(pool.pids[0], signal.SIGKILL)
+        thread.join(timeout=10)
+    finally:
+        pool.close()
+
+    assert len(errors) == 1
+
+
+def test_unresponsive_worker_is_replaced(tmp_path: Path) -> None:
+    pool = start_pool(tmp_path, processes=1, health_interval=0.05, health_timeout=0.2)
+    try:
+        old_pid = pool.pids[0]
+        os.kill(old_pid, signal.SIGSTOP)
+        _wait_for_restart(pool, 1)
+        reply = pool.handle_message("Hola")
+    finally:
+        pool.close()
+
+    assert reply.startswith(str(pool.pids[0]))
+    assert pool.pids[0] != old_pid
+
+
+def test_restarted_worker_flushes_its_memory(tmp_path: Path) -> None:
+    """A worker that answers again before the deadline saves its buffered writes."""
+    pool = AgentWorkerPool(functools.partial(buffered_agent, str(tmp_path)), 1,
+                           health_interval=0.05, health_timeout=0.2)
+    try:
+        assert pool.wait_ready(timeout=30)
+        pool.handle_message("Hola", session_id="carol")
+        old_pid = pool.pids[0]
+        os.kill(old_pid, signal.SIGSTOP)
+        # Declared unresponsive after 0.2 s; resumed while it is asked to stop
+        threading.Timer(1.0, os.kill, (old_pid, signal.SIGCONT)).start()
+        _wait_for_restart(pool, 1)
+        reply = pool.handle_message("Hola", session_id="carol")
+    finally:
+        pool.close()
+
+    assert reply.split(":") == [str(pool.pids[0]), "3"]
+
+
+def test_health_checks_ping_workers_at_once(tmp_path: Path) -> None:
+    pool = start_pool(tmp_path, health_interval=60, health_timeout=1, stop_timeout=0.1)
+    try:
+        for pid in pool.pids:
+            assert pid is not None
+            os.kill(pid, signal.SIGSTOP)
+        start = time.monotonic()
+        pool.check_health()
+        elapsed = time.monotonic() - start
+    finally:
+        pool.close()
+
+    assert pool.restarts == 2
+    assert elapsed < 1.8
+
+
+def test_metrics_of_the_workers_are_merged(tmp_path: Path) -> None:
+    set_metrics(InMemoryMetrics())
+    pool = AgentWorkerPool(functools.partial(measured_agent, str(tmp_path)), 2)
+    try:
+        assert pool.wait_ready(timeout=30)
+        for number in range(6):
+            pool.handle_message("Hola", session_id=f"metrics-{number}")
+        metrics = pool.metrics()
+    finally:
+        pool.close()
+        set_metrics(None)
+
+    assert metrics is not None
+    histogram = metrics.histogram("turn_seconds", mode="blocking")
+    assert histogram is not None
+    assert histogram.count == 6
+
+
+def test_single_conversation_memory_is_refused() -> None:
+    """Every worker would write the same history, so only one process may own it."""
+    with pytest.raises(WorkerCrashedError, match="session-keyed memory"):
+        AgentWorkerPool(single_conversation_agent, 2)
+
+    pool = AgentWorkerPool(single_conversation_agent, 1)
+    try:
+        assert pool.handle_message("Hola").endswith(":1")
+    finally:
+        pool.close()
+
+
+def test_rejects_invalid_sizes() -> None:
+    with pytest.raises(ValueError):
+        AgentWorkerPool(functools.partial(pid_agent, "unused"), 0)
+
+
+def test_factory_failure_stops_startup() -> None:
+    with pytest.raises(WorkerCrashedError, match="while building its agent"):
+        AgentWorkerPool(broken_agent, 2)
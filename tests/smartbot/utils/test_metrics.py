@@ -0,0 +1,128 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from smartbot.core.agent import Agent
+from smartbot.memory.json_memory import JsonFileMemory
+from smartbot.providers.echo_provider import EchoProvider
+from smartbot.providers.models import EchoConfig
+from smartbot.utils.metrics import (
+    InMemoryMetrics,
+    NullMetrics,
+    get_metrics,
+    set_metrics,
+)
+
+
+@pytest.fixture
+def metrics() -> Iterator[InMemoryMetrics]:
+    sink = InMemoryMetrics(buckets=(0.1, 1.0))
+    set_metrics(sink)
+    yield sink
+    set_metrics(None)
+
+
+def test_default_sink_is_disabled() -> None:
+    """Without configuration every call is a no-op."""
+    sink = get_metrics()
+
+    assert isinstance(sink, NullMetrics)
+    with sink.span("anything"):
+        sink.increment("anything")
+    timer = sink.timer("anything")
+    timer.lap("phase")
+    timer.stop()
+
+
+def test_counters_and_histograms(metrics: InMemoryMetrics) -> None:
+    metrics.increment("requests_total", backend="json")
+    metrics.increment("requests_total", 2, backend="json")
+    metrics.observe("turn_seconds", 0.05)
+    metrics.observe("turn_seconds", 0.5)
+    metrics.observe("turn_seconds", 5)
+
+    histogram = metrics.histogram("turn_seconds")
+    assert metrics.counter("requests_total", backend="json") == 3
+    assert histogram is not None
+    assert histogram.bucket_counts == [1, 1]
+    assert histogram.count == 3
+
+
+def test_merge_adds_snapshots(metrics: InMemoryMetrics) -> None:
+    """Series of other processes add up; the snapshot is an independent copy."""
+    other = InMemoryMetrics(buckets=(0.1, 1.0))
+    other.increment("requests_total", 2, backend="json")
+    other.increment("restarts_total")
+    other.observe("turn_seconds", 0.5)
+    metrics.increment("requests_total", backend="json")
+    metrics.observe("turn_seconds", 0.05)
+
+    snapshot = other.snapshot()
+    metrics.merge(snapshot)
+    metrics.merge(snapshot)
+
+    histogram = metrics.histogram("turn_seconds")
+    assert metrics.counter("requests_total", backend="json") == 5
+    assert metrics.counter("restarts_total") == 2
+    assert histogram is not None
+    assert histogram.bucket_counts == [1, 2]
+    assert other.histogram("turn_seconds").count == 1  # type: ignore[union-attr]
+
+    mismatched = InMemoryMetrics(buckets=(1.0,))
+    mismatched.observe("turn_seconds", 0.5)
+    with pytest.raises(ValueError):
+        metrics.merge(mismatched.snapshot())
+
+
+def test_phase_timer(metrics: InMemoryMetrics) -> None:
+    """Each lap is observed as a phase and stop observes the whole sequence."""
+    timer = metrics.timer("turn_seconds", mode="blocking")
+    timer.lap("memory_write")
+    timer.lap("provider")
+    timer.lap("memory_write")
+    timer.stop()
+
+    writes = metrics.histogram("phase_seconds", phase="memory_write")
+    turns = metrics.histogram("turn_seconds", mode="blocking")
+    assert writes is not None
+    assert writes.count == 2
+    assert turns is not None
+    assert turns.count == 1
+
+
+def test_prometheus_rendering(metrics: InMemoryMetrics) -> None:
+    """Series are rendered with cumulative buckets and escaped labels."""
+    metrics.increment("tokens_total", 12, direction="in")
+    metrics.observe("phase_seconds", 0.05, phase='say "hi"')
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE smartbot_tokens_total counter" in text
+    assert 'smartbot_tokens_total{direction="in"} 12' in text
+    assert 'smartbot_phase_seconds_bucket{phase="say \\"hi\\"",le="0.1"} 1' in text
+    assert 'smartbot_phase_seconds_bucket{phase="say \\"hi\\"",le="+Inf"} 1' in text
+    assert 'smartbot_phase_seconds_count{phase="say \\"hi\\""} 1' in text
+
+
+def test_agent_reports_phases_and_tokens(metrics: InMemoryMetrics, tmp_path: Path) -> None:
+    """A turn records its phases, its tokens and the bytes written to disk."""
+    memory = JsonFileMemory(file_path=str(tmp_path / "history.json"))
+    agent = Agent(provider=EchoProvider(EchoConfig()), memory=memory)
+
+    agent.handle_message("Hola mundo")
+    list(agent.stream_message("Adiós"))
+
+    turns = metrics.histogram("turn_seconds", mode="blocking")
+    assert turns is not None
+    assert turns.count == 1
+    assert metrics.histogram("phase_seconds", phase="provider") is not None
+    assert metrics.histogram("first_chunk_seconds") is not None
+    assert metrics.counter("tokens_total", direction="in") > 0
+    assert metrics.counter("tokens_total", direction="out") > 0
+    assert metrics.counter("memory_bytes_written_total", backend="json") > 0
+
+
+def test_invalid_buckets() -> None:
+    with pytest.raises(ValueError):
+        InMemoryMetrics(buckets=(1.0, 0.1))
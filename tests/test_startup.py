@@ -0,0 +1,71 @@
+"""Cold start of the command-line interface.
+
+Every test runs a fresh interpreter, so the modules already loaded by the
+test session do not hide what ``import main`` costs.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["openai", "httpx", "requests"]
+# Imported by main only in the branch whose feature is configured
+OPTIONAL_MODULES = [
+    "smartbot.memory.retrieval",
+    "smartbot.memory.sqlite_memory",
+    "smartbot.memory.summarizing",
+    "smartbot.providers.cache",
+    "smartbot.providers.coalescing",
+    "smartbot.providers.hedging",
+    "smartbot.providers.limiter",
+    "smartbot.providers.router",
+    "smartbot.runtime.batch",
+    "smartbot.runtime.server",
+    "smartbot.runtime.workers",
+    "numpy",
+    "sqlite3",
+    "multiprocessing",
+    "http.server",
+]
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+
+
+def _loaded_by_main(modules: list[str]) -> list[str]:
+    code = f"import json, sys, main; print(json.dumps([m for m in {modules} if m in sys.modules]))"
+    return json.loads(_run(code).stdout)
+
+
+def test_import_main_skips_provider_sdks() -> None:
+    """The SDKs are only imported once their provider is configured."""
+    assert _loaded_by_main(HEAVY_MODULES) == []
+
+
+def test_import_main_skips_optional_features() -> None:
+    """Regression guard on what ``import main`` loads, instead of a flaky time budget."""
+    assert _loaded_by_main(OPTIONAL_MODULES) == []
+
+
+@pytest.mark.parametrize("provider", ["echo", "ollama", "openai"])
+def test_registry_entries_resolve(provider: str) -> None:
+    code = f"import main; print(main.load_provider_class({provider!r}).__name__)"
+
+    assert _run(code).stdout.strip().endswith("Provider")
+
+
+def test_unknown_provider_rejected() -> None:
+    code = "import main; main.load_provider_class('nope')"
+
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        _run(code)
+
+    assert "Unsupported provider: nope" in error.value.stderr